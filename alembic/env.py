@@ -1,16 +1,22 @@
 from logging.config import fileConfig
 from sqlalchemy import engine_from_config, pool
+from sqlalchemy.engine import make_url
 from sqlmodel import SQLModel
 from alembic import context
-from models import task, token, role, user
+from models import task, token, role, user, event, archive, project, idempotency, history, stats
 from src.config import settings
 
-DB_URL = settings.DB_URL
-
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
-config.set_main_option("sqlalchemy.url", DB_URL)
+
+# Every shard carries the full schema: alembic -x shard=<name> upgrade head
+SHARD = context.get_x_argument(as_dictionary=True).get("shard", "default")
+if SHARD == "default":
+    DB_URL = settings.DB_URL
+else:
+    DB_URL = make_url(settings.DB_SHARDS[SHARD]).set(drivername="postgresql").render_as_string(hide_password=False)
+config.set_main_option("sqlalchemy.url", DB_URL.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
@@ -0,0 +1,63 @@
+"""Task event outbox
+
+Revision ID: 143b5e286f2b
+Revises: b13b4753e276
+Create Date: 2026-10-19 17:10:42.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '143b5e286f2b'
+down_revision: Union[str, None] = 'b13b4753e276'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('taskevent',
+    sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=True),
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('event_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('parent_task_id', sa.Uuid(), nullable=True),
+    sa.Column('created_by', sa.Uuid(), nullable=True),
+    sa.Column('assignee_ids', postgresql.ARRAY(sa.Uuid()), server_default='{}', nullable=False),
+    sa.Column('ancestor_ids', postgresql.ARRAY(sa.Uuid()), server_default='{}', nullable=False),
+    sa.Column('changes', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('seq')
+    )
+    # Rows still waiting for a sequence number, in insertion order
+    op.create_index('ix_taskevent_unstamped', 'taskevent', ['id'], postgresql_where=sa.text('seq IS NULL'))
+    op.execute("CREATE SEQUENCE taskevent_seq_seq OWNED BY taskevent.seq")
+
+    # Wake up the dispatchers when a writer commits new events
+    op.execute("""
+        CREATE FUNCTION notify_task_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('task_events', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER taskevent_notify
+        AFTER INSERT ON taskevent
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_task_event()
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS taskevent_notify ON taskevent")
+    op.execute("DROP FUNCTION IF EXISTS notify_task_event()")
+    op.drop_index('ix_taskevent_unstamped', table_name='taskevent')
+    op.drop_table('taskevent')
@@ -0,0 +1,32 @@
+"""Task overdue tracking
+
+Revision ID: 8752268a2fd5
+Revises: 143b5e286f2b
+Create Date: 2026-10-19 17:45:03.512870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8752268a2fd5'
+down_revision: Union[str, None] = '143b5e286f2b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('task', sa.Column('overdue_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index('ix_task_open_due_date', 'task', ['due_date', 'id'], postgresql_where=sa.text("status <> 'completed'"))
+    op.create_index('ix_task_unmarked_overdue', 'task', ['due_date'], postgresql_where=sa.text("status <> 'completed' AND overdue_at IS NULL"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_unmarked_overdue', table_name='task')
+    op.drop_index('ix_task_open_due_date', table_name='task')
+    op.drop_column('task', 'overdue_at')
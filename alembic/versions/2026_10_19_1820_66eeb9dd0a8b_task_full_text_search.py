@@ -0,0 +1,44 @@
+"""Task full text search
+
+Revision ID: 66eeb9dd0a8b
+Revises: 8752268a2fd5
+Create Date: 2026-10-19 18:20:37.904125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '66eeb9dd0a8b'
+down_revision: Union[str, None] = '8752268a2fd5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Adding a stored generated column rewrites the table once; existing rows are indexed immediately
+    op.add_column('task', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index('ix_task_search_vector', 'task', ['search_vector'], postgresql_using='gin')
+    op.create_index('ix_task_title_trgm', 'task', ['title'], postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_title_trgm', table_name='task')
+    op.drop_index('ix_task_search_vector', table_name='task')
+    op.drop_column('task', 'search_vector')
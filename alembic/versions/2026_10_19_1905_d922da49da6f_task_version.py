@@ -0,0 +1,29 @@
+"""Task version for optimistic concurrency
+
+Revision ID: d922da49da6f
+Revises: 66eeb9dd0a8b
+Create Date: 2026-10-19 19:05:12.630419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd922da49da6f'
+down_revision: Union[str, None] = '66eeb9dd0a8b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant server default: no table rewrite on Postgres 11+
+    op.add_column('task', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('task', 'version')
@@ -0,0 +1,32 @@
+"""Task pending queue index
+
+Revision ID: 9b63146203a4
+Revises: d922da49da6f
+Create Date: 2026-10-19 19:40:51.207316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b63146203a4'
+down_revision: Union[str, None] = 'd922da49da6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_task_pending_queue', 'task',
+        [sa.text('priority DESC'), sa.text('due_date ASC NULLS LAST'), 'created_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_pending_queue', table_name='task')
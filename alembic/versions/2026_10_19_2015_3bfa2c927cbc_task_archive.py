@@ -0,0 +1,63 @@
+"""Task archive
+
+Revision ID: 3bfa2c927cbc
+Revises: 9b63146203a4
+Create Date: 2026-10-19 20:15:28.441903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3bfa2c927cbc'
+down_revision: Union[str, None] = '9b63146203a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('task', sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True))
+    # Best available approximation for tasks completed before this column existed
+    op.execute("UPDATE task SET completed_at = updated_at WHERE status = 'completed'")
+    op.create_index('ix_task_completed_at', 'task', ['completed_at'], postgresql_where=sa.text("status = 'completed'"))
+    # Subtask lookups (detail endpoint, archiver's "no subtasks left" check)
+    op.create_index(op.f('ix_task_parent_task_id'), 'task', ['parent_task_id'], unique=False)
+
+    op.create_table('taskarchive',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('title', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('description', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('status', postgresql.ENUM('pending', 'in_progress', 'completed', name='taskstatus', create_type=False), nullable=False),
+    sa.Column('priority', postgresql.ENUM('low', 'medium', 'high', name='taskpriority', create_type=False), nullable=False),
+    sa.Column('due_date', sa.Date(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('overdue_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('created_by', sa.Uuid(), nullable=True),
+    sa.Column('parent_task_id', sa.Uuid(), nullable=True),
+    sa.Column('assignee_ids', postgresql.ARRAY(sa.Uuid()), server_default='{}', nullable=False),
+    sa.Column('depends_on_ids', postgresql.ARRAY(sa.Uuid()), server_default='{}', nullable=False),
+    sa.Column('blocked_by_ids', postgresql.ARRAY(sa.Uuid()), server_default='{}', nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id', 'completed_at'),
+    postgresql_partition_by='RANGE (completed_at)'
+    )
+    op.create_index('ix_taskarchive_parent_task_id', 'taskarchive', ['parent_task_id'])
+    # Monthly partitions are created on demand by the archiver (src/taskmanager/archive.py)
+
+
+def downgrade() -> None:
+    # Archived rows are not moved back; restore them before downgrading if they are still needed
+    op.drop_index('ix_taskarchive_parent_task_id', table_name='taskarchive')
+    op.drop_table('taskarchive')
+    op.drop_index(op.f('ix_task_parent_task_id'), table_name='task')
+    op.drop_index('ix_task_completed_at', table_name='task')
+    op.drop_column('task', 'completed_at')
@@ -0,0 +1,77 @@
+"""Projects
+
+Revision ID: a840ba730abe
+Revises: 3bfa2c927cbc
+Create Date: 2026-10-19 20:50:09.775031
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a840ba730abe'
+down_revision: Union[str, None] = '3bfa2c927cbc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_PROJECT_ID = '00000000-0000-0000-0000-000000000001'
+
+
+def upgrade() -> None:
+    # Run once per shard: alembic -x shard=<name> upgrade head
+    op.create_table('project',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('shard', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('status', sa.Enum('active', 'moving', name='projectstatus'), nullable=False),
+    sa.Column('created_by', sa.Uuid(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        f"INSERT INTO project (id, name, shard, status, created_at) "
+        f"VALUES ('{DEFAULT_PROJECT_ID}', 'Default', 'default', 'active', now())"
+    )
+
+    op.add_column('task', sa.Column('project_id', sa.Uuid(), nullable=True))
+    op.execute(f"UPDATE task SET project_id = '{DEFAULT_PROJECT_ID}'")
+    op.alter_column('task', 'project_id', nullable=False)
+    op.create_foreign_key('task_project_id_fkey', 'task', 'project', ['project_id'], ['id'])
+    op.create_index('ix_task_project_id_created_at', 'task', ['project_id', 'created_at'])
+
+    # Project-scoped queries lead with project_id
+    op.drop_index('ix_task_open_due_date', table_name='task')
+    op.create_index('ix_task_open_due_date', 'task', ['project_id', 'due_date', 'id'], postgresql_where=sa.text("status <> 'completed'"))
+    op.drop_index('ix_task_pending_queue', table_name='task')
+    op.create_index(
+        'ix_task_pending_queue', 'task',
+        ['project_id', sa.text('priority DESC'), sa.text('due_date ASC NULLS LAST'), 'created_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+    op.add_column('taskevent', sa.Column('project_id', sa.Uuid(), nullable=True))
+    op.add_column('taskarchive', sa.Column('project_id', sa.Uuid(), nullable=True))
+    op.execute(f"UPDATE taskarchive SET project_id = '{DEFAULT_PROJECT_ID}'")
+
+
+def downgrade() -> None:
+    op.drop_column('taskarchive', 'project_id')
+    op.drop_column('taskevent', 'project_id')
+    op.drop_index('ix_task_pending_queue', table_name='task')
+    op.create_index(
+        'ix_task_pending_queue', 'task',
+        [sa.text('priority DESC'), sa.text('due_date ASC NULLS LAST'), 'created_at'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.drop_index('ix_task_open_due_date', table_name='task')
+    op.create_index('ix_task_open_due_date', 'task', ['due_date', 'id'], postgresql_where=sa.text("status <> 'completed'"))
+    op.drop_index('ix_task_project_id_created_at', table_name='task')
+    op.drop_constraint('task_project_id_fkey', 'task', type_='foreignkey')
+    op.drop_column('task', 'project_id')
+    op.drop_table('project')
+    op.execute("DROP TYPE IF EXISTS projectstatus")
@@ -0,0 +1,76 @@
+"""Task history
+
+Revision ID: c61e2b8d4f17
+Revises: 5f0c7d2e9a41
+Create Date: 2026-10-19 22:00:37.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c61e2b8d4f17'
+down_revision: Union[str, None] = '5f0c7d2e9a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE taskhistory_id_seq")
+    op.create_table('taskhistory',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('taskhistory_id_seq')"), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('project_id', sa.Uuid(), nullable=True),
+    sa.Column('change_type', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=True),
+    sa.Column('changed_by', sa.Uuid(), nullable=True),
+    sa.Column('changes', postgresql.JSONB(astext_type=sa.Text()), server_default='{}', nullable=False),
+    sa.Column('state', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    sa.PrimaryKeyConstraint('id', 'changed_at'),
+    postgresql_partition_by='RANGE (changed_at)'
+    )
+    op.create_index('ix_taskhistory_task_id_id', 'taskhistory', ['task_id', 'id'])
+    op.create_index('ix_taskhistory_snapshots', 'taskhistory', ['task_id', 'id'], postgresql_where=sa.text("state IS NOT NULL"))
+    # Later months are created ahead of time by the history partition job (src/taskmanager/history.py)
+    op.execute("CREATE TABLE taskhistory_default PARTITION OF taskhistory DEFAULT")
+    op.execute("""
+        DO $$
+        DECLARE month date := date_trunc('month', now() AT TIME ZONE 'UTC');
+        BEGIN
+            FOR i IN 0..1 LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS taskhistory_y%sm%s PARTITION OF taskhistory FOR VALUES FROM (%L) TO (%L)',
+                    to_char(month, 'YYYY'), to_char(month, 'MM'),
+                    month::timestamp AT TIME ZONE 'UTC', (month + interval '1 month')::timestamp AT TIME ZONE 'UTC'
+                );
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    """)
+    # Baseline snapshot of every existing task, so as-of reads work from the upgrade onwards
+    op.execute("""
+        INSERT INTO taskhistory (changed_at, task_id, project_id, change_type, version, changes, state)
+        SELECT now(), t.id, t.project_id, 'snapshot', t.version, '{}', jsonb_build_object(
+            'title', t.title, 'description', t.description, 'status', t.status, 'priority', t.priority,
+            'due_date', t.due_date, 'parent_task_id', t.parent_task_id, 'created_by', t.created_by,
+            'project_id', t.project_id, 'completed_at', t.completed_at, 'version', t.version,
+            'assignee_ids', coalesce((SELECT jsonb_agg(a.user_id) FROM taskassignee a WHERE a.task_id = t.id), '[]'),
+            'depends_on_ids', coalesce((SELECT jsonb_agg(d.depends_on_task_id) FROM taskdependency d WHERE d.task_id = t.id), '[]'),
+            'blocked_by_ids', coalesce((SELECT jsonb_agg(d.task_id) FROM taskdependency d WHERE d.depends_on_task_id = t.id), '[]')
+        )
+        FROM task t
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_taskhistory_snapshots', table_name='taskhistory')
+    op.drop_index('ix_taskhistory_task_id_id', table_name='taskhistory')
+    op.drop_table('taskhistory')
+    op.execute("DROP SEQUENCE IF EXISTS taskhistory_id_seq")
@@ -0,0 +1,44 @@
+"""Task daily stats
+
+Revision ID: e2d94a7b1c05
+Revises: c61e2b8d4f17
+Create Date: 2026-10-19 22:35:18.447160
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2d94a7b1c05'
+down_revision: Union[str, None] = 'c61e2b8d4f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('taskdailystat',
+    sa.Column('project_id', sa.Uuid(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('pending', sa.Integer(), nullable=True),
+    sa.Column('in_progress', sa.Integer(), nullable=True),
+    sa.Column('overdue', sa.Integer(), nullable=True),
+    sa.Column('created', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.Column('became_overdue', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('project_id', 'day', 'user_id')
+    )
+    # Flow backfill and the created-per-day scan read tasks by creation time
+    op.create_index('ix_task_created_at', 'task', ['created_at'])
+    op.create_index('ix_task_overdue_at', 'task', ['overdue_at'], postgresql_where=sa.text("overdue_at IS NOT NULL"))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_overdue_at', table_name='task')
+    op.drop_index('ix_task_created_at', table_name='task')
+    op.drop_table('taskdailystat')
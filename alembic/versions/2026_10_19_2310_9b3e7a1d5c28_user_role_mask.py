@@ -0,0 +1,88 @@
+"""User role mask
+
+Revision ID: 9b3e7a1d5c28
+Revises: e2d94a7b1c05
+Create Date: 2026-10-19 23:10:42.916305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e7a1d5c28'
+down_revision: Union[str, None] = 'e2d94a7b1c05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('role', sa.Column('bit', sa.SmallInteger(), nullable=True))
+    op.create_unique_constraint('uq_role_bit', 'role', ['bit'])
+    # Same positions as models.role.ROLE_BITS
+    op.execute("""
+        UPDATE role SET bit = CASE code
+            WHEN 'TASK_CREATE' THEN 0
+            WHEN 'TASK_EDIT' THEN 1
+            WHEN 'TASK_DELETE' THEN 2
+            WHEN 'TASK_VIEW' THEN 3
+        END
+    """)
+    op.add_column('user', sa.Column('role_mask', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute("""
+        CREATE FUNCTION user_role_mask(target uuid) RETURNS integer AS $$
+            SELECT coalesce(bit_or(1 << r.bit), 0)
+            FROM userrolelink l JOIN role r ON r.id = l.role_id
+            WHERE l.user_id = target AND l.is_active AND r.is_active AND r.bit IS NOT NULL
+        $$ LANGUAGE sql STABLE
+    """)
+    # Role changes are rare, so the mask is simply recomputed for every user they touch
+    op.execute("""
+        CREATE FUNCTION sync_link_role_mask() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                UPDATE "user" SET role_mask = user_role_mask(OLD.user_id) WHERE id = OLD.user_id;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                UPDATE "user" SET role_mask = user_role_mask(NEW.user_id) WHERE id = NEW.user_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER userrolelink_role_mask
+        AFTER INSERT OR UPDATE OR DELETE ON userrolelink
+        FOR EACH ROW EXECUTE FUNCTION sync_link_role_mask()
+    """)
+    op.execute("""
+        CREATE FUNCTION sync_role_role_mask() RETURNS trigger AS $$
+        BEGIN
+            UPDATE "user" SET role_mask = user_role_mask(id)
+            WHERE id IN (SELECT user_id FROM userrolelink WHERE role_id = NEW.id);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER role_role_mask
+        AFTER UPDATE OF is_active, bit ON role
+        FOR EACH ROW EXECUTE FUNCTION sync_role_role_mask()
+    """)
+    op.execute('UPDATE "user" SET role_mask = user_role_mask(id)')
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS role_role_mask ON role")
+    op.execute("DROP FUNCTION IF EXISTS sync_role_role_mask()")
+    op.execute("DROP TRIGGER IF EXISTS userrolelink_role_mask ON userrolelink")
+    op.execute("DROP FUNCTION IF EXISTS sync_link_role_mask()")
+    op.execute("DROP FUNCTION IF EXISTS user_role_mask(uuid)")
+    op.drop_column('user', 'role_mask')
+    op.drop_constraint('uq_role_bit', 'role', type_='unique')
+    op.drop_column('role', 'bit')
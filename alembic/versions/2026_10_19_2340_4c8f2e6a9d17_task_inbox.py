@@ -0,0 +1,97 @@
+"""Task inbox
+
+Revision ID: 4c8f2e6a9d17
+Revises: 9b3e7a1d5c28
+Create Date: 2026-10-19 23:40:18.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c8f2e6a9d17'
+down_revision: Union[str, None] = '9b3e7a1d5c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    status = postgresql.ENUM('pending', 'in_progress', 'completed', name='taskstatus', create_type=False)
+    priority = postgresql.ENUM('low', 'medium', 'high', name='taskpriority', create_type=False)
+    op.add_column('taskassignee', sa.Column('project_id', sa.Uuid(), nullable=True))
+    op.add_column('taskassignee', sa.Column('status', status, nullable=True))
+    op.add_column('taskassignee', sa.Column('priority', priority, nullable=True))
+    op.add_column('taskassignee', sa.Column('due_date', sa.Date(), nullable=True))
+
+    # An index cannot span taskassignee JOIN task, so the columns the inbox filters and sorts on
+    # are copied onto the assignment row and kept in step with the task by triggers
+    op.execute("""
+        CREATE FUNCTION fill_taskassignee_inbox() RETURNS trigger AS $$
+        BEGIN
+            SELECT project_id, status, priority, due_date
+            INTO NEW.project_id, NEW.status, NEW.priority, NEW.due_date
+            FROM task WHERE id = NEW.task_id;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER taskassignee_inbox
+        BEFORE INSERT OR UPDATE OF task_id ON taskassignee
+        FOR EACH ROW EXECUTE FUNCTION fill_taskassignee_inbox()
+    """)
+    op.execute("""
+        CREATE FUNCTION sync_task_inbox() RETURNS trigger AS $$
+        BEGIN
+            UPDATE taskassignee
+            SET project_id = NEW.project_id, status = NEW.status, priority = NEW.priority, due_date = NEW.due_date
+            WHERE task_id = NEW.id;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER task_inbox
+        AFTER UPDATE OF project_id, status, priority, due_date ON task
+        FOR EACH ROW
+        WHEN (
+            OLD.project_id IS DISTINCT FROM NEW.project_id OR OLD.status IS DISTINCT FROM NEW.status
+            OR OLD.priority IS DISTINCT FROM NEW.priority OR OLD.due_date IS DISTINCT FROM NEW.due_date
+        )
+        EXECUTE FUNCTION sync_task_inbox()
+    """)
+    op.execute("""
+        UPDATE taskassignee a
+        SET project_id = t.project_id, status = t.status, priority = t.priority, due_date = t.due_date
+        FROM task t WHERE t.id = a.task_id
+    """)
+
+    op.create_index(
+        'ix_taskassignee_inbox', 'taskassignee',
+        ['user_id', 'project_id', sa.text('priority DESC'), sa.text('due_date ASC NULLS LAST'), 'task_id'],
+        postgresql_include=['status'], postgresql_where=sa.text("status <> 'completed'"),
+    )
+    op.create_index(
+        'ix_task_creator_inbox', 'task',
+        ['created_by', 'project_id', sa.text('priority DESC'), sa.text('due_date ASC NULLS LAST'), 'id'],
+        postgresql_include=['status'], postgresql_where=sa.text("status <> 'completed'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_creator_inbox', table_name='task')
+    op.drop_index('ix_taskassignee_inbox', table_name='taskassignee')
+    op.execute("DROP TRIGGER IF EXISTS task_inbox ON task")
+    op.execute("DROP FUNCTION IF EXISTS sync_task_inbox()")
+    op.execute("DROP TRIGGER IF EXISTS taskassignee_inbox ON taskassignee")
+    op.execute("DROP FUNCTION IF EXISTS fill_taskassignee_inbox()")
+    op.drop_column('taskassignee', 'due_date')
+    op.drop_column('taskassignee', 'priority')
+    op.drop_column('taskassignee', 'status')
+    op.drop_column('taskassignee', 'project_id')
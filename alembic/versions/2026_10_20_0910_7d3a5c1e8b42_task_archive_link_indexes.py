@@ -0,0 +1,31 @@
+"""Task archive link indexes
+
+Revision ID: 7d3a5c1e8b42
+Revises: 4c8f2e6a9d17
+Create Date: 2026-10-20 09:10:27.518342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3a5c1e8b42'
+down_revision: Union[str, None] = '4c8f2e6a9d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Live tasks find the archived tasks they are linked to through these arrays
+    op.create_index('ix_taskarchive_depends_on_ids', 'taskarchive', ['depends_on_ids'], postgresql_using='gin')
+    op.create_index('ix_taskarchive_blocked_by_ids', 'taskarchive', ['blocked_by_ids'], postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_taskarchive_blocked_by_ids', table_name='taskarchive')
+    op.drop_index('ix_taskarchive_depends_on_ids', table_name='taskarchive')
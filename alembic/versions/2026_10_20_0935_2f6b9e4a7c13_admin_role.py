@@ -0,0 +1,32 @@
+"""Admin role
+
+Revision ID: 2f6b9e4a7c13
+Revises: 7d3a5c1e8b42
+Create Date: 2026-10-20 09:35:51.207764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f6b9e4a7c13'
+down_revision: Union[str, None] = '7d3a5c1e8b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The role row itself (bit 4, models.role.ROLE_BITS) is inserted by seed_roles on startup
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE rolelist ADD VALUE IF NOT EXISTS 'ADMIN'")
+
+
+def downgrade() -> None:
+    # Enum values cannot be dropped; only the role row goes
+    op.execute("DELETE FROM userrolelink WHERE role_id IN (SELECT id FROM role WHERE code = 'ADMIN')")
+    op.execute("DELETE FROM role WHERE code = 'ADMIN'")
@@ -0,0 +1,31 @@
+"""Task project overdue index
+
+Revision ID: a5e1c7d93f60
+Revises: 2f6b9e4a7c13
+Create Date: 2026-10-20 10:00:12.640318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e1c7d93f60'
+down_revision: Union[str, None] = '2f6b9e4a7c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_task_project_overdue', 'task', ['project_id', 'id'],
+        postgresql_where=sa.text("status <> 'completed' AND overdue_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_task_project_overdue', table_name='task')
@@ -0,0 +1,90 @@
+"""Project members
+
+Revision ID: c3d8f1a6e925
+Revises: a5e1c7d93f60
+Create Date: 2026-10-20 10:40:33.118470
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+import sqlmodel
+import sqlalchemy_utils
+from sqlalchemy.engine import make_url
+from src.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8f1a6e925'
+down_revision: Union[str, None] = 'a5e1c7d93f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_PROJECT_ID = '00000000-0000-0000-0000-000000000001'
+
+
+# Pairs are passed as one JSON array; rows for projects or users the default database does not know are dropped
+ADD_TASK_MEMBERS = sa.text("""
+    INSERT INTO projectmember (project_id, user_id, added_at)
+    SELECT DISTINCT m.project_id, m.user_id, now()
+    FROM jsonb_to_recordset(CAST(:pairs AS jsonb)) AS m(project_id uuid, user_id uuid)
+    JOIN project p ON p.id = m.project_id
+    JOIN "user" u ON u.id = m.user_id
+    ON CONFLICT DO NOTHING
+""")
+
+
+def task_people(connection) -> str:
+    # A shard that has not been migrated yet has no tasks to carry over
+    if connection.execute(sa.text("SELECT to_regclass('taskassignee')")).scalar() is None:
+        return "[]"
+    rows = connection.execute(sa.text(f"""
+        SELECT t.project_id, t.created_by FROM task t
+        WHERE t.created_by IS NOT NULL AND t.project_id <> '{DEFAULT_PROJECT_ID}'
+        UNION
+        SELECT t.project_id, a.user_id FROM taskassignee a JOIN task t ON t.id = a.task_id
+        WHERE t.project_id <> '{DEFAULT_PROJECT_ID}'
+    """)).all()
+    return json.dumps([{"project_id": str(project_id), "user_id": str(user_id)} for project_id, user_id in rows])
+
+
+def upgrade() -> None:
+    # Every shard gets the table to keep the schemas identical; only the default database's rows are read
+    op.create_table('projectmember',
+    sa.Column('project_id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('added_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('project_id', 'user_id')
+    )
+    # Copies of users on other shards used to carry an empty password hash
+    op.execute("""UPDATE "user" SET password_hash = '!mirror' WHERE password_hash = ''""")
+    # Existing projects keep working for the people already in them: their creator, and the
+    # creators and assignees of their tasks. Memberships are only read on the default database, so
+    # its run collects the task people of every shard; the runs on the other shards add none.
+    if context.get_x_argument(as_dictionary=True).get("shard", "default") != "default":
+        return
+    bind = op.get_bind()
+    bind.execute(sa.text(f"""
+        INSERT INTO projectmember (project_id, user_id, added_at)
+        SELECT p.id, p.created_by, now() FROM project p
+        WHERE p.created_by IS NOT NULL AND p.id <> '{DEFAULT_PROJECT_ID}'
+        ON CONFLICT DO NOTHING
+    """))
+    bind.execute(ADD_TASK_MEMBERS, {"pairs": task_people(bind)})
+    for name, url in settings.DB_SHARDS.items():
+        if name == "default":
+            continue
+        engine = sa.create_engine(make_url(url).set(drivername="postgresql"), poolclass=sa.pool.NullPool)
+        try:
+            with engine.connect() as shard:
+                pairs = task_people(shard)
+        finally:
+            engine.dispose()
+        bind.execute(ADD_TASK_MEMBERS, {"pairs": pairs})
+
+def downgrade() -> None:
+    op.drop_table('projectmember')
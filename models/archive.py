@@ -0,0 +1,40 @@
+import uuid
+from datetime import datetime, date, timezone
+from typing import Optional, List
+from sqlmodel import SQLModel, Field
+from sqlalchemy.dialects.postgresql import ARRAY
+from models.task import TaskStatus, TaskPriority
+import sqlalchemy as sa
+
+# ----------------- ARCHIVE TABLE -----------------
+
+class TaskArchive(SQLModel, table=True):
+    # Completed tasks moved out of `task`, range-partitioned by month of completion so that
+    # retention is a DROP of the oldest partition. Link rows are folded into arrays, which stay the
+    # record of links to live tasks too: live tasks resolve their archived subtasks and dependencies here.
+    __table_args__ = (
+        sa.Index("ix_taskarchive_parent_task_id", "parent_task_id"),
+        # Reverse lookups from live tasks: which archived tasks they depend on / are blocked by
+        sa.Index("ix_taskarchive_depends_on_ids", "depends_on_ids", postgresql_using="gin"),
+        sa.Index("ix_taskarchive_blocked_by_ids", "blocked_by_ids", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (completed_at)"},
+    )
+
+    id: uuid.UUID = Field(primary_key=True)
+    completed_at: datetime = Field(sa_column=sa.Column(sa.DateTime(timezone=True), primary_key=True))
+    title: str = Field(nullable=False)
+    description: Optional[str] = None
+    status: TaskStatus = Field(default=TaskStatus.completed)
+    priority: TaskPriority = Field(default=TaskPriority.medium)
+    due_date: Optional[date] = None
+    created_at: datetime = Field(sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
+    updated_at: datetime = Field(sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
+    overdue_at: Optional[datetime] = Field(default=None, sa_column=sa.Column(sa.DateTime(timezone=True), nullable=True))
+    version: int = Field(default=1)
+    created_by: Optional[uuid.UUID] = None
+    project_id: Optional[uuid.UUID] = None
+    parent_task_id: Optional[uuid.UUID] = None
+    assignee_ids: List[uuid.UUID] = Field(default_factory=list, sa_column=sa.Column(ARRAY(sa.Uuid), nullable=False, server_default="{}"))
+    depends_on_ids: List[uuid.UUID] = Field(default_factory=list, sa_column=sa.Column(ARRAY(sa.Uuid), nullable=False, server_default="{}"))
+    blocked_by_ids: List[uuid.UUID] = Field(default_factory=list, sa_column=sa.Column(ARRAY(sa.Uuid), nullable=False, server_default="{}"))
+    archived_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
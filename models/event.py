@@ -0,0 +1,30 @@
+import uuid
+import enum
+from datetime import datetime, timezone
+from typing import Optional, List
+from sqlmodel import SQLModel, Field
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+import sqlalchemy as sa
+
+class TaskEventType(str, enum.Enum):
+    created = "created"
+    updated = "updated"
+    deleted = "deleted"
+    overdue = "overdue"
+
+# ----------------- OUTBOX TABLE -----------------
+
+class TaskEvent(SQLModel, table=True):
+    # `id` is assigned on insert, `seq` is stamped later by the dispatcher so that
+    # sequence numbers follow commit order and subscribers can resume without gaps
+    id: Optional[int] = Field(default=None, sa_column=sa.Column(sa.BigInteger, sa.Identity(), primary_key=True))
+    seq: Optional[int] = Field(default=None, sa_column=sa.Column(sa.BigInteger, nullable=True, unique=True))
+    task_id: uuid.UUID = Field(nullable=False)
+    project_id: Optional[uuid.UUID] = None
+    event_type: str = Field(nullable=False)
+    parent_task_id: Optional[uuid.UUID] = None
+    created_by: Optional[uuid.UUID] = None
+    assignee_ids: List[uuid.UUID] = Field(default_factory=list, sa_column=sa.Column(ARRAY(sa.Uuid), nullable=False, server_default="{}"))
+    ancestor_ids: List[uuid.UUID] = Field(default_factory=list, sa_column=sa.Column(ARRAY(sa.Uuid), nullable=False, server_default="{}"))
+    changes: dict = Field(default_factory=dict, sa_column=sa.Column(JSONB, nullable=False, server_default="{}"))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
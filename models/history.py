@@ -0,0 +1,43 @@
+import uuid
+import enum
+from datetime import datetime, timezone
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy.dialects.postgresql import JSONB
+import sqlalchemy as sa
+
+class TaskHistoryType(str, enum.Enum):
+    created = "created"
+    updated = "updated"
+    deleted = "deleted"
+    # Side effect of another task's change, e.g. B gains a dependency when A's blocked_by_ids changes
+    linked = "linked"
+    snapshot = "snapshot"
+
+# ----------------- HISTORY TABLE -----------------
+
+class TaskHistory(SQLModel, table=True):
+    # Append-only field-level deltas, range-partitioned by month of the change. `id` orders the
+    # records of a task; `state` holds the full task on created and snapshot records, so rebuilding
+    # a past version starts at the nearest snapshot instead of the first change.
+    __table_args__ = (
+        sa.Index("ix_taskhistory_task_id_id", "task_id", "id"),
+        sa.Index("ix_taskhistory_snapshots", "task_id", "id", postgresql_where=sa.text("state IS NOT NULL")),
+        {"postgresql_partition_by": "RANGE (changed_at)"},
+    )
+
+    id: Optional[int] = Field(
+        default=None,
+        sa_column=sa.Column(sa.BigInteger, sa.Sequence("taskhistory_id_seq"), primary_key=True),
+    )
+    changed_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=sa.Column(sa.DateTime(timezone=True), primary_key=True),
+    )
+    task_id: uuid.UUID = Field(nullable=False)
+    project_id: Optional[uuid.UUID] = None
+    change_type: str = Field(nullable=False)
+    version: Optional[int] = None
+    changed_by: Optional[uuid.UUID] = None
+    changes: dict = Field(default_factory=dict, sa_column=sa.Column(JSONB, nullable=False, server_default="{}"))
+    state: Optional[dict] = Field(default=None, sa_column=sa.Column(JSONB, nullable=True))
@@ -0,0 +1,23 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+from sqlmodel import SQLModel, Field
+from sqlalchemy.dialects.postgresql import JSONB
+import sqlalchemy as sa
+
+class IdempotencyKey(SQLModel, table=True):
+    # First response to a write sent with an Idempotency-Key header, replayed for retries of the same request.
+    # A row without status_code is a claim: the request is still running (until locked_until).
+    __table_args__ = (
+        sa.Index("ix_idempotencykey_expires_at", "expires_at"),
+    )
+
+    user_id: uuid.UUID = Field(primary_key=True)
+    key: str = Field(primary_key=True, max_length=255)
+    fingerprint: str = Field(nullable=False)
+    status_code: Optional[int] = None
+    headers: list = Field(default_factory=list, sa_column=sa.Column(JSONB, nullable=False, server_default="[]"))
+    body: Optional[bytes] = Field(default=None, sa_column=sa.Column(sa.LargeBinary, nullable=True))
+    locked_until: datetime = Field(sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
+    expires_at: datetime = Field(sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
@@ -0,0 +1,29 @@
+import uuid
+import enum
+from datetime import datetime, timezone
+from typing import Optional
+from sqlmodel import SQLModel, Field
+import sqlalchemy as sa
+
+# Created by the migration on every database; tasks without an explicit project live here
+DEFAULT_PROJECT_ID = uuid.UUID("00000000-0000-0000-0000-000000000001")
+
+class ProjectStatus(str, enum.Enum):
+    active = "active"
+    moving = "moving"
+
+class Project(SQLModel, table=True):
+    # The row on the default database is the directory entry; shards hold a copy for foreign keys
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    name: str = Field(nullable=False)
+    shard: str = Field(default="default", nullable=False)
+    status: ProjectStatus = Field(default=ProjectStatus.active)
+    created_by: Optional[uuid.UUID] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
+
+class ProjectMember(SQLModel, table=True):
+    # Who may open a project (X-Project-Id). Kept on the default database next to the directory;
+    # the default project is open to every user and has no rows here.
+    project_id: uuid.UUID = Field(foreign_key="project.id", primary_key=True)
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    added_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
@@ -2,12 +2,32 @@ import uuid
 from sqlmodel import SQLModel, Field, Relationship
 from typing import Optional, List
 import enum
+import sqlalchemy as sa
 
 class RoleList(str, enum.Enum):
     TASK_CREATE = "TASK_CREATE"
     TASK_EDIT = "TASK_EDIT"
     TASK_DELETE = "TASK_DELETE"
     TASK_VIEW = "TASK_VIEW"
+    # Operators: other users' statistics, worker metrics. Never granted at registration.
+    ADMIN = "ADMIN"
+
+    @property
+    def bit(self) -> int:
+        return 1 << ROLE_BITS[self]
+
+# Bit position of each role in User.role_mask. Stored in role.bit and in every user's mask,
+# so new roles get the next free position and existing ones are never renumbered.
+ROLE_BITS = {
+    RoleList.TASK_CREATE: 0,
+    RoleList.TASK_EDIT: 1,
+    RoleList.TASK_DELETE: 2,
+    RoleList.TASK_VIEW: 3,
+    RoleList.ADMIN: 4,
+}
+
+# Roles a user may ask for when registering
+SELF_ASSIGNABLE_ROLES = tuple(role for role in RoleList if role is not RoleList.ADMIN)
 
 class UserRoleLink(SQLModel, table=True):
     user_id: uuid.UUID = Field(default=None, foreign_key="user.id", primary_key=True)
@@ -20,4 +40,5 @@ class Role(SQLModel, table=True):
     description: Optional[str] = None
     code: Optional[RoleList] = Field(default=None, nullable=True)
     is_active: bool = Field(default=True)
+    bit: Optional[int] = Field(default=None, sa_column=sa.Column(sa.SmallInteger, nullable=True, unique=True))
     users: List["User"] = Relationship(back_populates="roles", link_model=UserRoleLink)
\ No newline at end of file
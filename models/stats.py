@@ -0,0 +1,23 @@
+import uuid
+from datetime import date
+from typing import Optional
+from sqlmodel import SQLModel, Field
+
+# user_id of the per-project total row (every task counted once, assigned or not)
+ALL_USERS = uuid.UUID(int=0)
+
+# ----------------- DAILY ANALYTICS TABLE -----------------
+
+class TaskDailyStat(SQLModel, table=True):
+    # One row per project, day and assignee, plus an ALL_USERS total row.
+    # Stock columns are the end-of-day snapshot of open work, flow columns count that day's transitions.
+    project_id: uuid.UUID = Field(primary_key=True)
+    day: date = Field(primary_key=True)
+    user_id: uuid.UUID = Field(primary_key=True)
+    # NULL until the day is snapshotted
+    pending: Optional[int] = None
+    in_progress: Optional[int] = None
+    overdue: Optional[int] = None
+    created: int = Field(default=0)
+    completed: int = Field(default=0)
+    became_overdue: int = Field(default=0)
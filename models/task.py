@@ -4,7 +4,9 @@ from datetime import datetime, date, timezone
 from typing import Optional, List
 from sqlmodel import SQLModel, Field, Relationship
 from models.user import User
+from models.project import Project, DEFAULT_PROJECT_ID #noqa: F401
 import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 class TaskStatus(str, enum.Enum):
     pending = "pending"
@@ -19,9 +21,22 @@ class TaskPriority(str, enum.Enum):
 # ----------------- LINK TABLES -----------------
 
 class TaskAssignee(SQLModel, table=True):
+    __table_args__ = (
+        # "My work" inbox (GET /task/me): a user's open assigned tasks in priority / due date order
+        sa.Index(
+            "ix_taskassignee_inbox", "user_id", "project_id", sa.text("priority DESC"), sa.text("due_date ASC NULLS LAST"),
+            "task_id", postgresql_include=["status"], postgresql_where=sa.text("status <> 'completed'"),
+        ),
+    )
+
     task_id: uuid.UUID = Field(default=None, foreign_key="task.id", primary_key=True)
     user_id: uuid.UUID = Field(default=None, foreign_key="user.id", primary_key=True)
     is_owner: bool = Field(default=False)
+    # Copied from the task by triggers (an index cannot span the join), only read by the inbox
+    project_id: Optional[uuid.UUID] = None
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    due_date: Optional[date] = None
 
     task: Optional["Task"] = Relationship(back_populates="assignees")
     user: Optional["User"] = Relationship(back_populates="assigned_tasks")
@@ -41,6 +56,32 @@ class TaskDependency(SQLModel, table=True):
 # ----------------- MAIN TABLE -----------------
 
 class Task(SQLModel, table=True):
+    __table_args__ = (
+        # Open tasks by due date: overdue analytics and the overdue scheduler never touch completed rows
+        sa.Index("ix_task_open_due_date", "project_id", "due_date", "id", postgresql_where=sa.text("status <> 'completed'")),
+        sa.Index("ix_task_unmarked_overdue", "due_date", postgresql_where=sa.text("status <> 'completed' AND overdue_at IS NULL")),
+        # Tasks the scheduler has marked overdue, per project: the analytics overdue count
+        sa.Index("ix_task_project_overdue", "project_id", "id", postgresql_where=sa.text("status <> 'completed' AND overdue_at IS NOT NULL")),
+        # Work-queue order for POST /task/claim, so the next claimable task is an index range scan
+        sa.Index(
+            "ix_task_pending_queue", "project_id", sa.text("priority DESC"), sa.text("due_date ASC NULLS LAST"), "created_at",
+            postgresql_where=sa.text("status = 'pending'"),
+        ),
+        sa.Index("ix_task_project_id_created_at", "project_id", "created_at"),
+        # Creator side of the "My work" inbox, same order as ix_taskassignee_inbox
+        sa.Index(
+            "ix_task_creator_inbox", "created_by", "project_id", sa.text("priority DESC"), sa.text("due_date ASC NULLS LAST"),
+            "id", postgresql_include=["status"], postgresql_where=sa.text("status <> 'completed'"),
+        ),
+        # Archival candidates, oldest completion first
+        sa.Index("ix_task_completed_at", "completed_at", postgresql_where=sa.text("status = 'completed'")),
+        # Created / became-overdue flows for the daily analytics aggregator
+        sa.Index("ix_task_created_at", "created_at"),
+        sa.Index("ix_task_overdue_at", "overdue_at", postgresql_where=sa.text("overdue_at IS NOT NULL")),
+        # Trigram index for prefix / fuzzy title matching in task search
+        sa.Index("ix_task_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     title: str = Field(nullable=False)
     description: Optional[str] = None
@@ -49,9 +90,15 @@ class Task(SQLModel, table=True):
     due_date: Optional[date] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False, onupdate=lambda: datetime.now(timezone.utc)))
+    completed_at: Optional[datetime] = Field(default=None, sa_column=sa.Column(sa.DateTime(timezone=True), nullable=True))
+    # Incremented by every update, used for compare-and-swap (optimistic concurrency)
+    version: int = Field(default=1, sa_column=sa.Column(sa.Integer, nullable=False, server_default="1"))
+    # Set by the overdue scheduler when the task first passes its due date, cleared when the due date moves
+    overdue_at: Optional[datetime] = Field(default=None, sa_column=sa.Column(sa.DateTime(timezone=True), nullable=True))
 
     created_by: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id")
-    parent_task_id: Optional[uuid.UUID] = Field(default=None, foreign_key="task.id")
+    project_id: uuid.UUID = Field(default=DEFAULT_PROJECT_ID, foreign_key="project.id", nullable=False)
+    parent_task_id: Optional[uuid.UUID] = Field(default=None, foreign_key="task.id", index=True)
 
     # Relationships
     creator: Optional["User"] = Relationship(back_populates="tasks_created")
@@ -59,4 +106,19 @@ class Task(SQLModel, table=True):
     parent: Optional["Task"] = Relationship(back_populates="subtasks", sa_relationship_kwargs={"remote_side": "Task.id"})
     assignees: List["TaskAssignee"] = Relationship(back_populates="task")
     dependencies: List["TaskDependency"] = Relationship(back_populates="task",         sa_relationship_kwargs={"foreign_keys": "TaskDependency.task_id"})
-    blocked_by: List["TaskDependency"] = Relationship(back_populates="depends_on", sa_relationship_kwargs={"foreign_keys": "TaskDependency.depends_on_task_id"})
\ No newline at end of file
+    blocked_by: List["TaskDependency"] = Relationship(back_populates="depends_on", sa_relationship_kwargs={"foreign_keys": "TaskDependency.depends_on_task_id"})
+
+# Full-text search document, generated by Postgres from title + description. It is added to the
+# table after mapping on purpose: the ORM never loads it, only search queries reference it.
+TASK_SEARCH_CONFIG = "english"
+task_search_vector = sa.Column(
+    "search_vector",
+    TSVECTOR,
+    sa.Computed(
+        f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+        f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        persisted=True,
+    ),
+)
+Task.__table__.append_column(task_search_vector)
+sa.Index("ix_task_search_vector", task_search_vector, postgresql_using="gin")
@@ -5,12 +5,18 @@ from typing import List
 from models.role import UserRoleLink #noqa: E402
 import sqlalchemy as sa
 
+# password_hash of the copies of users kept on non-default shards: not a bcrypt hash, so it never
+# matches a password, and login and token checks reject it outright
+MIRRORED_PASSWORD_HASH = "!mirror"
+
 class User(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     email: str = Field(index=True, nullable=False, unique=True)
     full_name: str
     password_hash: str
     is_active: bool = True
+    # Bitwise OR of RoleList.bit over the user's active roles, maintained by triggers on userrolelink and role
+    role_mask: int = Field(default=0, sa_column=sa.Column(sa.Integer, nullable=False, server_default="0"))
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_column=sa.Column(sa.DateTime(timezone=True), nullable=False))
 
     roles: List["Role"] = Relationship(back_populates="users", link_model=UserRoleLink)
@@ -0,0 +1,91 @@
+"""Latency benchmark for GET /task/search.
+
+Seeds a synthetic task table (1M rows by default) for a dedicated benchmark user and
+measures search_tasks latency for a set of queries, including paging with the cursor.
+
+    python -m scripts.benchmark_search --seed --tasks 1000000
+    python -m scripts.benchmark_search --runs 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from sqlalchemy import text
+from src.database import SessionLocal, engine
+from src.taskmanager.service import search_tasks
+
+BENCH_USER_ID = uuid.UUID("00000000-0000-0000-0000-00000000b007")
+WORDS = [
+    "invoice", "deploy", "migration", "onboarding", "review", "refactor", "billing", "dashboard",
+    "latency", "customer", "release", "hotfix", "roadmap", "analytics", "security", "audit",
+    "payment", "export", "import", "notification", "search", "mobile", "checkout", "report",
+]
+QUERIES = ["invoice", "deploy hotfix", "migra", "dashbord", "\"security audit\"", "billing -mobile"]
+
+async def seed(tasks: int, batch: int):
+    async with SessionLocal() as session:
+        await session.execute(text("""
+            INSERT INTO "user" (id, email, full_name, password_hash, is_active, created_at)
+            VALUES (:id, 'bench@example.com', 'Benchmark User', 'x', true, now())
+            ON CONFLICT DO NOTHING
+        """), {"id": BENCH_USER_ID})
+        await session.commit()
+    for start in range(0, tasks, batch):
+        size = min(batch, tasks - start)
+        async with SessionLocal() as session:
+            # Titles/descriptions are random 3 and 12 word phrases from WORDS
+            await session.execute(text("""
+                INSERT INTO task (id, title, description, status, priority, due_date, created_at, updated_at, created_by)
+                SELECT gen_random_uuid(),
+                       (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+                          FROM generate_series(1, 3) WHERE g > 0),
+                       (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+                          FROM generate_series(1, 12) WHERE g > 0),
+                       (ARRAY['pending', 'in_progress', 'completed'])[1 + floor(random() * 3)::int]::taskstatus,
+                       (ARRAY['low', 'medium', 'high'])[1 + floor(random() * 3)::int]::taskpriority,
+                       current_date + (floor(random() * 120) - 60)::int,
+                       now(), now(), :user_id
+                FROM generate_series(1, :size) AS g, (SELECT CAST(:words AS text[]) AS w) AS words
+            """), {"size": size, "user_id": BENCH_USER_ID, "words": WORDS})
+            await session.commit()
+        print(f"seeded {start + size}/{tasks}")
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE task"))
+
+async def measure(runs: int, limit: int):
+    for q in QUERIES:
+        first_page, second_page = [], []
+        for _ in range(runs):
+            async with SessionLocal() as session:
+                started = time.perf_counter()
+                _, cursor = await search_tasks(session, BENCH_USER_ID, q, limit)
+                first_page.append((time.perf_counter() - started) * 1000)
+                if cursor:
+                    started = time.perf_counter()
+                    await search_tasks(session, BENCH_USER_ID, q, limit, cursor)
+                    second_page.append((time.perf_counter() - started) * 1000)
+        line = f"{q!r:24} page1 p50={statistics.median(first_page):7.1f}ms p95={percentile(first_page, 95):7.1f}ms"
+        if second_page:
+            line += f"  page2 p50={statistics.median(second_page):7.1f}ms p95={percentile(second_page, 95):7.1f}ms"
+        print(line)
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", action="store_true")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+    if args.seed:
+        await seed(args.tasks, args.batch)
+    await measure(args.runs, args.limit)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Startup-time benchmark.
+
+Measures, over several cold runs in fresh processes:
+  * import time of src.main
+  * time until a single uvicorn worker answers /healthcheck (includes the lifespan bootstrap)
+  * latency of the first GET /task/openapi.json (built lazily, or read from OPENAPI_SCHEMA_DIR)
+
+    python -m scripts.benchmark_startup --runs 5
+    OPENAPI_SCHEMA_DIR=./openapi python -m scripts.benchmark_startup --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import httpx
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import src.main; print(time.perf_counter() - t)"
+
+def measure_import() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1]) * 1000
+
+def measure_server(port: int, timeout: float) -> tuple[float, float]:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+         "--loop", "uvloop", "--http", "httptools", "--log-level", "warning"],
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("server did not become ready in time")
+                try:
+                    if client.get("/healthcheck").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            ready = (time.perf_counter() - started) * 1000
+            first_schema = time.perf_counter()
+            client.get("/task/openapi.json").raise_for_status()
+            schema = (time.perf_counter() - first_schema) * 1000
+        return ready, schema
+    finally:
+        server.terminate()
+        server.wait()
+
+def report(label: str, samples: list[float]):
+    print(f"{label:28} min={min(samples):8.1f}ms median={statistics.median(samples):8.1f}ms max={max(samples):8.1f}ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    imports, ready, schema = [], [], []
+    for _ in range(args.runs):
+        imports.append(measure_import())
+        r, s = measure_server(args.port, args.timeout)
+        ready.append(r)
+        schema.append(s)
+    report("import src.main", imports)
+    report("ready (healthcheck 200)", ready)
+    report("first /task/openapi.json", schema)
+
+if __name__ == "__main__":
+    main()
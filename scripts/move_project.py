@@ -0,0 +1,31 @@
+"""Move a project to another database shard.
+
+Writes to the project get 503 + Retry-After while its rows are copied; reads are served
+throughout. Run the migrations on the target shard first:
+
+    alembic -x shard=<target> upgrade head
+    python -m scripts.move_project <project_id> <target>
+"""
+import argparse
+import asyncio
+import logging
+from uuid import UUID
+from src.database import dispose_engines
+from src.projects.move import move_project
+
+async def main(project_id: UUID, target: str, batch_size: int):
+    try:
+        copied = await move_project(project_id, target, batch_size)
+        print(f"Moved {copied} tasks to shard '{target}'")
+    finally:
+        await dispose_engines()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("project_id", type=UUID)
+    parser.add_argument("target")
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    from src.config import settings
+    asyncio.run(main(args.project_id, args.target, args.batch_size or settings.PROJECT_MOVE_BATCH_SIZE))
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session, select
-from models.user import User
-from models.role import Role, UserRoleLink
+from models.user import User, MIRRORED_PASSWORD_HASH
+from models.role import Role, UserRoleLink, SELF_ASSIGNABLE_ROLES
 from src.database import get_db_session
 from src.utils.hash_service import hash_password, verify_password
 from src.utils.token_service import create_access_token, create_refresh_token, decode_refresh_token
@@ -24,7 +24,8 @@ async def register_user(user: UserCreate, session: Session = Depends(get_db_sess
     session.add(newuser)
     await session.flush()
     if len(user.roles) > 0:
-        roles = (await session.execute(select(Role.id).where(Role.code.in_(user.roles)))).scalars().all()
+        requested = [role for role in SELF_ASSIGNABLE_ROLES if role.value in user.roles]
+        roles = (await session.execute(select(Role.id).where(Role.code.in_(requested)))).scalars().all()
         if len(roles) > 0:
             user_role_links = [UserRoleLink(user_id=newuser.id, role_id=roleId) for roleId in roles]
             session.add_all(user_role_links)
@@ -37,7 +38,7 @@ async def register_user(user: UserCreate, session: Session = Depends(get_db_sess
 async def login_user(login_data: LoginRequest, session: Session = Depends(get_db_session)):
     # Searching for the user in the DB
     user = (await session.execute(select(User).where(User.email == login_data.email))).scalars().first()
-    if not user:
+    if not user or user.password_hash == MIRRORED_PASSWORD_HASH:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials provided.")
     # Check and match password of the user
     if not verify_password(login_data.password, user.password_hash):
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import json
+import re
+import uuid
+from pathlib import Path
+from fastapi import FastAPI
+from pydantic import TypeAdapter
+from pydantic.errors import PydanticInvalidForJsonSchema, PydanticSchemaGenerationError
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from models.role import Role, RoleList, ROLE_BITS
+from src.config import settings
+from src.database import SessionLocal, shards
+
+async def seed_roles() -> int:
+    # One statement for all roles; safe to run on every start and from every worker at once
+    async with SessionLocal() as session:
+        result = await session.execute(
+            insert(Role)
+            .values([
+                {
+                    "id": uuid.uuid4(), "name": role.value, "description": role.value, "code": role,
+                    "is_active": True, "bit": ROLE_BITS[role],
+                }
+                for role in RoleList
+            ])
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        await session.commit()
+    return result.rowcount
+
+async def warm_pool(connections: int):
+    # Open the first connections of every shard before traffic arrives instead of on the first requests
+    async def ping(shard):
+        async with shard.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(
+        ping(shard) for shard in shards.values() for _ in range(min(connections, settings.DB_POOL_SIZE))
+    ))
+
+OBJECT_ADDRESS = re.compile(r" at 0x[0-9a-f]+")
+
+def model_shape(annotation, mode: str = "validation") -> str:
+    # The JSON schema covers nested models and field constraints, which a repr of the fields misses
+    if annotation is None:
+        return "None"
+    try:
+        schema = TypeAdapter(annotation).json_schema(mode=mode)
+    except (PydanticSchemaGenerationError, PydanticInvalidForJsonSchema):
+        return repr(annotation)
+    return json.dumps(schema, sort_keys=True, default=str)
+
+def responses_shape(responses) -> str:
+    return repr({
+        code: {key: model_shape(value, "serialization") if key == "model" else value for key, value in response.items()}
+        for code, response in (responses or {}).items()
+    })
+
+def routes_fingerprint(app: FastAPI) -> str:
+    # Everything about the routes that ends up in the schema: paths, methods, parameters and
+    # models. A route change gives a new file name, so a schema exported before it is never served.
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(repr((app.title, app.version)).encode())
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        parameters = []
+        if dependant is not None:
+            for param in (
+                *dependant.path_params, *dependant.query_params, *dependant.header_params,
+                *dependant.cookie_params, *dependant.body_params,
+            ):
+                parameters.append((param.name, model_shape(param.field_info.annotation), repr(param.field_info)))
+        shape = repr((
+            getattr(route, "path", None), sorted(getattr(route, "methods", None) or ()), getattr(route, "name", None),
+            getattr(route, "include_in_schema", None), model_shape(getattr(route, "response_model", None), "serialization"),
+            responses_shape(getattr(route, "responses", None)), parameters,
+        ))
+        # Default factories and the like repr with their address, which differs between processes
+        digest.update(OBJECT_ADDRESS.sub("", shape).encode())
+    return digest.hexdigest()
+
+def schema_path(app: FastAPI, name: str, directory: str | None = None) -> Path | None:
+    directory = directory or settings.OPENAPI_SCHEMA_DIR
+    if not directory:
+        return None
+    return Path(directory) / f"{name}-{routes_fingerprint(app)}.json"
+
+def cache_openapi(app: FastAPI, name: str):
+    # FastAPI already builds the schema once per worker; this only adds serving a schema exported
+    # at build time (export_openapi) from OPENAPI_SCHEMA_DIR. The file name carries a fingerprint
+    # of the routes, so after a route change the old file is not found and the schema is built.
+    build = app.openapi
+
+    def openapi():
+        if app.openapi_schema is None:
+            path = schema_path(app, name)
+            if path is not None and path.exists():
+                app.openapi_schema = json.loads(path.read_text())
+            else:
+                app.openapi_schema = build()
+        return app.openapi_schema
+
+    app.openapi = openapi
+
+def export_openapi(apps: dict[str, FastAPI], directory: str):
+    target = Path(directory)
+    target.mkdir(parents=True, exist_ok=True)
+    for name, app in apps.items():
+        # Bypass cache_openapi so the export never re-reads an older file
+        app.openapi_schema = None
+        schema_path(app, name, directory).write_text(json.dumps(FastAPI.openapi(app)))
@@ -0,0 +1,94 @@
+import gzip
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Optional
+from src.config import settings
+
+try:
+    import zstandard
+except ImportError:  # optional: without it responses are only gzip-compressed
+    zstandard = None
+
+COMPRESSIBLE_TYPES = ("text/", "application/json", "application/problem+json", "application/javascript", "application/xml")
+
+def available_encodings() -> tuple[str, ...]:
+    # Server preference order, used to break ties between equally weighted client choices
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    # Highest q-value among the encodings we support; "*" matches any of them, q=0 refuses
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for encoding in available_encodings():
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+def compressible(content_type: str) -> bool:
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
+
+def compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compress(body)
+    # mtime=0 keeps the output identical for identical bodies
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+class StreamCompressor:
+    # Compresses a response chunk by chunk and flushes after every chunk, so streamed data
+    # (exports, server-sent events) reaches the client as soon as it is produced
+    def __init__(self, encoding: str):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, chunk: bytes) -> bytes:
+        return self._compressor.compress(chunk) + self._compressor.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+class CompressedBodyCache:
+    # Compressed bytes of recently served cacheable bodies, keyed by encoding and a digest of the
+    # uncompressed body: hashing is far cheaper than compressing, so identical payloads (the same
+    # analytics snapshot read by many clients) are compressed once. Bounded by total size.
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._entries: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if self._max_bytes <= 0:
+            return compress(encoding, body)
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._entries.get(key)
+        if compressed is not None:
+            self._entries.move_to_end(key)
+            return compressed
+        compressed = compress(encoding, body)
+        if len(compressed) <= self._max_bytes:
+            self._entries[key] = compressed
+            self._size += len(compressed)
+            while self._size > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+compressed_bodies = CompressedBodyCache(settings.COMPRESSION_CACHE_BYTES)
@@ -1,7 +1,11 @@
 from collections.abc import AsyncGenerator
+from dataclasses import dataclass
 
+import asyncpg
 from sqlalchemy import exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -9,12 +13,52 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.ext.declarative import declarative_base
 from src.config import settings
 
-engine = create_async_engine(settings.DB_ASYNC_URL)
-SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The default shard also holds users, roles and the project directory
+DEFAULT_SHARD = "default"
+
+
+@dataclass
+class Shard:
+    name: str
+    url: str
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker
+
+
+def create_shard(name: str, url: str) -> Shard:
+    shard_engine = create_async_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=True,
+    )
+    return Shard(
+        name=name,
+        url=url,
+        engine=shard_engine,
+        sessionmaker=async_sessionmaker(autocommit=False, autoflush=False, bind=shard_engine),
+    )
+
+
+# Shard map: project data lives on exactly one of these, see src/projects/service.py
+shards: dict[str, Shard] = {
+    DEFAULT_SHARD: create_shard(DEFAULT_SHARD, settings.DB_ASYNC_URL),
+    **{name: create_shard(name, url) for name, url in settings.DB_SHARDS.items() if name != DEFAULT_SHARD},
+}
+
+engine = shards[DEFAULT_SHARD].engine
+SessionLocal = shards[DEFAULT_SHARD].sessionmaker
 
 Base = declarative_base()
 
 
+def get_shard(name: str) -> Shard:
+    shard = shards.get(name)
+    if shard is None:
+        raise LookupError(f"Unknown database shard '{name}'")
+    return shard
+
+
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         try:
@@ -23,3 +67,14 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
         except exc.SQLAlchemyError:
             await session.rollback()
             raise
+
+
+async def connect_dedicated(shard: str = DEFAULT_SHARD) -> asyncpg.Connection:
+    # LISTEN/NOTIFY and session-level advisory locks need a connection that lives outside of the pool
+    url = make_url(get_shard(shard).url).set(drivername="postgresql")
+    return await asyncpg.connect(url.render_as_string(hide_password=False))
+
+
+async def dispose_engines():
+    for shard in shards.values():
+        await shard.engine.dispose()
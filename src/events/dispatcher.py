@@ -0,0 +1,217 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+from sqlalchemy import text
+from sqlmodel import select, delete, func
+from models.event import TaskEvent
+from src.config import settings
+from src.database import DEFAULT_SHARD, connect_dedicated, get_shard, shards
+
+logger = logging.getLogger(__name__)
+
+TASK_EVENT_CHANNEL = "task_events"
+# Arbitrary application-wide key for pg_advisory_xact_lock, serialises seq stamping across workers
+STAMP_LOCK_KEY = 7_340_026
+
+def serialize_event(event: TaskEvent) -> dict:
+    return {
+        "seq": event.seq,
+        "type": event.event_type,
+        "task_id": str(event.task_id),
+        "project_id": str(event.project_id) if event.project_id else None,
+        "parent_task_id": str(event.parent_task_id) if event.parent_task_id else None,
+        "assignee_ids": [str(uid) for uid in event.assignee_ids],
+        "changes": event.changes,
+        "created_at": event.created_at.isoformat(),
+    }
+
+@dataclass(eq=False)
+class Subscription:
+    user_id: UUID
+    project_id: Optional[UUID] = None
+    task_id: Optional[UUID] = None
+    subtree_id: Optional[UUID] = None
+    assignee_id: Optional[UUID] = None
+    cursor: int = 0
+    overflowed: bool = False
+    queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=settings.TASK_EVENT_SUBSCRIBER_QUEUE_SIZE))
+
+    def matches(self, event: TaskEvent) -> bool:
+        # Same visibility rule as the task endpoints: creator or assignee
+        if event.created_by != self.user_id and self.user_id not in event.assignee_ids:
+            return False
+        if self.project_id and event.project_id != self.project_id:
+            return False
+        if self.task_id and event.task_id != self.task_id:
+            return False
+        if self.subtree_id and event.task_id != self.subtree_id and self.subtree_id not in event.ancestor_ids:
+            return False
+        if self.assignee_id and self.assignee_id not in event.assignee_ids:
+            return False
+        return True
+
+class TaskEventDispatcher:
+    # One per shard: each shard has its own outbox and its own seq space
+    def __init__(self, shard: str = DEFAULT_SHARD):
+        self.shard = shard
+        self._sessionmaker = get_shard(shard).sessionmaker
+        self._subscribers: set[Subscription] = set()
+        self._wakeup = asyncio.Event()
+        self._last_seq = 0
+        self._last_prune: Optional[datetime] = None
+        self._conn = None
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def last_seq(self) -> int:
+        return self._last_seq
+
+    async def start(self):
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+        await self._close_listener()
+
+    def subscribe(self, sub: Subscription) -> Subscription:
+        if not sub.cursor:
+            sub.cursor = self._last_seq
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        self._subscribers.discard(sub)
+
+    async def events_for(self, sub: Subscription):
+        # Replay everything after the cursor from the outbox first, then switch to the live queue.
+        # The subscription is already registered, so anything dispatched meanwhile is de-duplicated by seq.
+        while True:
+            async with self._sessionmaker() as session:
+                rows = (await session.execute(
+                    select(TaskEvent)
+                    .where(TaskEvent.seq > sub.cursor)
+                    .order_by(TaskEvent.seq)
+                    .limit(settings.TASK_EVENT_BATCH_SIZE)
+                )).scalars().all()
+            for event in rows:
+                sub.cursor = event.seq
+                if sub.matches(event):
+                    yield serialize_event(event)
+            if len(rows) < settings.TASK_EVENT_BATCH_SIZE:
+                break
+        while not sub.overflowed:
+            event = await sub.queue.get()
+            if event is None:
+                break
+            if event.seq <= sub.cursor:
+                continue
+            sub.cursor = event.seq
+            yield serialize_event(event)
+
+    async def oldest_seq(self) -> Optional[int]:
+        async with self._sessionmaker() as session:
+            return (await session.execute(select(func.min(TaskEvent.seq)))).scalar()
+
+    def _on_notify(self, conn, pid, channel, payload):
+        self._wakeup.set()
+
+    async def _open_listener(self):
+        self._conn = await connect_dedicated(self.shard)
+        await self._conn.add_listener(TASK_EVENT_CHANNEL, self._on_notify)
+
+    async def _close_listener(self):
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+
+    async def _run(self):
+        while True:
+            try:
+                if self._conn is None or self._conn.is_closed():
+                    await self._open_listener()
+                    if not self._last_seq:
+                        async with self._sessionmaker() as session:
+                            self._last_seq = (await session.execute(select(func.max(TaskEvent.seq)))).scalar() or 0
+                await self._stamp()
+                await self._dispatch()
+                await self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Task event dispatcher (%s) failed, retrying", self.shard)
+                await self._close_listener()
+            # Polling fallback in case a notification is lost while reconnecting
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=settings.TASK_EVENT_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _stamp(self):
+        # Only one worker stamps at a time, so seq order matches commit order of the stamping transactions
+        async with self._sessionmaker() as session:
+            locked = (await session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": STAMP_LOCK_KEY})).scalar()
+            if not locked:
+                return
+            stamped = (await session.execute(
+                text("""
+                    UPDATE taskevent SET seq = nextval('taskevent_seq_seq')
+                    WHERE id IN (
+                        SELECT id FROM taskevent WHERE seq IS NULL ORDER BY id LIMIT :limit
+                    )
+                    RETURNING seq
+                """),
+                {"limit": settings.TASK_EVENT_BATCH_SIZE},
+            )).scalars().all()
+            if stamped:
+                await session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": TASK_EVENT_CHANNEL})
+            await session.commit()
+        if len(stamped) == settings.TASK_EVENT_BATCH_SIZE:
+            self._wakeup.set()
+
+    async def _dispatch(self):
+        while True:
+            async with self._sessionmaker() as session:
+                rows = (await session.execute(
+                    select(TaskEvent)
+                    .where(TaskEvent.seq > self._last_seq)
+                    .order_by(TaskEvent.seq)
+                    .limit(settings.TASK_EVENT_BATCH_SIZE)
+                )).scalars().all()
+            for event in rows:
+                self._last_seq = event.seq
+                for sub in list(self._subscribers):
+                    if not sub.matches(event):
+                        continue
+                    try:
+                        sub.queue.put_nowait(event)
+                    except asyncio.QueueFull:
+                        # Slow consumer: cut it loose, the client resumes from its last seq
+                        sub.overflowed = True
+                        self._subscribers.discard(sub)
+            if len(rows) < settings.TASK_EVENT_BATCH_SIZE:
+                break
+
+    async def _prune(self):
+        now = datetime.now(timezone.utc)
+        if self._last_prune and now - self._last_prune < timedelta(hours=1):
+            return
+        self._last_prune = now
+        async with self._sessionmaker() as session:
+            await session.execute(
+                delete(TaskEvent).where(
+                    TaskEvent.seq.is_not(None),
+                    TaskEvent.created_at < now - timedelta(hours=settings.TASK_EVENT_RETENTION_HOURS),
+                )
+            )
+            await session.commit()
+
+task_event_dispatchers = {name: TaskEventDispatcher(name) for name in shards}
@@ -0,0 +1,134 @@
+import asyncio
+import json
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect, Header, status
+from fastapi.responses import StreamingResponse
+from models.role import RoleList
+from src.middlewares import authenticate_token
+from src.utils.checkaccessservice import check_access
+from src.projects.service import resolve_project_for
+from .dispatcher import task_event_dispatchers, TaskEventDispatcher, Subscription
+
+router = APIRouter(prefix="/events", tags=["Task Events"])
+
+SSE_HEARTBEAT_SECONDS = 15
+
+async def dispatcher_for(project_id: Optional[UUID], user, role_mask: int) -> tuple[UUID, TaskEventDispatcher]:
+    # Cursors are per shard, so a stream follows exactly one project, which the user must be able to open
+    project = await resolve_project_for(project_id, user, role_mask)
+    return project.id, task_event_dispatchers[project.shard]
+
+async def resync_needed(dispatcher: TaskEventDispatcher, since: Optional[int]) -> bool:
+    # The requested cursor has already been pruned from the outbox
+    if not since:
+        return False
+    oldest = await dispatcher.oldest_seq()
+    return oldest is not None and since < oldest - 1
+
+@router.get("/stream")
+@check_access(RoleList.TASK_VIEW.value)
+async def stream_task_events(
+    request: Request,
+    task_id: Optional[UUID] = None,
+    subtree_id: Optional[UUID] = None,
+    assignee_id: Optional[UUID] = None,
+    since: Optional[int] = None,
+    project_id: Optional[UUID] = None,
+    last_event_id: Optional[int] = Header(default=None),
+    x_project_id: Optional[UUID] = Header(default=None),
+):
+    project_id, dispatcher = await dispatcher_for(x_project_id or project_id, request.user, request.get("role_mask", 0))
+    sub = dispatcher.subscribe(Subscription(
+        user_id=request.user.id,
+        project_id=project_id,
+        task_id=task_id,
+        subtree_id=subtree_id,
+        assignee_id=assignee_id,
+        cursor=last_event_id or since or 0,
+    ))
+
+    async def event_source():
+        try:
+            if await resync_needed(dispatcher, sub.cursor):
+                yield "event: resync\ndata: {}\n\n"
+            events = dispatcher.events_for(sub)
+            pending = asyncio.ensure_future(events.__anext__())
+            while True:
+                done, _ = await asyncio.wait({pending}, timeout=SSE_HEARTBEAT_SECONDS)
+                if not done:
+                    if await request.is_disconnected():
+                        pending.cancel()
+                        break
+                    yield ": keep-alive\n\n"
+                    continue
+                try:
+                    event = pending.result()
+                except StopAsyncIteration:
+                    break
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+                pending = asyncio.ensure_future(events.__anext__())
+        finally:
+            dispatcher.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws")
+async def task_events_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = None,
+    task_id: Optional[UUID] = None,
+    subtree_id: Optional[UUID] = None,
+    assignee_id: Optional[UUID] = None,
+    since: Optional[int] = None,
+    project_id: Optional[UUID] = None,
+):
+    # Websocket scopes skip the HTTP middleware, so authenticate here
+    auth_header = websocket.headers.get("Authorization")
+    if not token and auth_header and auth_header.startswith("Bearer "):
+        token = auth_header.split(" ")[1]
+    authenticated = await authenticate_token(token) if token else None
+    if authenticated is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Unable to validate credentials.")
+        return
+    user, role_mask = authenticated
+    if not user.is_active or not role_mask & RoleList.TASK_VIEW.bit:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="User is not authorized to do this action")
+        return
+
+    project_header = websocket.headers.get("X-Project-Id")
+    try:
+        project_id, dispatcher = await dispatcher_for(
+            project_id or (UUID(project_header) if project_header else None), user, role_mask,
+        )
+    except HTTPException as error:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=error.detail)
+        return
+    except ValueError:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason="Project not found")
+        return
+
+    await websocket.accept()
+    sub = dispatcher.subscribe(Subscription(
+        user_id=user.id,
+        project_id=project_id,
+        task_id=task_id,
+        subtree_id=subtree_id,
+        assignee_id=assignee_id,
+        cursor=since or 0,
+    ))
+    try:
+        if await resync_needed(dispatcher, sub.cursor):
+            await websocket.send_json({"type": "resync"})
+        async for event in dispatcher.events_for(sub):
+            await websocket.send_json(event)
+        # Only reached when the subscriber fell too far behind
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=f"Resume from seq {sub.cursor}")
+    except WebSocketDisconnect:
+        pass
+    finally:
+        dispatcher.unsubscribe(sub)
@@ -0,0 +1,81 @@
+from collections import defaultdict
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import select
+from models.task import Task, TaskAssignee
+from models.event import TaskEvent, TaskEventType
+
+async def get_ancestor_ids(session, parent_task_id):
+    if parent_task_id is None:
+        return []
+    # UNION (not UNION ALL) so that an accidental parent cycle still terminates
+    ancestors = (
+        select(Task.id, Task.parent_task_id)
+        .where(Task.id == parent_task_id)
+        .cte("ancestors", recursive=True)
+    )
+    ancestors = ancestors.union(
+        select(Task.id, Task.parent_task_id).join(ancestors, Task.id == ancestors.c.parent_task_id)
+    )
+    return list((await session.execute(select(ancestors.c.id))).scalars().all())
+
+async def record_task_event(session, task, event_type: TaskEventType, changes=None, assignee_ids=None):
+    # Written in the caller's transaction, so the event is committed (or rolled back) with the change itself
+    if assignee_ids is None:
+        assignee_ids = (await session.execute(
+            select(TaskAssignee.user_id).where(TaskAssignee.task_id == task.id)
+        )).scalars().all()
+    event = TaskEvent(
+        task_id=task.id,
+        project_id=task.project_id,
+        event_type=event_type.value,
+        parent_task_id=task.parent_task_id,
+        created_by=task.created_by,
+        assignee_ids=list(assignee_ids),
+        ancestor_ids=await get_ancestor_ids(session, task.parent_task_id),
+        changes=jsonable_encoder(changes or {}),
+    )
+    session.add(event)
+    return event
+
+async def record_task_events(session, tasks, event_type: TaskEventType, changes_by_task=None):
+    # Set-based variant of record_task_event for background jobs: one query for assignees and
+    # one recursive query for every task's ancestor chain, regardless of batch size
+    task_ids = [task.id for task in tasks]
+    if not task_ids:
+        return []
+    changes_by_task = changes_by_task or {}
+    assignees = defaultdict(list)
+    for task_id, user_id in (await session.execute(
+        select(TaskAssignee.task_id, TaskAssignee.user_id).where(TaskAssignee.task_id.in_(task_ids))
+    )).all():
+        assignees[task_id].append(user_id)
+
+    chain = (
+        select(Task.id.label("task_id"), Task.parent_task_id.label("ancestor_id"))
+        .where(Task.id.in_(task_ids), Task.parent_task_id.is_not(None))
+        .cte("chain", recursive=True)
+    )
+    chain = chain.union(
+        select(chain.c.task_id, Task.parent_task_id)
+        .join(Task, Task.id == chain.c.ancestor_id)
+        .where(Task.parent_task_id.is_not(None))
+    )
+    ancestors = defaultdict(list)
+    for task_id, ancestor_id in (await session.execute(select(chain.c.task_id, chain.c.ancestor_id))).all():
+        ancestors[task_id].append(ancestor_id)
+
+    events = [
+        TaskEvent(
+            task_id=task.id,
+            project_id=task.project_id,
+            event_type=event_type.value,
+            parent_task_id=task.parent_task_id,
+            created_by=task.created_by,
+            assignee_ids=assignees[task.id],
+            ancestor_ids=ancestors[task.id],
+            changes=jsonable_encoder(changes_by_task.get(task.id, {})),
+        )
+        for task in tasks
+    ]
+    session.add_all(events)
+    return events
@@ -0,0 +1,239 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+from fastapi import status
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import delete, exc, or_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from models.idempotency import IdempotencyKey
+from src.config import settings
+from src.database import SessionLocal
+from src.taskmanager.scheduler import LeaderElectedJob
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Recomputed for every response, never replayed
+SKIPPED_HEADERS = {"content-length", "date", "server"}
+
+def request_fingerprint(method: str, path: str, query: str, project: Optional[str], body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method, path, query, project or ""):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    headers: list
+    body: bytes
+    expires_at: datetime
+
+    def replay(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        for name, value in self.headers:
+            response.headers.append(name, value)
+        response.headers[REPLAYED_HEADER] = "true"
+        return response
+
+def key_reused() -> Response:
+    return JSONResponse(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        content={"detail": "Idempotency-Key was already used for a different request."},
+    )
+
+def key_in_progress() -> Response:
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": "A request with this Idempotency-Key is still being processed. Retry shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+class IdempotencyStore:
+    # Responses live in the idempotencykey table so every worker can replay them; the LRU in front
+    # saves the round trip for the retries that land on the worker that served the first attempt.
+    # Duplicates that arrive while the first attempt is running wait for it instead of running again:
+    # on the same worker through a shared future, across workers by polling the claimed row.
+    def __init__(self, cache_size: int):
+        self._cache_size = cache_size
+        self._cache: OrderedDict[tuple[UUID, str], StoredResponse] = OrderedDict()
+        self._in_flight: dict[tuple[UUID, str], asyncio.Future] = {}
+
+    def _cached(self, cache_key) -> Optional[StoredResponse]:
+        stored = self._cache.get(cache_key)
+        if stored is None:
+            return None
+        if stored.expires_at <= datetime.now(timezone.utc):
+            del self._cache[cache_key]
+            return None
+        self._cache.move_to_end(cache_key)
+        return stored
+
+    def _remember(self, cache_key, stored: StoredResponse):
+        self._cache[cache_key] = stored
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def run(
+        self, user_id: UUID, key: str, fingerprint: str, execute: Callable[[], Awaitable[Response]],
+    ) -> Response:
+        cache_key = (user_id, key)
+        stored = self._cached(cache_key)
+        if stored is None and cache_key in self._in_flight:
+            stored = await asyncio.shield(self._in_flight[cache_key])
+            if stored is None:
+                # The first attempt failed without a replayable response, this one runs for real
+                return await self.run(user_id, key, fingerprint, execute)
+        if stored is not None:
+            return stored.replay() if stored.fingerprint == fingerprint else key_reused()
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[cache_key] = future
+        try:
+            response, stored = await self._claim_and_execute(user_id, key, fingerprint, execute)
+        except BaseException:
+            future.set_result(None)
+            raise
+        finally:
+            self._in_flight.pop(cache_key, None)
+        if not future.done():
+            future.set_result(stored)
+        if stored is not None:
+            self._remember(cache_key, stored)
+        return response
+
+    async def _claim_and_execute(self, user_id, key, fingerprint, execute):
+        now = datetime.now(timezone.utc)
+        async with SessionLocal() as session:
+            # Claim the key, taking over rows that expired or whose owner died mid-request
+            claimed = (await session.execute(
+                insert(IdempotencyKey)
+                .values(
+                    user_id=user_id, key=key, fingerprint=fingerprint, headers=[], created_at=now,
+                    locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                    expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+                )
+                .on_conflict_do_update(
+                    index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+                    set_={"fingerprint": fingerprint, "status_code": None, "headers": [], "body": None,
+                          "created_at": now, "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+                          "expires_at": now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)},
+                    where=or_(
+                        IdempotencyKey.expires_at <= now,
+                        IdempotencyKey.status_code.is_(None) & (IdempotencyKey.locked_until <= now),
+                    ),
+                )
+                .returning(IdempotencyKey.key)
+            )).scalar()
+            await session.commit()
+        if claimed is None:
+            stored = await self._wait_for_owner(user_id, key)
+            if stored is False:
+                # The owner failed and released the key
+                return await self._claim_and_execute(user_id, key, fingerprint, execute)
+            if stored is None:
+                return key_in_progress(), None
+            return (stored.replay() if stored.fingerprint == fingerprint else key_reused()), stored
+
+        holder = asyncio.create_task(self._hold(user_id, key))
+        try:
+            response = await execute()
+            body = b"".join([chunk async for chunk in response.body_iterator])
+        except BaseException:
+            await self._release(user_id, key)
+            raise
+        finally:
+            holder.cancel()
+        headers = [
+            [name, value] for name, value in response.headers.items()
+            if name.lower() not in SKIPPED_HEADERS
+        ]
+        replayable = Response(content=body, status_code=response.status_code, background=response.background)
+        replayable.raw_headers = response.raw_headers
+        if response.status_code >= 500:
+            # Server-side failures are not final, a retry should run the request again
+            await self._release(user_id, key)
+            return replayable, None
+
+        stored = StoredResponse(
+            fingerprint=fingerprint, status_code=response.status_code, headers=headers, body=body,
+            expires_at=now + timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS),
+        )
+        async with SessionLocal() as session:
+            key_row = await session.get(IdempotencyKey, (user_id, key))
+            if key_row is not None:
+                key_row.status_code, key_row.headers, key_row.body = stored.status_code, headers, body
+                await session.commit()
+        return replayable, stored
+
+    async def _hold(self, user_id, key):
+        # Keeps extending the claim while the request runs, so a slow request is never taken over by
+        # a retry (and run twice); a worker that dies stops extending and the claim lapses
+        interval = settings.IDEMPOTENCY_LOCK_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with SessionLocal() as session:
+                    await session.execute(
+                        update(IdempotencyKey)
+                        .where(
+                            IdempotencyKey.user_id == user_id, IdempotencyKey.key == key,
+                            IdempotencyKey.status_code.is_(None),
+                        )
+                        .values(locked_until=datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS))
+                    )
+                    await session.commit()
+            except exc.SQLAlchemyError:
+                logger.exception("Could not extend the claim on Idempotency-Key %s", key)
+
+    async def _wait_for_owner(self, user_id, key):
+        # Returns the stored response, None if the owner is still running at the deadline,
+        # or False if the owner gave the key up
+        deadline = asyncio.get_running_loop().time() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while True:
+            async with SessionLocal() as session:
+                key_row = (await session.execute(
+                    select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                )).scalars().first()
+            if key_row is not None and key_row.status_code is not None:
+                return StoredResponse(
+                    fingerprint=key_row.fingerprint, status_code=key_row.status_code,
+                    headers=key_row.headers, body=key_row.body or b"", expires_at=key_row.expires_at,
+                )
+            if key_row is None:
+                return False
+            if asyncio.get_running_loop().time() >= deadline:
+                return None
+            await asyncio.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+    async def _release(self, user_id, key):
+        async with SessionLocal() as session:
+            await session.execute(
+                delete(IdempotencyKey).where(
+                    IdempotencyKey.user_id == user_id, IdempotencyKey.key == key, IdempotencyKey.status_code.is_(None),
+                )
+            )
+            await session.commit()
+
+idempotency_store = IdempotencyStore(settings.IDEMPOTENCY_CACHE_SIZE)
+
+async def purge_expired_idempotency_keys():
+    async with SessionLocal() as session:
+        await session.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc)))
+        await session.commit()
+
+idempotency_purger = LeaderElectedJob(
+    "Idempotency key purge", settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+    purge_expired_idempotency_keys,
+)
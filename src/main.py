@@ -1,13 +1,40 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from src.config import settings, app_configs
 from src.authentication.router import router as auth_router
 from src.taskmanager.router import router as task_router
-from src.middlewares import AuthenticationMiddleware
-from models.role import Role, RoleList
-from src.database import get_db_session
-from sqlmodel import Session
+from src.events.router import router as events_router
+from src.projects.router import router as projects_router
+from src.events.dispatcher import task_event_dispatchers
+from src.taskmanager.scheduler import overdue_schedulers, history_partitioners
+from src.taskmanager.archive import task_archivers
+from src.taskmanager.stats import task_stats_aggregators
+from src.middlewares import AuthenticationMiddleware, IdempotencyMiddleware, CompressionMiddleware
+from src.idempotency import idempotency_purger
+from src.bootstrap import seed_roles, warm_pool, cache_openapi
+from src.database import dispose_engines
+from src.singleflight import single_flight
+from src.utils.checkaccessservice import check_access
+from models.role import RoleList
 
-app = FastAPI(**app_configs)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Mounted sub-apps don't receive lifespan events, so background services hang off the root app
+    await seed_roles()
+    await warm_pool(settings.DB_POOL_WARM_CONNECTIONS)
+    # Every shard has its own outbox, overdue marking and archive
+    services = [
+        *task_event_dispatchers.values(), *overdue_schedulers.values(), *task_archivers.values(),
+        *history_partitioners.values(), *task_stats_aggregators.values(), idempotency_purger,
+    ]
+    for service in services:
+        await service.start()
+    yield
+    for service in reversed(services):
+        await service.stop()
+    await dispose_engines()
+
+app = FastAPI(**app_configs, lifespan=lifespan)
 
 @app.get("/healthcheck", include_in_schema=False)
 async def healthcheck() -> dict[str, str]:
@@ -16,29 +43,38 @@ async def healthcheck() -> dict[str, str]:
         "message": "Task Management application is up and running!",
     }
 
-@app.get("/run-startup-script")
-async def run_startup_script(session: Session = Depends(get_db_session)) -> dict[str, str]:
-    roles = RoleList._member_names_
-    for key in roles:
-        role = Role(
-            name= key,
-            description = key,
-            code= key
-        )
-        session.add(role)
-    await session.commit()
+@app.get("/run-startup-script", deprecated=True)
+async def run_startup_script() -> dict[str, str]:
+    # Roles are seeded on startup now; kept for existing setup scripts and safe to call repeatedly
+    await seed_roles()
     return {
         "status": "true",
         "description": "Roles have been created"
     }
 
 task_app = FastAPI(title="Task Management", docs_url="/docs", openapi_url="/openapi.json")
+task_app.add_middleware(IdempotencyMiddleware)
 task_app.add_middleware(AuthenticationMiddleware)
+task_app.add_middleware(CompressionMiddleware)
+
+@task_app.get("/metrics/single-flight", include_in_schema=False)
+@check_access(RoleList.ADMIN.value)
+async def single_flight_metrics(request: Request) -> dict:
+    # Per worker process: each worker coalesces its own requests. On the task app so that it sits
+    # behind authentication; the per-route traffic counters are for operators only.
+    return single_flight.stats()
 
 auth_app = FastAPI(title="Authentication System", docs_url="/docs", openapi_url="/openapi.json")
+auth_app.add_middleware(CompressionMiddleware)
 
 auth_app.include_router(auth_router)
+task_app.include_router(events_router)
+task_app.include_router(projects_router)
 task_app.include_router(task_router)
 
+cache_openapi(app, "main")
+cache_openapi(auth_app, "auth")
+cache_openapi(task_app, "task")
+
 app.mount(settings.AUTH_API_PREFIX, auth_app)
 app.mount(settings.TASK_API_PREFIX, task_app)
\ No newline at end of file
@@ -2,13 +2,16 @@ from fastapi import status, Request
 from fastapi.responses import JSONResponse
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
-from models.user import User
-from models.role import Role, UserRoleLink
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from models.user import User, MIRRORED_PASSWORD_HASH
 from src.database import SessionLocal
 from sqlmodel import select
 from src.config import settings
 from typing import Optional
+from src.idempotency import IDEMPOTENCY_HEADER, idempotency_store, request_fingerprint
+from src.compression import StreamCompressor, compressed_bodies, compressible, negotiate_encoding, compress
 
 SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = settings.JWT_ALGORITHM
@@ -40,33 +43,114 @@ class AuthenticationMiddleware(BaseHTTPMiddleware):
                 headers={"WWW-Authenticate": "Bearer"},
             )
         token = auth_header.split(" ")[1]
-        try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            user_id: str = payload.get("sub")
-            if user_id is None:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Unable to validate credentials."},
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-        except JWTError:
+        authenticated = await authenticate_token(token)
+        if authenticated is None:
             return JSONResponse(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 content={"detail": "Unable to validate credentials."},
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        async with SessionLocal() as db:
-            result = await db.execute(select(User).where(User.id == user_id))
-            user: Optional[User] = result.scalars().first()
-            if not user:
-                return JSONResponse(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    content={"detail": "Unable to validate credentials."},
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            result = await db.execute(select(Role.code).join(UserRoleLink, UserRoleLink.role_id == Role.id).where(UserRoleLink.user_id == user_id, Role.is_active == True, UserRoleLink.is_active == True))
-            roles = result.scalars().all()
-            request.scope["user"] = user
-            request.scope["roles"] = roles
-            response = await call_next(request)
-            return response
\ No newline at end of file
+        # The DB session is released before the request runs so long-lived streams don't pin a connection
+        request.scope["user"], request.scope["role_mask"] = authenticated
+        response = await call_next(request)
+        return response
+
+async def authenticate_token(token: str) -> Optional[tuple[User, int]]:
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id: str = payload.get("sub")
+        if user_id is None:
+            return None
+    except JWTError:
+        return None
+    # Always the default database, where users live: shards only hold credential-less copies
+    async with SessionLocal() as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user: Optional[User] = result.scalars().first()
+        if not user or user.password_hash == MIRRORED_PASSWORD_HASH:
+            return None
+    # The user's roles come with the row as a bitmask, see RoleList.bit
+    return user, user.role_mask
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    # Added before AuthenticationMiddleware so it runs inside it: keys are scoped to the authenticated user
+    write_methods = {"POST", "PUT", "PATCH", "DELETE"}
+
+    async def dispatch(self, request: Request, call_next):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key or request.method not in self.write_methods or "user" not in request.scope:
+            return await call_next(request)
+        if len(key) > 255:
+            return JSONResponse(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                content={"detail": "Idempotency-Key must be at most 255 characters."},
+            )
+        fingerprint = request_fingerprint(
+            request.method, request.url.path, request.url.query, request.headers.get("X-Project-Id"), await request.body(),
+        )
+        return await idempotency_store.run(request.user.id, key, fingerprint, lambda: call_next(request))
+
+class CompressionMiddleware:
+    # Plain ASGI rather than BaseHTTPMiddleware so streamed responses are compressed chunk by
+    # chunk instead of being buffered. Added last, so it wraps the other middlewares and the
+    # idempotency store keeps (and replays) uncompressed bodies.
+    def __init__(self, app: ASGIApp, minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            return await self.app(scope, receive, send)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+        # Only bodies of GET responses are worth remembering; write responses are unique
+        cacheable = scope["method"] == "GET"
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                return await send(message)
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is not None:
+                chunk = compressor.compress(body)
+                if not more_body:
+                    chunk += compressor.finish()
+                return await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+            headers = MutableHeaders(raw=start["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            if (
+                "content-encoding" in headers
+                or start["status"] < 200 or start["status"] in (204, 304)
+                or not compressible(headers.get("content-type", ""))
+                or (not more_body and len(body) < self.minimum_size)
+            ):
+                passthrough = True
+                await send(start)
+                return await send(message)
+
+            # ETags are left strong: they carry the task version, which is the same in every encoding,
+            # and If-Match needs a strong validator
+            headers["Content-Encoding"] = encoding
+            if more_body:
+                del headers["Content-Length"]
+                compressor = StreamCompressor(encoding)
+                await send(start)
+                return await send({"type": "http.response.body", "body": compressor.compress(body), "more_body": True})
+            if cacheable and start["status"] == 200 and "no-store" not in headers.get("cache-control", ""):
+                compressed = compressed_bodies.compress(encoding, body)
+            else:
+                compressed = compress(encoding, body)
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,200 @@
+import asyncio
+import logging
+from uuid import UUID
+from sqlalchemy import update, delete, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select, func
+from models.project import Project, ProjectStatus
+from models.task import Task, TaskAssignee, TaskDependency
+from models.archive import TaskArchive
+from models.event import TaskEvent
+from models.history import TaskHistory
+from models.stats import TaskDailyStat
+from src.config import settings
+from src.database import SessionLocal, DEFAULT_SHARD, get_shard
+from src.taskmanager.partitions import create_month_partitions
+from .service import project_directory, ensure_users_on_shard
+
+logger = logging.getLogger(__name__)
+
+# Generated columns (search vector) are recomputed by the target database
+TASK_COLUMNS = [column for column in Task.__table__.columns if column.computed is None]
+
+def chunks(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+async def set_project_state(session, project_id: UUID, **values):
+    await session.execute(update(Project).where(Project.id == project_id).values(**values))
+
+async def freeze_project(project: Project):
+    # FOR UPDATE conflicts with the KEY SHARE lock every write takes on the project row, so this waits
+    # for in-flight writes and every later write sees `moving` and is rejected with 503
+    async with get_shard(project.shard).sessionmaker() as source:
+        await source.execute(select(Project.id).where(Project.id == project.id).with_for_update())
+        await set_project_state(source, project.id, status=ProjectStatus.moving)
+        await source.commit()
+    if project.shard != DEFAULT_SHARD:
+        async with SessionLocal() as directory:
+            await set_project_state(directory, project.id, status=ProjectStatus.moving)
+            await directory.commit()
+    project_directory.invalidate(project.id)
+
+async def task_ids_by_depth(source, project_id: UUID) -> list[UUID]:
+    # Parents before subtasks, so the parent foreign key holds after every batch
+    tree = (
+        select(Task.id, literal(0).label("depth"))
+        .where(Task.project_id == project_id, Task.parent_task_id.is_(None))
+        .cte("tree", recursive=True)
+    )
+    tree = tree.union_all(
+        select(Task.id, tree.c.depth + 1).join(tree, Task.parent_task_id == tree.c.id)
+    )
+    return list((await source.execute(select(tree.c.id).order_by(tree.c.depth, tree.c.id))).scalars().all())
+
+async def copy_project(project: Project, target_shard: str, batch_size: int):
+    async with get_shard(project.shard).sessionmaker() as source, get_shard(target_shard).sessionmaker() as target:
+        target.info["shard"] = target_shard
+        await ensure_users_on_shard(target, [project.created_by])
+        await target.execute(
+            insert(Project)
+            .values(**{**project.model_dump(), "shard": target_shard, "status": ProjectStatus.moving})
+            .on_conflict_do_nothing()
+        )
+        await target.commit()
+
+        task_ids = await task_ids_by_depth(source, project.id)
+        for batch in chunks(task_ids, batch_size):
+            rows = (await source.execute(select(*TASK_COLUMNS).where(Task.id.in_(batch)))).mappings().all()
+            assignees = (await source.execute(
+                select(TaskAssignee.task_id, TaskAssignee.user_id, TaskAssignee.is_owner)
+                .where(TaskAssignee.task_id.in_(batch))
+            )).mappings().all()
+            await ensure_users_on_shard(
+                target, [row["created_by"] for row in rows] + [row["user_id"] for row in assignees],
+            )
+            by_id = {row["id"]: row for row in rows}
+            # Keep the depth order, IN (...) does not
+            await target.execute(
+                insert(Task.__table__).values([dict(by_id[tid]) for tid in batch if tid in by_id]).on_conflict_do_nothing()
+            )
+            if assignees:
+                await target.execute(insert(TaskAssignee).values([dict(row) for row in assignees]).on_conflict_do_nothing())
+            await target.commit()
+
+        # Dependencies only once every task of the project exists on the target
+        for batch in chunks(task_ids, batch_size):
+            links = (await source.execute(
+                select(TaskDependency.task_id, TaskDependency.depends_on_task_id).where(TaskDependency.task_id.in_(batch))
+            )).mappings().all()
+            if links:
+                await target.execute(insert(TaskDependency).values([dict(row) for row in links]).on_conflict_do_nothing())
+                await target.commit()
+
+        bounds = (await source.execute(
+            select(func.min(TaskArchive.completed_at), func.max(TaskArchive.completed_at))
+            .where(TaskArchive.project_id == project.id)
+        )).first()
+        if bounds[0] is not None:
+            await create_month_partitions(target, "taskarchive", bounds[0], bounds[1])
+            offset = 0
+            while True:
+                archived = (await source.execute(
+                    select(TaskArchive.__table__)
+                    .where(TaskArchive.project_id == project.id)
+                    .order_by(TaskArchive.completed_at, TaskArchive.id)
+                    .offset(offset)
+                    .limit(batch_size)
+                )).mappings().all()
+                if not archived:
+                    break
+                await ensure_users_on_shard(
+                    target, [row["created_by"] for row in archived] + [uid for row in archived for uid in row["assignee_ids"]],
+                )
+                await target.execute(insert(TaskArchive.__table__).values([dict(row) for row in archived]).on_conflict_do_nothing())
+                await target.commit()
+                offset += len(archived)
+
+        bounds = (await source.execute(
+            select(func.min(TaskHistory.changed_at), func.max(TaskHistory.changed_at))
+            .where(TaskHistory.project_id == project.id)
+        )).first()
+        if bounds[0] is not None:
+            await create_month_partitions(target, "taskhistory", bounds[0], bounds[1])
+            # Not keyed like the other tables, so a resumed move starts the history over
+            await target.execute(delete(TaskHistory).where(TaskHistory.project_id == project.id))
+            last_id = 0
+            while True:
+                # Ids are re-assigned by the target's sequence, in the same order
+                history = (await source.execute(
+                    select(TaskHistory.__table__)
+                    .where(TaskHistory.project_id == project.id, TaskHistory.id > last_id)
+                    .order_by(TaskHistory.id)
+                    .limit(batch_size)
+                )).mappings().all()
+                if not history:
+                    break
+                await target.execute(
+                    insert(TaskHistory.__table__).values([{k: v for k, v in row.items() if k != "id"} for row in history])
+                )
+                await target.commit()
+                last_id = history[-1]["id"]
+
+        stats = (await source.execute(
+            select(TaskDailyStat.__table__).where(TaskDailyStat.project_id == project.id)
+        )).mappings().all()
+        for batch in chunks(stats, batch_size):
+            await target.execute(insert(TaskDailyStat.__table__).values([dict(row) for row in batch]).on_conflict_do_nothing())
+            await target.commit()
+    return len(task_ids)
+
+async def flip_directory(project: Project, target_shard: str):
+    async with get_shard(target_shard).sessionmaker() as target:
+        await set_project_state(target, project.id, shard=target_shard, status=ProjectStatus.active)
+        await target.commit()
+    if target_shard != DEFAULT_SHARD:
+        async with SessionLocal() as directory:
+            await set_project_state(directory, project.id, shard=target_shard, status=ProjectStatus.active)
+            await directory.commit()
+    project_directory.invalidate(project.id)
+
+async def purge_source(project: Project):
+    # Single statements per table: the self-referencing parent key is checked at the end of each statement
+    async with get_shard(project.shard).sessionmaker() as source:
+        project_tasks = select(Task.id).where(Task.project_id == project.id)
+        await source.execute(
+            delete(TaskDependency).where(
+                TaskDependency.task_id.in_(project_tasks) | TaskDependency.depends_on_task_id.in_(project_tasks)
+            )
+        )
+        await source.execute(delete(TaskAssignee).where(TaskAssignee.task_id.in_(project_tasks)))
+        await source.execute(delete(Task).where(Task.project_id == project.id))
+        await source.execute(delete(TaskArchive).where(TaskArchive.project_id == project.id))
+        await source.execute(delete(TaskHistory).where(TaskHistory.project_id == project.id))
+        await source.execute(delete(TaskDailyStat).where(TaskDailyStat.project_id == project.id))
+        # Seq numbers are per shard, subscribers reconnect to the new shard's stream
+        await source.execute(delete(TaskEvent).where(TaskEvent.project_id == project.id))
+        if project.shard != DEFAULT_SHARD:
+            await source.execute(delete(Project).where(Project.id == project.id))
+        await source.commit()
+
+async def move_project(project_id: UUID, target_shard: str, batch_size: int = settings.PROJECT_MOVE_BATCH_SIZE) -> int:
+    # Writes to the project are rejected (503) from the freeze until the directory flips to the target.
+    # Reads keep being served by the source until it is purged, which waits out the directory cache TTL.
+    # Every copy step is idempotent, so a failed move is resumed by running it again.
+    get_shard(target_shard)
+    async with SessionLocal() as directory:
+        project = await directory.get(Project, project_id)
+    if project is None:
+        raise LookupError(f"Unknown project {project_id}")
+    if project.shard == target_shard:
+        return 0
+
+    logger.info("Moving project %s from %s to %s", project_id, project.shard, target_shard)
+    await freeze_project(project)
+    copied = await copy_project(project, target_shard, batch_size)
+    await flip_directory(project, target_shard)
+    await asyncio.sleep(settings.PROJECT_CACHE_TTL_SECONDS)
+    await purge_source(project)
+    logger.info("Moved project %s: %d tasks", project_id, copied)
+    return copied
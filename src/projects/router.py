@@ -0,0 +1,85 @@
+from typing import List
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select, or_
+from models.project import Project, ProjectMember, DEFAULT_PROJECT_ID
+from models.role import RoleList
+from src.database import get_db_session
+from src.utils.checkaccessservice import check_access
+from .service import create_project, resolve_project_for, add_project_member, remove_project_member
+from .structure import ProjectCreate, ProjectRead, ProjectMemberAdd, ProjectMemberRead
+
+router = APIRouter(prefix="/projects", tags=["Projects"])
+
+@router.post("", response_model=ProjectRead, status_code=status.HTTP_201_CREATED)
+@check_access(RoleList.TASK_CREATE.value)
+async def create_new_project(
+    project_in: ProjectCreate,
+    request: Request,
+):
+    # Placement is normally left to pick_shard; only admins may pin a project to a database
+    if project_in.shard is not None and not request.get("role_mask", 0) & RoleList.ADMIN.bit:
+        raise HTTPException(status_code=403, detail="Only admins can choose the shard")
+    return await create_project(project_in.name, request.user.id, project_in.shard)
+
+@router.get("", response_model=List[ProjectRead])
+@check_access(RoleList.TASK_VIEW.value)
+async def list_projects(
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+):
+    # The directory on the default database is the source of truth for projects. Everyone sees
+    # the default project and the projects they are a member of; admins see them all.
+    query = select(Project).order_by(Project.created_at)
+    if not request.get("role_mask", 0) & RoleList.ADMIN.bit:
+        query = query.where(or_(
+            Project.id == DEFAULT_PROJECT_ID,
+            exists().where(ProjectMember.project_id == Project.id, ProjectMember.user_id == request.user.id),
+        ))
+    return (await session.execute(query)).scalars().all()
+
+async def managed_project(session, project_id: UUID, request: Request) -> Project:
+    # Members are managed by the project's creator (or an admin)
+    project = await session.get(Project, project_id)
+    if project is None or project.id == DEFAULT_PROJECT_ID:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if project.created_by != request.user.id and not request.get("role_mask", 0) & RoleList.ADMIN.bit:
+        raise HTTPException(status_code=403, detail="Only the project creator can manage its members")
+    return project
+
+@router.get("/{project_id}/members", response_model=List[ProjectMemberRead])
+@check_access(RoleList.TASK_VIEW.value)
+async def list_project_members(
+    project_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+):
+    project = await resolve_project_for(project_id, request.user, request.get("role_mask", 0))
+    return (await session.execute(
+        select(ProjectMember).where(ProjectMember.project_id == project.id).order_by(ProjectMember.added_at)
+    )).scalars().all()
+
+@router.post("/{project_id}/members", response_model=ProjectMemberRead, status_code=status.HTTP_201_CREATED)
+@check_access(RoleList.TASK_VIEW.value)
+async def add_member(
+    project_id: UUID,
+    member: ProjectMemberAdd,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+):
+    project = await managed_project(session, project_id, request)
+    await add_project_member(session, project, member.user_id)
+    return await session.get(ProjectMember, (project.id, member.user_id))
+
+@router.delete("/{project_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+@check_access(RoleList.TASK_VIEW.value)
+async def remove_member(
+    project_id: UUID,
+    user_id: UUID,
+    request: Request,
+    session: AsyncSession = Depends(get_db_session),
+):
+    project = await managed_project(session, project_id, request)
+    await remove_project_member(session, project, user_id)
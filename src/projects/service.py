@@ -0,0 +1,180 @@
+import time
+from collections.abc import AsyncGenerator
+from typing import Optional
+from uuid import UUID
+from fastapi import HTTPException, Header, Request
+from sqlalchemy import exc
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlmodel import select, delete, func
+from models.project import Project, ProjectMember, ProjectStatus, DEFAULT_PROJECT_ID
+from models.role import RoleList
+from models.user import User, MIRRORED_PASSWORD_HASH
+from src.config import settings
+from src.database import SessionLocal, DEFAULT_SHARD, get_shard, shards
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+class ProjectDirectory:
+    # Short-lived in-process cache of project -> shard from the directory on the default database.
+    # Correctness during moves does not depend on the TTL, see lock_project_for_write.
+    # Memberships are cached the same way; removing a member takes effect on this worker at
+    # once and on the others within PROJECT_CACHE_TTL_SECONDS.
+    def __init__(self):
+        self._cache: dict[UUID, tuple[Project, float]] = {}
+        self._members: dict[tuple[UUID, UUID], tuple[bool, float]] = {}
+
+    async def get(self, project_id: UUID) -> Optional[Project]:
+        hit = self._cache.get(project_id)
+        if hit and hit[1] > time.monotonic():
+            return hit[0]
+        async with SessionLocal() as session:
+            project = await session.get(Project, project_id)
+        if project is not None:
+            self._cache[project_id] = (project, time.monotonic() + settings.PROJECT_CACHE_TTL_SECONDS)
+        return project
+
+    def invalidate(self, project_id: UUID):
+        self._cache.pop(project_id, None)
+
+    async def is_member(self, project_id: UUID, user_id: UUID) -> bool:
+        hit = self._members.get((project_id, user_id))
+        if hit and hit[1] > time.monotonic():
+            return hit[0]
+        async with SessionLocal() as session:
+            member = await session.get(ProjectMember, (project_id, user_id)) is not None
+        self._members[(project_id, user_id)] = (member, time.monotonic() + settings.PROJECT_CACHE_TTL_SECONDS)
+        return member
+
+    def invalidate_member(self, project_id: UUID, user_id: UUID):
+        self._members.pop((project_id, user_id), None)
+
+project_directory = ProjectDirectory()
+
+def project_id_of(session) -> UUID:
+    return session.info["project_id"]
+
+async def resolve_project(project_id: Optional[UUID]) -> Project:
+    project = await project_directory.get(project_id or DEFAULT_PROJECT_ID)
+    if project is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return project
+
+async def can_open_project(project: Project, user: User, role_mask: int) -> bool:
+    # The default project is shared by everyone; other projects need a membership (or ADMIN)
+    if project.id == DEFAULT_PROJECT_ID or role_mask & RoleList.ADMIN.bit:
+        return True
+    return await project_directory.is_member(project.id, user.id)
+
+async def resolve_project_for(project_id: Optional[UUID], user: User, role_mask: int) -> Project:
+    project = await resolve_project(project_id)
+    if not await can_open_project(project, user, role_mask):
+        raise HTTPException(status_code=403, detail="Not a member of this project")
+    return project
+
+async def lock_project_for_write(session, project_id: UUID):
+    # KEY SHARE on the shard-local project row: cheap for concurrent writers, but a project move
+    # takes FOR UPDATE on the same row and so waits for in-flight writes, and writes that start
+    # afterwards see the project as moving, owned by another shard or gone from this one
+    local = (await session.execute(
+        select(Project.status, Project.shard).where(Project.id == project_id).with_for_update(key_share=True)
+    )).first()
+    if local is None or local.status != ProjectStatus.active or local.shard != session.info["shard"]:
+        project_directory.invalidate(project_id)
+        raise HTTPException(
+            status_code=503,
+            detail="Project is being moved to another database. Retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+async def get_project_session(
+    request: Request,
+    x_project_id: Optional[UUID] = Header(default=None),
+) -> AsyncGenerator[AsyncSession, None]:
+    # Session on the shard that owns the requested project (X-Project-Id, default project otherwise),
+    # for its members only
+    project = await resolve_project_for(x_project_id, request.user, request.get("role_mask", 0))
+    async with get_shard(project.shard).sessionmaker() as session:
+        session.info["project_id"] = project.id
+        session.info["shard"] = project.shard
+        try:
+            if request.method not in READ_METHODS:
+                await lock_project_for_write(session, project.id)
+            yield session
+            await session.commit()
+        except exc.SQLAlchemyError:
+            await session.rollback()
+            raise
+
+async def ensure_users_on_shard(session, user_ids):
+    # Users live on the default database; other shards keep a copy (without credentials, see
+    # MIRRORED_PASSWORD_HASH) of every user their tasks reference so that foreign keys and joins keep working
+    if session.info.get("shard", DEFAULT_SHARD) == DEFAULT_SHARD:
+        return
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return
+    present = set((await session.execute(select(User.id).where(User.id.in_(user_ids)))).scalars().all())
+    missing = user_ids - present
+    if not missing:
+        return
+    async with SessionLocal() as directory:
+        users = (await directory.execute(select(User).where(User.id.in_(missing)))).scalars().all()
+    if users:
+        await session.execute(
+            insert(User)
+            .values([
+                {"id": u.id, "email": u.email, "full_name": u.full_name, "password_hash": MIRRORED_PASSWORD_HASH,
+                 "is_active": u.is_active, "created_at": u.created_at}
+                for u in users
+            ])
+            .on_conflict_do_nothing()
+        )
+
+async def pick_shard() -> str:
+    # New projects go to the shard that currently owns the fewest projects
+    async with SessionLocal() as session:
+        counts = dict((await session.execute(
+            select(Project.shard, func.count()).group_by(Project.shard)
+        )).all())
+    return min(shards, key=lambda name: counts.get(name, 0))
+
+async def create_project(name: str, user_id: UUID, shard: Optional[str] = None) -> Project:
+    shard = shard or await pick_shard()
+    try:
+        get_shard(shard)
+    except LookupError:
+        raise HTTPException(status_code=400, detail=f"Unknown shard '{shard}'")
+    project = Project(name=name, shard=shard, created_by=user_id)
+    # Shard copy first: a directory entry must never point at a shard that lacks the project
+    if shard != DEFAULT_SHARD:
+        async with get_shard(shard).sessionmaker() as session:
+            await session.execute(insert(Project).values(**project.model_dump()).on_conflict_do_nothing())
+            await session.commit()
+    async with SessionLocal() as session:
+        session.add(project)
+        # The creator is the first member; insert order is not guaranteed, hence the flush
+        await session.flush()
+        session.add(ProjectMember(project_id=project.id, user_id=user_id))
+        await session.commit()
+        await session.refresh(project)
+    return project
+
+async def add_project_member(session, project: Project, user_id: UUID):
+    if await session.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    await session.execute(
+        insert(ProjectMember).values(project_id=project.id, user_id=user_id).on_conflict_do_nothing()
+    )
+    # Committed before the cached answer is dropped, so it cannot be re-read from before the change
+    await session.commit()
+    project_directory.invalidate_member(project.id, user_id)
+
+async def remove_project_member(session, project: Project, user_id: UUID):
+    if user_id == project.created_by:
+        raise HTTPException(status_code=400, detail="The project creator cannot be removed")
+    await session.execute(
+        delete(ProjectMember).where(ProjectMember.project_id == project.id, ProjectMember.user_id == user_id)
+    )
+    await session.commit()
+    project_directory.invalidate_member(project.id, user_id)
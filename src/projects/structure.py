@@ -0,0 +1,31 @@
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Optional
+from uuid import UUID
+from models.project import ProjectStatus
+
+class ProjectCreate(BaseModel):
+    name: str = Field(..., min_length=1, example="Mobile app")
+    shard: Optional[str] = Field(None, description="Database shard (admins only), picked automatically when omitted")
+
+class ProjectRead(BaseModel):
+    id: UUID
+    name: str
+    shard: str
+    status: ProjectStatus
+    created_by: Optional[UUID]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ProjectMemberAdd(BaseModel):
+    user_id: UUID
+
+class ProjectMemberRead(BaseModel):
+    project_id: UUID
+    user_id: UUID
+    added_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,47 @@
+"""Production launcher.
+
+    python -m src.server                            # multi-worker server (uvloop + httptools)
+    python -m src.server --export-openapi ./openapi # pre-build the OpenAPI schemas at build time
+
+Set OPENAPI_SCHEMA_DIR to the exported directory so workers serve the schemas from disk.
+"""
+import argparse
+import os
+import uvicorn
+from src.config import settings
+
+def worker_count() -> int:
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    return max(2, (os.cpu_count() or 1))
+
+def serve():
+    uvicorn.run(
+        "src.main:app",
+        host=settings.WEB_HOST,
+        port=settings.WEB_PORT,
+        workers=worker_count(),
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        # On SIGTERM stop accepting, let in-flight requests finish, then cut long-lived streams
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_SHUTDOWN_SECONDS,
+        timeout_keep_alive=settings.WEB_KEEPALIVE_SECONDS,
+        proxy_headers=True,
+        access_log=settings.APP_ENVIRONMENT.is_debug,
+        log_level=settings.LOG_LEVEL,
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--export-openapi", metavar="DIR")
+    args = parser.parse_args()
+    if args.export_openapi:
+        from src.bootstrap import export_openapi
+        from src.main import app, auth_app, task_app
+        export_openapi({"main": app, "auth": auth_app, "task": task_app}, args.export_openapi)
+        return
+    serve()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, Optional
+from src.config import settings
+
+# Expired micro-cache entries are swept once the cache grows past this many keys
+CACHE_SWEEP_THRESHOLD = 1024
+
+@dataclass
+class FlightStats:
+    requests: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    cache_hits: int = 0
+
+    def as_dict(self) -> dict:
+        shared = self.coalesced + self.cache_hits
+        return {
+            "requests": self.requests,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "coalescing_ratio": round(shared / self.requests, 4) if self.requests else 0.0,
+        }
+
+class SingleFlight:
+    # Concurrent identical reads share one execution. The key must cover everything the result
+    # depends on (route params and visibility scope); per-user checks happen on the shared result.
+    # The execution runs as its own task with its own session, so a caller that disconnects does
+    # not cancel it for the others. Counters are per worker process.
+    # A key may have several variants (response shapes of the same resource); forget drops them all.
+    # forget also starts a new generation of the key: flights started before it are neither joined
+    # nor cached once they land, so a read after a write never gets the pre-write result.
+    def __init__(self, cache_seconds: float = 0.0):
+        self._cache_seconds = cache_seconds
+        self._in_flight: dict[tuple, dict[Hashable, asyncio.Future]] = {}
+        # (route, key) -> [generation, running flights]; only kept while flights of the key run
+        self._generations: dict[tuple, list[int]] = {}
+        self._cache: dict[tuple, dict[Hashable, tuple[float, Any]]] = {}
+        self._stats: defaultdict[str, FlightStats] = defaultdict(FlightStats)
+
+    async def do(
+        self, route: str, key: Hashable, execute: Callable[[], Awaitable[Any]],
+        variant: Hashable = None, cache_seconds: Optional[float] = None,
+    ) -> Any:
+        stats = self._stats[route]
+        stats.requests += 1
+        resource = (route, key)
+        cached = self._cache.get(resource, {}).get(variant)
+        if cached is not None and cached[0] > time.monotonic():
+            stats.cache_hits += 1
+            return cached[1]
+        future = self._in_flight.get(resource, {}).get(variant)
+        if future is not None:
+            stats.coalesced += 1
+            return await asyncio.shield(future)
+
+        stats.executions += 1
+        future = asyncio.ensure_future(execute())
+        self._in_flight.setdefault(resource, {})[variant] = future
+        generation = self._generations.setdefault(resource, [0, 0])
+        generation[1] += 1
+        ttl = self._cache_seconds if cache_seconds is None else cache_seconds
+        future.add_done_callback(partial(self._landed, resource, variant, generation[0], ttl))
+        return await asyncio.shield(future)
+
+    def _landed(self, resource: tuple, variant: Hashable, started_in: int, ttl: float, future: asyncio.Future):
+        generation = self._generations[resource]
+        generation[1] -= 1
+        if generation[1] == 0:
+            del self._generations[resource]
+        if started_in != generation[0]:
+            # Forgotten while running: its flight entry is already gone and the result is stale
+            return
+        variants = self._in_flight[resource]
+        variants.pop(variant, None)
+        if not variants:
+            del self._in_flight[resource]
+        if future.cancelled() or future.exception() is not None or ttl <= 0:
+            return
+        if len(self._cache) >= CACHE_SWEEP_THRESHOLD:
+            now = time.monotonic()
+            for cached_key, cached_variants in list(self._cache.items()):
+                if all(expires <= now for expires, _ in cached_variants.values()):
+                    del self._cache[cached_key]
+        self._cache.setdefault(resource, {})[variant] = (time.monotonic() + ttl, future.result())
+
+    def forget(self, route: str, key: Hashable):
+        # After a write on this worker: drop the micro-cached results (every variant) and the
+        # running flights, whose results may predate the write
+        resource = (route, key)
+        self._cache.pop(resource, None)
+        self._in_flight.pop(resource, None)
+        if resource in self._generations:
+            self._generations[resource][0] += 1
+
+    def stats(self) -> dict:
+        return {route: stats.as_dict() for route, stats in sorted(self._stats.items())}
+
+single_flight = SingleFlight(settings.SINGLE_FLIGHT_CACHE_SECONDS)
@@ -0,0 +1,168 @@
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+from sqlmodel import select, func
+from models.task import Task, TaskStatus
+from models.archive import TaskArchive
+from models.user import User
+from src.config import settings
+from functools import partial
+from src.database import DEFAULT_SHARD, get_shard, shards
+from .scheduler import LeaderElectedJob
+from .service import status_is
+from .partitions import month_start, next_month, create_month_partitions
+from .structure import TaskGet, TaskSummary, UserShort
+
+PARTITION_NAME = re.compile(r"^taskarchive_y(\d{4})m(\d{2})$")
+
+async def ensure_partitions(session, cutoff: datetime):
+    # One partition per month from the oldest archivable completion up to the cutoff
+    oldest = (await session.execute(
+        select(func.min(Task.completed_at)).where(status_is(TaskStatus.completed))
+    )).scalar()
+    if oldest is None or oldest >= cutoff:
+        return
+    await create_month_partitions(session, "taskarchive", oldest, cutoff)
+
+async def archive_completed_tasks(cutoff: datetime, batch_size: int, shard: str = DEFAULT_SHARD) -> int:
+    # Moves one batch in a single statement: the task rows, their assignee and dependency links
+    # are deleted from the hot tables and re-inserted as one archive row per task. Parents are
+    # only moved once none of their subtasks are left in `task`.
+    # Links to tasks that stay live are not lost: the archive row keeps them in its arrays and the
+    # live side reads them back from there (see loaders.py). Links to tasks archived earlier only
+    # exist in those tasks' arrays by now, so they are folded in from the archive as well.
+    async with get_shard(shard).sessionmaker() as session:
+        moved = (await session.execute(text("""
+            WITH batch AS (
+                SELECT t.id FROM task t
+                WHERE t.status = 'completed' AND t.completed_at < :cutoff
+                  AND NOT EXISTS (SELECT 1 FROM task c WHERE c.parent_task_id = t.id)
+                  -- Leave projects alone while they are being copied to another shard
+                  AND EXISTS (SELECT 1 FROM project p WHERE p.id = t.project_id AND p.status = 'active')
+                ORDER BY t.completed_at
+                LIMIT :batch_size
+                FOR UPDATE SKIP LOCKED
+            ),
+            assignees AS (
+                DELETE FROM taskassignee a USING batch b WHERE a.task_id = b.id
+                RETURNING a.task_id, a.user_id
+            ),
+            dependencies AS (
+                DELETE FROM taskdependency d USING batch b
+                WHERE d.task_id = b.id OR d.depends_on_task_id = b.id
+                RETURNING d.task_id, d.depends_on_task_id
+            ),
+            moved AS (
+                DELETE FROM task t USING batch b WHERE t.id = b.id
+                RETURNING t.id, t.title, t.description, t.status, t.priority, t.due_date, t.created_at,
+                          t.updated_at, t.completed_at, t.overdue_at, t.version, t.created_by, t.project_id,
+                          t.parent_task_id
+            )
+            INSERT INTO taskarchive (
+                id, title, description, status, priority, due_date, created_at, updated_at, completed_at,
+                overdue_at, version, created_by, project_id, parent_task_id, assignee_ids, depends_on_ids,
+                blocked_by_ids, archived_at
+            )
+            SELECT m.id, m.title, m.description, m.status, m.priority, m.due_date, m.created_at, m.updated_at,
+                   m.completed_at, m.overdue_at, m.version, m.created_by, m.project_id, m.parent_task_id,
+                   coalesce((SELECT array_agg(a.user_id) FROM assignees a WHERE a.task_id = m.id), '{}'),
+                   ARRAY(
+                       SELECT d.depends_on_task_id FROM dependencies d WHERE d.task_id = m.id
+                       UNION SELECT a.id FROM taskarchive a WHERE a.blocked_by_ids @> ARRAY[m.id]
+                   ),
+                   ARRAY(
+                       SELECT d.task_id FROM dependencies d WHERE d.depends_on_task_id = m.id
+                       UNION SELECT a.id FROM taskarchive a WHERE a.depends_on_ids @> ARRAY[m.id]
+                   ),
+                   now()
+            FROM moved m
+            RETURNING id
+        """), {"cutoff": cutoff, "batch_size": batch_size})).scalars().all()
+        await session.commit()
+    return len(moved)
+
+async def drop_expired_partitions(now: datetime, shard: str = DEFAULT_SHARD) -> list[str]:
+    if settings.ARCHIVE_RETENTION_MONTHS <= 0:
+        return []
+    keep_from = month_start(now)
+    for _ in range(settings.ARCHIVE_RETENTION_MONTHS):
+        keep_from = month_start(keep_from - timedelta(days=1))
+    dropped = []
+    async with get_shard(shard).sessionmaker() as session:
+        partitions = (await session.execute(text("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = 'taskarchive'
+        """))).scalars().all()
+        for name in partitions:
+            match = PARTITION_NAME.match(name)
+            if not match:
+                continue
+            month = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+            if next_month(month) <= keep_from:
+                # Retention is a metadata operation, no row-by-row DELETE and no vacuum debt
+                await session.execute(text(f"DROP TABLE IF EXISTS {name}"))
+                dropped.append(name)
+        await session.commit()
+    return dropped
+
+async def run_archive(shard: str = DEFAULT_SHARD):
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.ARCHIVE_COMPLETED_AFTER_DAYS)
+    async with get_shard(shard).sessionmaker() as session:
+        await ensure_partitions(session, cutoff)
+        await session.commit()
+    while await archive_completed_tasks(cutoff, settings.ARCHIVE_BATCH_SIZE, shard) == settings.ARCHIVE_BATCH_SIZE:
+        pass
+    await drop_expired_partitions(now, shard)
+
+async def get_archived_tasks_details(session, task_ids, project_id) -> dict:
+    # Read path for the detail endpoints once tasks have left the hot table; the caller checks access.
+    # A fixed number of queries however many ids are asked for.
+    archived_tasks = (await session.execute(
+        select(TaskArchive).where(TaskArchive.id.in_(task_ids), TaskArchive.project_id == project_id)
+    )).scalars().all()
+    if not archived_tasks:
+        return {}
+
+    linked_ids = {i for archived in archived_tasks for i in (*archived.depends_on_ids, *archived.blocked_by_ids)}
+    summaries = {}
+    if linked_ids:
+        for model in (Task, TaskArchive):
+            rows = (await session.execute(
+                select(model.id, model.title, model.status, model.priority, model.due_date).where(model.id.in_(linked_ids))
+            )).all()
+            summaries.update({row.id: TaskSummary.model_validate(row, from_attributes=True) for row in rows})
+    subtasks = defaultdict(list)
+    for row in (await session.execute(
+        select(TaskArchive.parent_task_id, TaskArchive.id, TaskArchive.title, TaskArchive.status, TaskArchive.priority, TaskArchive.due_date)
+        .where(TaskArchive.parent_task_id.in_([archived.id for archived in archived_tasks]))
+    )).all():
+        subtasks[row.parent_task_id].append(TaskSummary.model_validate(row, from_attributes=True))
+    assignee_ids = {i for archived in archived_tasks for i in archived.assignee_ids}
+    users = {}
+    if assignee_ids:
+        users = {
+            user.id: UserShort.model_validate(user, from_attributes=True)
+            for user in (await session.execute(select(User).where(User.id.in_(assignee_ids)))).scalars().all()
+        }
+
+    details = {}
+    for archived in archived_tasks:
+        task_data = TaskGet(**archived.model_dump())
+        task_data.subtasks = subtasks[archived.id]
+        task_data.dependencies = [summaries[i] for i in archived.depends_on_ids if i in summaries]
+        task_data.blocked_by = [summaries[i] for i in archived.blocked_by_ids if i in summaries]
+        task_data.assignees = [users[i] for i in archived.assignee_ids if i in users]
+        details[archived.id] = task_data
+    return details
+
+task_archivers = {
+    name: LeaderElectedJob(
+        f"Task archiver ({name})", settings.ARCHIVE_INTERVAL_SECONDS,
+        partial(run_archive, name), shard=name,
+    )
+    for name in shards
+}
@@ -0,0 +1,112 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Optional, Union
+from uuid import UUID
+from fastapi import HTTPException
+from pydantic import BaseModel
+from models.task import Task
+from src.database import get_shard
+from .archive import get_archived_tasks_details
+from .loaders import TaskLoaders
+from .structure import TASK_DETAIL_FIELDS, TASK_DETAIL_INCLUDES, task_detail_model
+
+# Loaded whatever the client asked for: the access check and the ETag need them
+REQUIRED_FIELDS = ("id", "created_by", "version")
+
+@dataclass
+class TaskDetails:
+    # Shared between concurrent readers: the response is serialized once, the access check is per caller
+    created_by: Optional[UUID]
+    version: int
+    item: BaseModel
+    assignee_ids: set = field(default_factory=set)
+
+    def visible_to(self, user_id) -> bool:
+        return self.created_by == user_id or user_id in self.assignee_ids
+
+    @cached_property
+    def body(self) -> str:
+        return self.item.model_dump_json()
+
+def parse_fieldset(
+    fields: Union[str, list[str], None], include: Union[str, list[str], None],
+) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    # Comma-separated (query string) or lists (JSON body). No parameters keep the full response;
+    # `fields` alone leaves the relationships out. Names are returned in declaration order so
+    # equal requests share a model and a flight.
+    def names(value, allowed: tuple[str, ...], parameter: str) -> set:
+        if isinstance(value, str):
+            value = value.split(",")
+        requested = {name.strip() for name in value if name.strip()}
+        unknown = requested - set(allowed)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown {parameter}: {', '.join(sorted(unknown))}")
+        return requested
+
+    selected = names(fields, TASK_DETAIL_FIELDS, "fields") | {"id"} if fields is not None else set(TASK_DETAIL_FIELDS)
+    if include is not None:
+        included = names(include, TASK_DETAIL_INCLUDES, "include")
+    else:
+        included = set() if fields is not None else set(TASK_DETAIL_INCLUDES)
+    return (
+        tuple(name for name in TASK_DETAIL_FIELDS if name in selected),
+        tuple(name for name in TASK_DETAIL_INCLUDES if name in included),
+    )
+
+async def load_tasks_details(
+    session, project_id: UUID, task_ids: list[UUID],
+    fields: tuple[str, ...] = TASK_DETAIL_FIELDS, include: tuple[str, ...] = TASK_DETAIL_INCLUDES,
+    user_id: Optional[UUID] = None,
+) -> tuple[dict[UUID, TaskDetails], list[UUID]]:
+    # One query for the tasks' columns (with their assignee ids), one per requested relationship and,
+    # only when some ids are not in the hot table, a fixed few for the archive: the query count does
+    # not grow with the number of ids. With a user_id, tasks they cannot see come back in the second
+    # list and their relationships are not loaded.
+    columns = [getattr(Task, name) for name in TASK_DETAIL_FIELDS if name in fields or name in REQUIRED_FIELDS]
+    loaders = TaskLoaders(session, project_id, columns)
+    model = task_detail_model(fields, include)
+    details, forbidden = {}, []
+
+    rows = dict(zip(task_ids, await loaders.tasks.load_many(task_ids)))
+    visible = []
+    for task_id, row in rows.items():
+        if row is None:
+            continue
+        if user_id is not None and row["created_by"] != user_id and user_id not in row["assignee_ids"]:
+            forbidden.append(task_id)
+        else:
+            visible.append(task_id)
+    related = {relationship: await getattr(loaders, relationship).load_many(visible) for relationship in include}
+    for index, task_id in enumerate(visible):
+        row = rows[task_id]
+        details[task_id] = TaskDetails(
+            created_by=row["created_by"],
+            version=row["version"],
+            item=model.model_validate({**row, **{relationship: related[relationship][index] for relationship in include}}),
+            assignee_ids=row["assignee_ids"],
+        )
+
+    # Completed tasks may have been moved to the archive, which is read in full
+    missing = [task_id for task_id, row in rows.items() if row is None]
+    if missing:
+        for task_id, archived in (await get_archived_tasks_details(session, missing, project_id)).items():
+            task_details = TaskDetails(
+                created_by=archived.created_by,
+                version=archived.version,
+                item=model.model_validate(archived.model_dump()),
+                assignee_ids={user.id for user in archived.assignees},
+            )
+            if user_id is not None and not task_details.visible_to(user_id):
+                forbidden.append(task_id)
+            else:
+                details[task_id] = task_details
+    return details, forbidden
+
+async def load_task_details(
+    shard: str, project_id: UUID, task_id: UUID,
+    fields: tuple[str, ...] = TASK_DETAIL_FIELDS, include: tuple[str, ...] = TASK_DETAIL_INCLUDES,
+) -> Optional[TaskDetails]:
+    # Runs on its own session and leaves the access check to each caller, see single_flight
+    async with get_shard(shard).sessionmaker() as session:
+        details, _ = await load_tasks_details(session, project_id, [task_id], fields, include)
+    return details.get(task_id)
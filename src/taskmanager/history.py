@@ -0,0 +1,192 @@
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import text
+from sqlmodel import select
+from models.archive import TaskArchive
+from models.history import TaskHistory, TaskHistoryType
+from models.task import Task, TaskAssignee
+from src.config import settings
+from src.database import DEFAULT_SHARD, get_shard
+from .partitions import month_start, next_month, create_month_partitions
+
+# Task columns kept in history records; everything else is bookkeeping (updated_at, overdue_at, ...)
+HISTORY_FIELDS = (
+    "title", "description", "status", "priority", "due_date", "parent_task_id",
+    "created_by", "project_id", "completed_at",
+)
+LINK_FIELDS = ("assignee_ids", "depends_on_ids", "blocked_by_ids")
+# The same dependency row seen from the other task
+MIRRORED_LINKS = {"depends_on_ids": "blocked_by_ids", "blocked_by_ids": "depends_on_ids"}
+# Tasks that got deltas in this session, checked by record_due_snapshots
+HISTORY_TASKS = "history_task_ids"
+
+# A full snapshot for every given task with :every or more deltas (updated and linked alike)
+# since its last snapshot, in the same shape as the migration's baseline snapshots
+RECORD_DUE_SNAPSHOTS = text("""
+    INSERT INTO taskhistory (changed_at, task_id, project_id, change_type, version, changed_by, changes, state)
+    SELECT :changed_at, t.id, t.project_id, 'snapshot', t.version, :changed_by, '{}', jsonb_build_object(
+        'title', t.title, 'description', t.description, 'status', t.status, 'priority', t.priority,
+        'due_date', t.due_date, 'parent_task_id', t.parent_task_id, 'created_by', t.created_by,
+        'project_id', t.project_id, 'completed_at', t.completed_at, 'version', t.version,
+        'assignee_ids', coalesce((SELECT jsonb_agg(a.user_id) FROM taskassignee a WHERE a.task_id = t.id), '[]'),
+        'depends_on_ids', coalesce((SELECT jsonb_agg(d.depends_on_task_id) FROM taskdependency d WHERE d.task_id = t.id), '[]'),
+        'blocked_by_ids', coalesce((SELECT jsonb_agg(d.task_id) FROM taskdependency d WHERE d.depends_on_task_id = t.id), '[]')
+    )
+    FROM task t
+    CROSS JOIN LATERAL (
+        SELECT s.id, s.changed_at FROM taskhistory s
+        WHERE s.task_id = t.id AND s.state IS NOT NULL
+        ORDER BY s.id DESC LIMIT 1
+    ) last
+    WHERE t.id = ANY(CAST(:task_ids AS uuid[]))
+      AND (
+          SELECT count(*) FROM taskhistory h
+          WHERE h.task_id = t.id AND h.id > last.id AND h.changed_at >= last.changed_at
+      ) >= :every
+""")
+
+def initial_state(task) -> dict:
+    state = {field: getattr(task, field) for field in HISTORY_FIELDS}
+    state.update({field: [] for field in LINK_FIELDS})
+    state["version"] = task.version or 1
+    return jsonable_encoder(state)
+
+def record_task_history(session, task, change_type: TaskHistoryType, changes=None, changed_by=None, state=None):
+    # Added to the caller's session: the unit of work writes every record of the request
+    # (all tasks of a bulk update) in one multi-row INSERT at flush
+    entry = TaskHistory(
+        task_id=task.id,
+        project_id=task.project_id,
+        change_type=change_type.value,
+        version=task.version,
+        changed_by=changed_by,
+        changes=jsonable_encoder(changes or {}),
+        state=state,
+    )
+    session.add(entry)
+    if state is None:
+        session.info.setdefault(HISTORY_TASKS, set()).add(task.id)
+    return entry
+
+def record_linked_history(session, task, changes, changed_by=None):
+    # Dependency changes also change the linked tasks' blocked_by/depends_on lists
+    mirrored = defaultdict(lambda: defaultdict(lambda: {"added": [], "removed": []}))
+    for field, other_field in MIRRORED_LINKS.items():
+        for operation in ("added", "removed"):
+            for other_id in (changes.get(field) or {}).get(operation, []):
+                mirrored[other_id][other_field][operation].append(task.id)
+    session.add_all([
+        TaskHistory(
+            task_id=other_id,
+            project_id=task.project_id,
+            change_type=TaskHistoryType.linked.value,
+            changed_by=changed_by,
+            changes=jsonable_encoder(diff),
+        )
+        for other_id, diff in mirrored.items()
+    ])
+    session.info.setdefault(HISTORY_TASKS, set()).update(mirrored)
+
+async def record_task_update_history(session, task, changes, changed_by=None):
+    history_changes = dict(changes)
+    if "status" in changes and task.completed_at is not None:
+        history_changes["completed_at"] = task.completed_at
+    record_task_history(session, task, TaskHistoryType.updated, history_changes, changed_by)
+    record_linked_history(session, task, changes, changed_by)
+
+async def record_due_snapshots(session, changed_by=None):
+    # Called once per write request before its commit: bounds the deltas replayed by task_as_of.
+    # Counting records rather than versions also covers tasks that only ever gain linked deltas,
+    # which do not bump their version.
+    task_ids = session.info.pop(HISTORY_TASKS, None)
+    if not task_ids:
+        return
+    await session.flush()
+    await session.execute(RECORD_DUE_SNAPSHOTS, {
+        "task_ids": list(task_ids), "every": settings.TASK_HISTORY_SNAPSHOT_EVERY,
+        "changed_at": datetime.now(timezone.utc), "changed_by": changed_by,
+    })
+
+def apply_changes(state: dict, changes: dict):
+    for field, value in changes.items():
+        if field in LINK_FIELDS and isinstance(value, dict):
+            removed = set(value.get("removed", []))
+            linked = [linked_id for linked_id in state.get(field, []) if linked_id not in removed]
+            linked += [linked_id for linked_id in value.get("added", []) if linked_id not in linked]
+            state[field] = linked
+        elif field in HISTORY_FIELDS:
+            state[field] = value
+
+async def task_as_of(session, task_id, project_id, at: datetime) -> Optional[dict]:
+    # Nearest snapshot at or before `at`, then the deltas after it (about TASK_HISTORY_SNAPSHOT_EVERY at most).
+    # Both queries are bounded by changed_at so only the partitions in that window are read.
+    snapshot = (await session.execute(
+        select(TaskHistory)
+        .where(
+            TaskHistory.task_id == task_id,
+            TaskHistory.project_id == project_id,
+            TaskHistory.state.is_not(None),
+            TaskHistory.changed_at <= at,
+        )
+        .order_by(TaskHistory.id.desc())
+        .limit(1)
+    )).scalars().first()
+    if snapshot is None:
+        return None
+    deltas = (await session.execute(
+        select(TaskHistory)
+        .where(
+            TaskHistory.task_id == task_id,
+            TaskHistory.id > snapshot.id,
+            TaskHistory.state.is_(None),
+            TaskHistory.changed_at >= snapshot.changed_at,
+            TaskHistory.changed_at <= at,
+        )
+        .order_by(TaskHistory.id)
+    )).scalars().all()
+    state = dict(snapshot.state)
+    for record in deltas:
+        if record.change_type == TaskHistoryType.deleted.value:
+            return None
+        apply_changes(state, record.changes)
+        if record.version is not None:
+            state["version"] = record.version
+    return {"id": task_id, **state}
+
+async def history_visible(session, task_id, project_id, user_id):
+    # Same creator-or-assignee rule as the detail endpoint, falling back to the archive and,
+    # for deleted tasks, to the last recorded state. None when the task is unknown.
+    task = await session.get(Task, task_id)
+    if task is not None and task.project_id == project_id:
+        if task.created_by == user_id:
+            return True
+        return (await session.execute(
+            select(TaskAssignee.task_id).where(TaskAssignee.task_id == task_id, TaskAssignee.user_id == user_id)
+        )).first() is not None
+    archived = (await session.execute(
+        select(TaskArchive.created_by, TaskArchive.assignee_ids)
+        .where(TaskArchive.id == task_id, TaskArchive.project_id == project_id)
+    )).first()
+    if archived is not None:
+        return archived.created_by == user_id or user_id in archived.assignee_ids
+    last_state = await task_as_of(session, task_id, project_id, datetime.now(timezone.utc))
+    if last_state is None:
+        last_snapshot = (await session.execute(
+            select(TaskHistory.state)
+            .where(TaskHistory.task_id == task_id, TaskHistory.project_id == project_id, TaskHistory.state.is_not(None))
+            .order_by(TaskHistory.id.desc())
+            .limit(1)
+        )).scalar()
+        if last_snapshot is None:
+            return None
+        last_state = last_snapshot
+    return str(user_id) in (last_state.get("created_by"), *last_state.get("assignee_ids", []))
+
+async def ensure_history_partitions(shard: str = DEFAULT_SHARD):
+    # This month and the next one always exist, so new records never land in the default partition
+    now = datetime.now(timezone.utc)
+    async with get_shard(shard).sessionmaker() as session:
+        await create_month_partitions(session, "taskhistory", month_start(now), next_month(month_start(now)))
+        await session.commit()
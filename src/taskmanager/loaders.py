@@ -0,0 +1,107 @@
+from collections import defaultdict
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable, Iterable
+from uuid import UUID
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import array, array_agg
+from sqlmodel import select, func
+from models.archive import TaskArchive
+from models.task import Task, TaskAssignee, TaskDependency
+from models.user import User
+
+SUMMARY_COLUMNS = (Task.id, Task.title, Task.status, Task.priority, Task.due_date)
+ARCHIVED_SUMMARY_COLUMNS = (TaskArchive.id, TaskArchive.title, TaskArchive.status, TaskArchive.priority, TaskArchive.due_date)
+
+class BatchLoader:
+    # Loads the values for a set of keys with one query (fetch) and remembers them for the rest of
+    # the request, so callers can ask for whatever keys they need without one query per key.
+    # Keys the query did not return get default_factory().
+    def __init__(
+        self, session, fetch: Callable[[Any, list], Awaitable[dict]], default_factory: Callable[[], Any] = lambda: None,
+    ):
+        self._session = session
+        self._fetch = fetch
+        self._default_factory = default_factory
+        self._loaded: dict[Hashable, Any] = {}
+
+    async def load_many(self, keys: Iterable[Hashable]) -> list:
+        keys = list(keys)
+        missing = list(dict.fromkeys(key for key in keys if key not in self._loaded))
+        if missing:
+            found = await self._fetch(self._session, missing)
+            for key in missing:
+                self._loaded[key] = found[key] if key in found else self._default_factory()
+        return [self._loaded[key] for key in keys]
+
+    async def load(self, key: Hashable) -> Any:
+        return (await self.load_many([key]))[0]
+
+def group_by_owner(rows) -> dict:
+    # Rows carry the id they belong to as `owner_id`; the grouping happens here, not in SQL
+    groups = defaultdict(list)
+    for row in rows:
+        row = dict(row)
+        groups[row.pop("owner_id")].append(row)
+    return groups
+
+async def fetch_tasks(session, task_ids: list[UUID], project_id: UUID, columns) -> dict:
+    # The task columns plus the assignee ids, which every visibility check needs
+    assignee_ids = select(array_agg(TaskAssignee.user_id)).where(TaskAssignee.task_id == Task.id).scalar_subquery()
+    rows = (await session.execute(
+        select(*columns, assignee_ids.label("assignee_ids"))
+        .where(Task.id.in_(task_ids), Task.project_id == project_id)
+    )).mappings().all()
+    return {row["id"]: {**row, "assignee_ids": set(row["assignee_ids"] or ())} for row in rows}
+
+def archived_links(link_ids, task_ids: list[UUID]):
+    # Archived tasks whose link array (depends_on_ids / blocked_by_ids) names one of task_ids,
+    # one row per (named task, archived task)
+    linked = (
+        select(func.unnest(link_ids, type_=sa.Uuid).label("owner_id"), *ARCHIVED_SUMMARY_COLUMNS)
+        .where(link_ids.overlap(array(task_ids, type_=sa.Uuid)))
+        .subquery()
+    )
+    return select(linked).where(linked.c.owner_id.in_(task_ids))
+
+# Links of live tasks include the archived tasks on the other side, each read in the same query
+
+async def fetch_subtasks(session, task_ids: list[UUID]) -> dict:
+    return group_by_owner((await session.execute(
+        select(Task.parent_task_id.label("owner_id"), *SUMMARY_COLUMNS).where(Task.parent_task_id.in_(task_ids))
+        .union_all(
+            select(TaskArchive.parent_task_id.label("owner_id"), *ARCHIVED_SUMMARY_COLUMNS)
+            .where(TaskArchive.parent_task_id.in_(task_ids))
+        )
+    )).mappings().all())
+
+async def fetch_dependencies(session, task_ids: list[UUID]) -> dict:
+    return group_by_owner((await session.execute(
+        select(TaskDependency.task_id.label("owner_id"), *SUMMARY_COLUMNS)
+        .join(TaskDependency, Task.id == TaskDependency.depends_on_task_id)
+        .where(TaskDependency.task_id.in_(task_ids))
+        .union_all(archived_links(TaskArchive.blocked_by_ids, task_ids))
+    )).mappings().all())
+
+async def fetch_blocked_by(session, task_ids: list[UUID]) -> dict:
+    return group_by_owner((await session.execute(
+        select(TaskDependency.depends_on_task_id.label("owner_id"), *SUMMARY_COLUMNS)
+        .join(TaskDependency, Task.id == TaskDependency.task_id)
+        .where(TaskDependency.depends_on_task_id.in_(task_ids))
+        .union_all(archived_links(TaskArchive.depends_on_ids, task_ids))
+    )).mappings().all())
+
+async def fetch_assignees(session, task_ids: list[UUID]) -> dict:
+    return group_by_owner((await session.execute(
+        select(TaskAssignee.task_id.label("owner_id"), User.id, User.full_name, User.email)
+        .join(TaskAssignee, User.id == TaskAssignee.user_id)
+        .where(TaskAssignee.task_id.in_(task_ids))
+    )).mappings().all())
+
+class TaskLoaders:
+    # One loader per task relationship, named like the detail response's include options
+    def __init__(self, session, project_id: UUID, columns):
+        self.tasks = BatchLoader(session, partial(fetch_tasks, project_id=project_id, columns=columns))
+        self.subtasks = BatchLoader(session, fetch_subtasks, list)
+        self.dependencies = BatchLoader(session, fetch_dependencies, list)
+        self.blocked_by = BatchLoader(session, fetch_blocked_by, list)
+        self.assignees = BatchLoader(session, fetch_assignees, list)
@@ -0,0 +1,22 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import text
+
+def month_start(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def next_month(value: datetime) -> datetime:
+    return (value + timedelta(days=32)).replace(day=1)
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+async def create_month_partitions(session, table: str, oldest: datetime, newest: datetime):
+    # Monthly range partitions of `table` covering oldest..newest
+    month = month_start(oldest)
+    while month <= newest:
+        upper = next_month(month)
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(table, month)} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        ))
+        month = upper
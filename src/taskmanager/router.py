@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Header, Response
 from sqlmodel import select, delete, func
-from src.database import get_db_session
+from sqlalchemy import exists
+from src.projects.service import get_project_session, project_id_of, ensure_users_on_shard
+from src.database import get_shard
+from src.singleflight import single_flight
 from models.task import Task, TaskAssignee, TaskDependency, TaskStatus
-from .structure import TaskCreate, TaskGet, TaskCreateResponse, TaskSummary, UserShort, TaskUpdate, BulkTaskUpdate
+from models.archive import TaskArchive
+from .structure import TaskCreate, TaskGet, TaskCreateResponse, TaskUpdate, BulkTaskUpdate, TaskSearchResponse, TaskSearchResult, TaskInboxResponse, TaskInboxItem, TaskClaimRequest, TaskHistoryEntry, TaskHistoryResponse, TaskAsOf, TaskTimeSeriesResponse, TaskBatchGetRequest, TaskBatchGetResponse, task_batch_model
 from models.role import RoleList
 from models.user import User
 from uuid import UUID
 from src.utils.checkaccessservice import check_access
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timezone
-from .service import update_task_object
+from datetime import date, datetime, timedelta, timezone
+from .details import load_task_details, load_tasks_details, parse_fieldset
+from src.config import settings
+from .service import update_task_object, open_task_clause, search_tasks, inbox_tasks, claim_next_task, ensure_same_project, encode_cursor, decode_cursor
+from .stats import task_time_series, ALL_USERS
+from .history import (
+    record_task_history, record_linked_history, record_due_snapshots, initial_state, task_as_of, history_visible,
+)
+from src.events.service import record_task_event
+from models.event import TaskEventType
+from models.history import TaskHistory, TaskHistoryType
 
 router = APIRouter(tags=["Tasks"])
 
@@ -18,9 +31,12 @@ router = APIRouter(tags=["Tasks"])
 async def create_task(
     task_in: TaskCreate,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_project_session),
 ):
-    # Create a new task linked to the logged-in user
+    # Create a new task linked to the logged-in user, in the project the session is bound to
+    if task_in.parent_task_id is not None:
+        await ensure_same_project(session, [task_in.parent_task_id])
+    await ensure_users_on_shard(session, [request.user.id])
     task = Task(
         title=task_in.title,
         description=task_in.description,
@@ -28,82 +44,197 @@ async def create_task(
         priority=task_in.priority,
         due_date=task_in.due_date,
         parent_task_id=task_in.parent_task_id,
-        created_by=request.user.id
+        created_by=request.user.id,
+        project_id=project_id_of(session),
+        completed_at=datetime.now(timezone.utc) if task_in.status == TaskStatus.completed else None,
     )
     session.add(task)
+    await record_task_event(
+        session, task, TaskEventType.created,
+        changes=task_in.model_dump(exclude_unset=True), assignee_ids=[],
+    )
+    record_task_history(
+        session, task, TaskHistoryType.created,
+        changes=task_in.model_dump(exclude_unset=True), changed_by=request.user.id, state=initial_state(task),
+    )
     await session.commit()
     await session.refresh(task)
     return task
 
-@router.get("/{task_id}", response_model=TaskGet)
+@router.post("/claim", response_model=TaskCreateResponse, responses={204: {"description": "No claimable task"}})
+@check_access(RoleList.TASK_EDIT.value)
+async def claim_task(
+    request: Request,
+    filters: TaskClaimRequest | None = None,
+    session: AsyncSession = Depends(get_project_session),
+):
+    task = await claim_next_task(session, request.user.id, filters)
+    if task is None:
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    await record_due_snapshots(session, request.user.id)
+    await session.commit()
+    return TaskCreateResponse.model_validate(task, from_attributes=True)
+
+# Declared before "/{task_id}" so "search" and "me" are not parsed as task ids
+@router.get("/search", response_model=TaskSearchResponse)
+@check_access(RoleList.TASK_VIEW.value)
+async def search_task(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_project_session),
+):
+    rows, next_cursor = await search_tasks(session, request.user.id, q, limit, cursor)
+    return TaskSearchResponse(
+        items=[TaskSearchResult.model_validate(dict(row)) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+@router.get("/me", response_model=TaskInboxResponse)
+@check_access(RoleList.TASK_VIEW.value)
+async def my_tasks(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_project_session),
+):
+    # Open tasks the caller created or is assigned to, highest priority and earliest due date first
+    rows, next_cursor = await inbox_tasks(session, request.user.id, limit, cursor)
+    return TaskInboxResponse(
+        items=[TaskInboxItem.model_validate(dict(row)) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+# The detail and batch-get bodies are serialized from the per-shape models (task_detail_model),
+# not through response_model: the documented schema is the full shape, of which ?fields= and
+# ?include= return a subset
+@router.post("/batch-get", responses={200: {
+    "model": TaskBatchGetResponse,
+    "description": "The requested tasks; items only carry the members selected with `fields` / `include`",
+}})
+@check_access(RoleList.TASK_VIEW.value)
+async def batch_get_tasks(
+    batch: TaskBatchGetRequest,
+    request: Request,
+    session: AsyncSession = Depends(get_project_session),
+):
+    # Same shape options as the detail endpoint; the query count does not depend on the number of ids
+    task_ids = list(dict.fromkeys(batch.ids))
+    if len(task_ids) > settings.TASK_BATCH_GET_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.TASK_BATCH_GET_MAX_IDS} ids per request")
+    fields, include = parse_fieldset(batch.fields, batch.include)
+    details, forbidden = await load_tasks_details(
+        session, project_id_of(session), task_ids, fields, include, user_id=request.user.id,
+    )
+    result = task_batch_model(fields, include)(
+        items=[details[task_id].item for task_id in task_ids if task_id in details],
+        not_found=[task_id for task_id in task_ids if task_id not in details and task_id not in forbidden],
+        forbidden=forbidden,
+    )
+    return Response(content=result.model_dump_json(), media_type="application/json")
+
+@router.get("/{task_id}", responses={200: {
+    "model": TaskGet,
+    "description": "The task; only the members selected with `fields` / `include` are present",
+    "headers": {"ETag": {"description": "The task version", "schema": {"type": "string"}}},
+}})
 @check_access(RoleList.TASK_VIEW.value)
 async def get_task_details(
     task_id: UUID,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    fields: str | None = Query(None, description="Comma-separated task fields to return, e.g. title,status"),
+    include: str | None = Query(None, description="Comma-separated relationships: subtasks, dependencies, blocked_by, assignees"),
+    session: AsyncSession = Depends(get_project_session),
 ):
-    task = await session.get(Task, task_id)
-    if not task:
+    # Identical concurrent reads of a task (same project and shape) run the queries once
+    fields, include = parse_fieldset(fields, include)
+    project_id = project_id_of(session)
+    details = await single_flight.do(
+        "task.detail", (project_id, task_id),
+        lambda: load_task_details(session.info["shard"], project_id, task_id, fields, include),
+        variant=(fields, include),
+    )
+    if details is None:
         raise HTTPException(status_code=404, detail="Task not found")
 
     # Checking for authorization
-    if task.created_by != request.user.id:
-        assigned = (await session.execute(
-            select(TaskAssignee).where(
-                (TaskAssignee.task_id == task.id) &
-                (TaskAssignee.user_id == request.user.id)
-            )
-        )).scalars().first()
-        if not assigned:
-            raise HTTPException(status_code=403, detail="Not authorized to view this task")
+    if not details.visible_to(request.user.id):
+        raise HTTPException(status_code=403, detail="Not authorized to view this task")
+    return Response(content=details.body, media_type="application/json", headers={"ETag": f'"{details.version}"'})
 
-    # Getting all subtasks related to the task
-    subtasks = (await session.execute(select(Task).where(Task.parent_task_id == task.id))).scalars().all()
+@router.get("/{task_id}/history", response_model=TaskHistoryResponse)
+@check_access(RoleList.TASK_VIEW.value)
+async def get_task_history(
+    task_id: UUID,
+    request: Request,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = None,
+    session: AsyncSession = Depends(get_project_session),
+):
+    project_id = project_id_of(session)
+    visible = await history_visible(session, task_id, project_id, request.user.id)
+    if visible is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not visible:
+        raise HTTPException(status_code=403, detail="Not authorized to view this task")
 
-    # Getting all task dependencies
-    depends_on = (
-        await session.execute(
-    select(Task)
-    .join(TaskDependency, Task.id == TaskDependency.depends_on_task_id)
-    .where(TaskDependency.task_id == task.id)
-)
-    ).scalars().all()
-
-    # Getting list of tasks that this task is blocked by
-    blocked_by = (
-        await session.execute(
-    select(Task)
-    .join(TaskDependency, Task.id == TaskDependency.task_id)
-    .where(TaskDependency.depends_on_task_id == task.id)
-)
-    ).scalars().all()
-
-    # Getting list of all the assignees
-    assignees = (
-        await session.execute(
-    select(User)
-    .join(TaskAssignee, User.id == TaskAssignee.user_id)
-    .where(TaskAssignee.task_id == task.id)
-)
-    ).scalars().all()
+    # Newest first; snapshot records are an internal detail of the as-of reads
+    query = (
+        select(TaskHistory)
+        .where(
+            TaskHistory.task_id == task_id,
+            TaskHistory.project_id == project_id,
+            TaskHistory.change_type != TaskHistoryType.snapshot.value,
+        )
+        .order_by(TaskHistory.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        after = decode_cursor(cursor)
+        if not isinstance(after.get("id"), int):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(TaskHistory.id < after["id"])
+    records = (await session.execute(query)).scalars().all()
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(id=records[-1].id)
+    return TaskHistoryResponse(
+        items=[TaskHistoryEntry.model_validate(record, from_attributes=True) for record in records],
+        next_cursor=next_cursor,
+    )
 
-    # Final response
-    task_data = TaskGet(**task.__dict__)
-    task_data.subtasks = [TaskSummary.model_validate(t, from_attributes=True) for t in subtasks]
-    task_data.dependencies = [TaskSummary.model_validate(t, from_attributes=True) for t in depends_on]
-    task_data.blocked_by = [TaskSummary.model_validate(t, from_attributes=True) for t in blocked_by]
-    task_data.assignees = [UserShort.model_validate(u, from_attributes=True) for u in assignees]
-    return task_data
+@router.get("/{task_id}/history/as-of", response_model=TaskAsOf)
+@check_access(RoleList.TASK_VIEW.value)
+async def get_task_as_of(
+    task_id: UUID,
+    request: Request,
+    at: datetime = Query(..., description="Timestamp with timezone, e.g. 2026-01-31T12:00:00Z"),
+    session: AsyncSession = Depends(get_project_session),
+):
+    project_id = project_id_of(session)
+    visible = await history_visible(session, task_id, project_id, request.user.id)
+    if visible is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not visible:
+        raise HTTPException(status_code=403, detail="Not authorized to view this task")
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    state = await task_as_of(session, task_id, project_id, at)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Task did not exist at that time")
+    return TaskAsOf(**state, as_of=at)
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
 @check_access(RoleList.TASK_DELETE.value)
 async def delete_task(
     task_id: str,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_project_session),
 ):
     task = await session.get(Task, task_id)
-    if not task:
+    if not task or task.project_id != project_id_of(session):
         raise HTTPException(status_code=404, detail="Task not found")
 
     if task.created_by != request.user.id:
@@ -117,137 +248,222 @@ async def delete_task(
         if not assigned:
             raise HTTPException(status_code=403, detail="Not authorized to delete this task")
 
-    result = await session.execute(
-        select(Task).where(Task.parent_task_id == task.id)
-    )
-    subtasks = result.scalars().all()
+    # Archived subtasks still point at their parent, so they count too
+    has_subtasks = (await session.execute(
+        select(
+            exists().where(Task.parent_task_id == task.id)
+            | exists().where(TaskArchive.parent_task_id == task.id)
+        )
+    )).scalar()
 
-    if subtasks:
+    if has_subtasks:
         raise HTTPException(
             status_code=400,
             detail="Cannot delete task with existing subtasks. Please delete them first."
         )
 
+    await record_task_event(session, task, TaskEventType.deleted)
+    record_task_history(session, task, TaskHistoryType.deleted, changed_by=request.user.id)
+
     # Cleaning up dependencies & assignee links
-    await session.execute(
+    removed_links = (await session.execute(
         delete(TaskDependency).where(
             (TaskDependency.task_id == task.id)
             | (TaskDependency.depends_on_task_id == task.id)
-        )
-    )
+        ).returning(TaskDependency.task_id, TaskDependency.depends_on_task_id)
+    )).all()
+    record_linked_history(session, task, {
+        "depends_on_ids": {"removed": [dep for tid, dep in removed_links if tid == task.id]},
+        "blocked_by_ids": {"removed": [tid for tid, dep in removed_links if dep == task.id]},
+    }, changed_by=request.user.id)
     await session.execute(
         delete(TaskAssignee).where(TaskAssignee.task_id == task.id)
     )
 
+    deleted_id = task.id
     await session.delete(task)
+    await record_due_snapshots(session, request.user.id)
     await session.commit()
+    forget_task_reads(project_id_of(session), [deleted_id])
 
     return {"message": "Task deleted successfully"}
 
+def forget_task_reads(project_id: UUID, task_ids: list[UUID]):
+    # Writes served by this worker drop its micro-cached reads; other workers expire theirs
+    for task_id in task_ids:
+        single_flight.forget("task.detail", (project_id, task_id))
+    single_flight.forget("task.analytics.distribution", (project_id,))
+
+def parse_if_match(if_match: str | None) -> int | None:
+    if if_match is None or if_match.strip() == "*":
+        return None
+    if if_match.strip().startswith("W/"):
+        # If-Match uses the strong comparison (RFC 9110), which a weak tag never passes
+        raise HTTPException(status_code=412, detail="If-Match needs a strong ETag")
+    try:
+        return int(if_match.strip().strip('"'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="If-Match must be a task version ETag")
+
 @router.put("/update")
 @check_access(RoleList.TASK_EDIT.value)
 async def update_task(
     task_data: TaskUpdate | BulkTaskUpdate,
     request: Request,
-    session: AsyncSession = Depends(get_db_session),
+    response: Response,
+    if_match: str | None = Header(default=None),
+    session: AsyncSession = Depends(get_project_session),
 ):
+    expected_version = parse_if_match(if_match)
     if hasattr(task_data, "tasks"):
-        for task in task_data.tasks:
-            await update_task_object(inc_task=task, user=request.user, session=session)
+        if expected_version is not None:
+            raise HTTPException(status_code=400, detail="Use expected_version on each task for bulk updates")
+        updated_ids = [
+            (await update_task_object(inc_task=task, user=request.user, session=session)).id
+            for task in task_data.tasks
+        ]
     else:
-        await update_task_object(inc_task=task_data, user=request.user, session=session)
+        if expected_version is not None:
+            if task_data.expected_version not in (None, expected_version):
+                raise HTTPException(status_code=400, detail="If-Match and expected_version do not match")
+            task_data.expected_version = expected_version
+        task = await update_task_object(inc_task=task_data, user=request.user, session=session)
+        response.headers["ETag"] = f'"{task.version}"'
+        updated_ids = [task.id]
     
+    await record_due_snapshots(session, request.user.id)
     await session.commit()
+    forget_task_reads(project_id_of(session), updated_ids)
     return "Tasks Updated successfully"
 
+async def load_task_analytics(shard: str, project_id: UUID) -> dict:
+    # Project-wide numbers, identical for every caller in the project (see single_flight)
+    async with get_shard(shard).sessionmaker() as session:
+        now = datetime.now(timezone.utc)
+        task_dist = (await session.execute(
+            select(
+                User.id,
+                User.full_name,
+                func.count(TaskAssignee.task_id).label("assigned_tasks")
+            )
+            .join(TaskAssignee, User.id == TaskAssignee.user_id)
+            .join(Task, TaskAssignee.task_id == Task.id)
+            .where(Task.project_id == project_id)
+            .group_by(User.id)
+        )).all()
+        task_distribution = [
+            {"user_id": id, "user_name": full_name, "assigned_tasks": count}
+            for id, full_name, count in task_dist
+        ]
+
+        status_data = (await session.execute(
+            select(
+                User.id,
+                User.full_name,
+                Task.status,
+                func.count(Task.id).label("count")
+            )
+            .join(TaskAssignee, User.id == TaskAssignee.user_id)
+            .join(Task, TaskAssignee.task_id == Task.id)
+            .where(Task.project_id == project_id)
+            .group_by(User.id, Task.status)
+        )).all()
+
+        user_status_map = {}
+        for user_id, full_name, status, count in status_data:
+            if user_id not in user_status_map:
+                user_status_map[user_id] = {
+                    "user_id": user_id,
+                    "user_name": full_name,
+                    "pending": 0,
+                    "in_progress": 0,
+                    "completed": 0,
+                }
+            user_status_map[user_id][status.value] = count
+
+        overdue_result = (await session.execute(
+            select(
+                User.id,
+                User.full_name,
+                func.count(Task.id).label("overdue_tasks")
+            )
+            .join(TaskAssignee, User.id == TaskAssignee.user_id)
+            .join(Task, TaskAssignee.task_id == Task.id)
+            # Marked by the overdue scheduler (ix_task_project_overdue) rather than recomputed from due_date
+            .where(Task.project_id == project_id, Task.overdue_at.is_not(None), open_task_clause())
+            .group_by(User.id)
+        )).all()
+        overdue_data = {uid: count for uid, _, count in overdue_result}
+
+        analytics = []
+        for user_id, data in user_status_map.items():
+            analytics.append({
+                **data,
+                "overdue": overdue_data.get(user_id, 0),
+                "total_tasks": (
+                    data["pending"] + data["in_progress"] + data["completed"]
+                )
+            })
+        unassigned_tasks = (await session.execute(
+            select(Task.id, Task.title, Task.status, Task.due_date)
+            .outerjoin(TaskAssignee, Task.id == TaskAssignee.task_id)
+            .where(Task.project_id == project_id, TaskAssignee.task_id.is_(None))
+        )).all()
+        unassigned_tasks = [
+            {
+                "id": tid,
+                "title": title,
+                "status": status.value if status else None,
+                "due_date": due_date.isoformat() if due_date else None
+            }
+            for tid, title, status, due_date in unassigned_tasks
+        ]
+
+        return {
+            "generated_at": now.isoformat(),
+            "task_distribution": task_distribution,
+            "analytics_per_user": analytics,
+            "unassigned_tasks": {
+                "count": len(unassigned_tasks),
+                "tasks": unassigned_tasks,
+            },
+        }
+
 @router.get("/analytics/get-task-distribution")
 @check_access(RoleList.TASK_VIEW.value)
 async def get_task_analytics(
     request: Request, #noqa
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_project_session),
 ):
-    now = datetime.now(timezone.utc)
-    task_dist = (await session.execute(
-        select(
-            User.id,
-            User.full_name,
-            func.count(TaskAssignee.task_id).label("assigned_tasks")
-        )
-        .join(TaskAssignee, User.id == TaskAssignee.user_id)
-        .group_by(User.id)
-    )).all()
-    task_distribution = [
-        {"user_id": id, "user_name": full_name, "assigned_tasks": count}
-        for id, full_name, count in task_dist
-    ]
+    project_id = project_id_of(session)
+    return await single_flight.do(
+        "task.analytics.distribution", (project_id,),
+        lambda: load_task_analytics(session.info["shard"], project_id),
+    )
 
-    status_data = (await session.execute(
-        select(
-            User.id,
-            User.full_name,
-            Task.status,
-            func.count(Task.id).label("count")
-        )
-        .join(TaskAssignee, User.id == TaskAssignee.user_id)
-        .join(Task, TaskAssignee.task_id == Task.id)
-        .group_by(User.id, Task.status)
-    )).all()
+# Longest range served by the time-series endpoint (about ten years of daily rows)
+MAX_TIME_SERIES_DAYS = 3660
 
-    user_status_map = {}
-    for user_id, full_name, status, count in status_data:
-        if user_id not in user_status_map:
-            user_status_map[user_id] = {
-                "user_id": user_id,
-                "user_name": full_name,
-                "pending": 0,
-                "in_progress": 0,
-                "completed": 0,
-            }
-        user_status_map[user_id][status.value] = count
-
-    overdue_result = (await session.execute(
-        select(
-            User.id,
-            User.full_name,
-            func.count(Task.id).label("overdue_tasks")
-        )
-        .join(TaskAssignee, User.id == TaskAssignee.user_id)
-        .join(Task, TaskAssignee.task_id == Task.id)
-        .where(Task.due_date < now.date(), Task.status != TaskStatus.completed)
-        .group_by(User.id)
-    )).all()
-    overdue_data = {uid: count for uid, _, count in overdue_result}
-
-    analytics = []
-    for user_id, data in user_status_map.items():
-        analytics.append({
-            **data,
-            "overdue": overdue_data.get(user_id, 0),
-            "total_tasks": (
-                data["pending"] + data["in_progress"] + data["completed"]
-            )
-        })
-    unassigned_tasks = (await session.execute(
-        select(Task.id, Task.title, Task.status, Task.due_date)
-        .outerjoin(TaskAssignee, Task.id == TaskAssignee.task_id)
-        .where(TaskAssignee.task_id.is_(None))
-    )).all()
-    unassigned_tasks = [
-        {
-            "id": tid,
-            "title": title,
-            "status": status.value if status else None,
-            "due_date": due_date.isoformat() if due_date else None
-        }
-        for tid, title, status, due_date in unassigned_tasks
-    ]
-
-    return {
-        "generated_at": now.isoformat(),
-        "task_distribution": task_distribution,
-        "analytics_per_user": analytics,
-        "unassigned_tasks": {
-            "count": len(unassigned_tasks),
-            "tasks": unassigned_tasks,
-        },
-    }
\ No newline at end of file
+@router.get("/analytics/time-series", response_model=TaskTimeSeriesResponse)
+@check_access(RoleList.TASK_VIEW.value)
+async def get_task_time_series(
+    request: Request, #noqa
+    start: date | None = None,
+    end: date | None = None,
+    user_id: UUID | None = None,
+    session: AsyncSession = Depends(get_project_session),
+):
+    # Burndown (open), cumulative flow (cumulative_created / cumulative_completed / status counts)
+    # and throughput (completed per day), read from the daily aggregates instead of the task table
+    end = end or datetime.now(timezone.utc).date()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_TIME_SERIES_DAYS:
+        raise HTTPException(status_code=400, detail=f"Ranges are limited to {MAX_TIME_SERIES_DAYS} days")
+    # Another user's numbers are for admins; everyone else sees the project and themselves
+    if user_id is not None and user_id != request.user.id and not request.get("role_mask", 0) & RoleList.ADMIN.bit:
+        raise HTTPException(status_code=403, detail="Not authorized to view another user's statistics")
+    project_id = project_id_of(session)
+    points = await task_time_series(session, project_id, start, end, user_id or ALL_USERS)
+    return TaskTimeSeriesResponse(project_id=project_id, user_id=user_id, start=start, end=end, points=points)
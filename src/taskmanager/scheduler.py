@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from functools import partial
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import update
+from sqlmodel import select
+from models.task import Task
+from models.event import TaskEventType
+from src.config import settings
+from src.database import DEFAULT_SHARD, connect_dedicated, get_shard, shards
+from src.events.service import record_task_events
+from .service import open_task_clause
+from .history import ensure_history_partitions
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock, held on each shard by the worker
+# that runs that shard's background jobs
+SHARD_LEADER_LOCK_KEY = 7_340_038
+
+async def mark_overdue_tasks(batch_size: int, shard: str = DEFAULT_SHARD) -> int:
+    # Marks the next batch of tasks that crossed their due date and emits one event per task,
+    # both in the same transaction. Only rows not yet marked are scanned (ix_task_unmarked_overdue).
+    now = datetime.now(timezone.utc)
+    async with get_shard(shard).sessionmaker() as session:
+        newly_overdue = (await session.execute(
+            update(Task)
+            .where(Task.id.in_(
+                select(Task.id)
+                .where(open_task_clause(), Task.due_date < now.date(), Task.overdue_at.is_(None))
+                .order_by(Task.due_date)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            ))
+            # Marking a task overdue is not a user edit, keep updated_at as is
+            .values(overdue_at=now, updated_at=Task.updated_at)
+            .returning(Task.id, Task.project_id, Task.parent_task_id, Task.created_by, Task.due_date)
+            .execution_options(synchronize_session=False)
+        )).all()
+        await record_task_events(
+            session, newly_overdue, TaskEventType.overdue,
+            changes_by_task={row.id: {"overdue": True, "due_date": row.due_date} for row in newly_overdue},
+        )
+        await session.commit()
+    return len(newly_overdue)
+
+async def mark_all_overdue_tasks(shard: str = DEFAULT_SHARD):
+    batch_size = settings.OVERDUE_SCHEDULER_BATCH_SIZE
+    while await mark_overdue_tasks(batch_size, shard) == batch_size:
+        pass
+
+class ShardLeader:
+    # One election per shard and worker, shared by all of the shard's jobs: a session-level advisory
+    # lock on a single dedicated connection, so a worker holds one connection per shard outside the
+    # pool however many jobs there are. If the leader dies, its connection drops, the lock is
+    # released and another worker takes over on its next tick.
+    def __init__(self, shard: str):
+        self.shard = shard
+        self._conn = None
+        self._is_leader = False
+        self._jobs = 0
+        # The jobs tick independently; the connection serves one of them at a time
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_leader(self) -> bool:
+        return self._is_leader
+
+    def attach(self):
+        self._jobs += 1
+
+    async def detach(self):
+        # The last job to stop gives up the connection, and with it the lock
+        self._jobs -= 1
+        if self._jobs == 0:
+            async with self._lock:
+                await self._close()
+
+    async def elect(self) -> bool:
+        async with self._lock:
+            if self._conn is None or self._conn.is_closed():
+                self._is_leader = False
+                self._conn = await connect_dedicated(self.shard)
+            if not self._is_leader:
+                try:
+                    self._is_leader = await self._conn.fetchval("SELECT pg_try_advisory_lock($1)", SHARD_LEADER_LOCK_KEY)
+                except Exception:
+                    await self._close()
+                    raise
+            return self._is_leader
+
+    async def _close(self):
+        if self._conn is not None and not self._conn.is_closed():
+            await self._conn.close()
+        self._conn = None
+        self._is_leader = False
+
+shard_leaders = {name: ShardLeader(name) for name in shards}
+
+class LeaderElectedJob:
+    # Periodic in-app job that runs on exactly one worker at a time: the leader of its shard
+    # (advisory locks are per database)
+    def __init__(self, name: str, interval_seconds: float, tick, shard: str = DEFAULT_SHARD):
+        self.name = name
+        self.shard = shard
+        self._leader = shard_leaders[shard]
+        self._interval_seconds = interval_seconds
+        self._tick = tick
+        self._runner: Optional[asyncio.Task] = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_leader
+
+    async def start(self):
+        self._leader.attach()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._runner:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+            await self._leader.detach()
+
+    async def _run(self):
+        while True:
+            try:
+                if await self._leader.elect():
+                    await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A lost lock connection is reopened by the next election
+                logger.exception("%s job tick failed, retrying", self.name)
+            await asyncio.sleep(self._interval_seconds)
+
+overdue_schedulers = {
+    name: LeaderElectedJob(
+        f"Overdue scheduler ({name})", settings.OVERDUE_SCHEDULER_INTERVAL_SECONDS,
+        partial(mark_all_overdue_tasks, name), shard=name,
+    )
+    for name in shards
+}
+
+history_partitioners = {
+    name: LeaderElectedJob(
+        f"Task history partitions ({name})", settings.TASK_HISTORY_PARTITION_INTERVAL_SECONDS,
+        partial(ensure_history_partitions, name), shard=name,
+    )
+    for name in shards
+}
@@ -1,10 +1,313 @@
+import base64
+import json
+from uuid import UUID
+from datetime import date, datetime, timezone
 from fastapi import HTTPException
-from models.task import Task, TaskAssignee, TaskStatus, TaskDependency
-from sqlmodel import select, delete
+from models.task import Task, TaskAssignee, TaskStatus, TaskPriority, TaskDependency, task_search_vector, TASK_SEARCH_CONFIG
+from sqlmodel import select, delete, func, or_, and_, tuple_
+from sqlalchemy import literal, exists, cast, update, union, Float
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.postgresql import REGCONFIG, insert
+from sqlalchemy.orm import aliased
+from src.events.service import record_task_event
+from .history import record_task_update_history
+from models.event import TaskEventType
+from src.projects.service import project_id_of, ensure_users_on_shard
+
+def open_task_clause(status_column=Task.status):
+    # Rendered inline (not as a bind param) so the planner can match the partial `status <> 'completed'` indexes
+    return status_column != literal(TaskStatus.completed.value, literal_execute=True)
+
+def status_is(task_status: TaskStatus):
+    # Inline literal for the same reason as open_task_clause
+    return Task.status == literal(task_status.value, literal_execute=True)
+
+def visible_to(user_id):
+    # SQL form of the creator-or-assignee rule used by the task endpoints
+    return or_(
+        Task.created_by == user_id,
+        exists().where(TaskAssignee.task_id == Task.id, TaskAssignee.user_id == user_id),
+    )
+
+def encode_cursor(**values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def search_tasks(session, user_id, q: str, limit: int, cursor: str | None = None):
+    project_id = project_id_of(session)
+    config = cast(TASK_SEARCH_CONFIG, REGCONFIG)
+    tsquery = func.websearch_to_tsquery(config, q)
+    # Full-text rank on title/description plus trigram similarity so typos and prefixes still score
+    rank = (func.ts_rank_cd(task_search_vector, tsquery) + func.similarity(Task.title, q)).cast(Float)
+    matches = (
+        select(
+            Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+            rank.label("rank"),
+        )
+        .where(
+            Task.project_id == project_id,
+            or_(
+                task_search_vector.op("@@")(tsquery),
+                Task.title.op("%")(q),
+                Task.title.istartswith(q, autoescape=True),
+            ),
+            visible_to(user_id),
+        )
+        .subquery()
+    )
+    page = select(matches).order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(limit + 1)
+    if cursor:
+        after = decode_cursor(cursor)
+        try:
+            after_rank, after_id = float(after["rank"]), UUID(after["id"])
+        except (KeyError, ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Keyset pagination on (rank, id), both descending
+        page = page.where(tuple_(matches.c.rank, matches.c.id) < tuple_(after_rank, after_id))
+    page = page.subquery()
+
+    # Highlights are only computed for the rows that are actually returned
+    rows = (await session.execute(
+        select(
+            page,
+            func.ts_headline(config, page.c.title, tsquery, "HighlightAll=true").label("title_highlight"),
+            func.ts_headline(
+                config, page.c.description, tsquery, "MaxFragments=2,MaxWords=20,MinWords=5"
+            ).label("description_highlight"),
+        ).order_by(page.c.rank.desc(), page.c.id.desc())
+    )).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rank=rows[-1]["rank"], id=str(rows[-1]["id"]))
+    return rows, next_cursor
+
+def inbox_after(priority, due_date, task_id, after: dict):
+    # Keyset predicate for ORDER BY priority DESC, due_date ASC NULLS LAST, id ASC. Row comparison
+    # cannot express the mixed directions and NULLS LAST, so it is spelled out; the leading
+    # `priority <= p` keeps it a range condition on the index.
+    try:
+        after_priority = TaskPriority(after["priority"])
+        after_due = date.fromisoformat(after["due_date"]) if after["due_date"] is not None else None
+        after_id = UUID(after["id"])
+    except (KeyError, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if after_due is None:
+        later_due = and_(due_date.is_(None), task_id > after_id)
+    else:
+        later_due = or_(
+            due_date > after_due, due_date.is_(None), and_(due_date == after_due, task_id > after_id),
+        )
+    return and_(
+        priority <= after_priority,
+        or_(priority < after_priority, and_(priority == after_priority, later_due)),
+    )
+
+async def inbox_tasks(session, user_id, limit: int, cursor: str | None = None):
+    # "My work": open tasks the user created or is assigned to, in one priority / due date order.
+    # Each side is a single range scan of its partial index (ix_task_creator_inbox,
+    # ix_taskassignee_inbox) stopped after limit + 1 rows; only the merged page is joined to task.
+    project_id = project_id_of(session)
+    after = decode_cursor(cursor) if cursor else None
+
+    def side(task_id, priority, due_date, status, owner_clause):
+        page = (
+            select(task_id.label("id"), priority.label("priority"), due_date.label("due_date"))
+            .where(owner_clause, open_task_clause(status))
+            .order_by(priority.desc(), due_date.asc().nulls_last(), task_id)
+            .limit(limit + 1)
+        )
+        if after is not None:
+            page = page.where(inbox_after(priority, due_date, task_id, after))
+        return page
+
+    created = side(
+        Task.id, Task.priority, Task.due_date, Task.status,
+        and_(Task.created_by == user_id, Task.project_id == project_id),
+    )
+    assigned = side(
+        TaskAssignee.task_id, TaskAssignee.priority, TaskAssignee.due_date, TaskAssignee.status,
+        and_(TaskAssignee.user_id == user_id, TaskAssignee.project_id == project_id),
+    )
+    # UNION drops tasks the user both created and is assigned to
+    merged = union(created.subquery().select(), assigned.subquery().select()).subquery()
+    page = (
+        select(merged.c.id)
+        .order_by(merged.c.priority.desc(), merged.c.due_date.asc().nulls_last(), merged.c.id)
+        .limit(limit + 1)
+        .subquery()
+    )
+    rows = (await session.execute(
+        select(
+            Task.id, Task.title, Task.status, Task.priority, Task.due_date,
+            Task.created_by, Task.parent_task_id, Task.updated_at,
+        )
+        .join(page, page.c.id == Task.id)
+        .order_by(Task.priority.desc(), Task.due_date.asc().nulls_last(), Task.id)
+    )).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            priority=last["priority"].value,
+            due_date=last["due_date"].isoformat() if last["due_date"] is not None else None,
+            id=str(last["id"]),
+        )
+    return rows, next_cursor
+
+async def claim_next_task(session, user_id, filters=None):
+    # Work-queue claim in a single statement: pick the best pending task whose dependencies are
+    # all completed, lock it with SKIP LOCKED so concurrent claimers never wait on each other,
+    # move it to in_progress and assign it to the caller.
+    await ensure_users_on_shard(session, [user_id])
+    dependency = aliased(Task)
+    candidate = (
+        select(Task.id)
+        .where(
+            Task.project_id == project_id_of(session),
+            status_is(TaskStatus.pending),
+            ~exists()
+            .where(TaskDependency.task_id == Task.id)
+            .where(dependency.id == TaskDependency.depends_on_task_id, dependency.status != TaskStatus.completed),
+            # Unassigned work, or work already assigned to the caller
+            or_(
+                ~exists().where(TaskAssignee.task_id == Task.id),
+                exists().where(TaskAssignee.task_id == Task.id, TaskAssignee.user_id == user_id),
+            ),
+        )
+        .order_by(Task.priority.desc(), Task.due_date.asc().nulls_last(), Task.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    if filters is not None:
+        if filters.parent_task_id is not None:
+            candidate = candidate.where(Task.parent_task_id == filters.parent_task_id)
+        if filters.created_by is not None:
+            candidate = candidate.where(Task.created_by == filters.created_by)
+        if filters.min_priority is not None:
+            candidate = candidate.where(Task.priority >= filters.min_priority.value)
+        if filters.due_before is not None:
+            candidate = candidate.where(Task.due_date < filters.due_before)
+    candidate = candidate.cte("candidate")
+
+    claimed = (
+        update(Task)
+        .where(Task.id == candidate.c.id)
+        .values(status=TaskStatus.in_progress, version=Task.version + 1)
+        .returning(
+            Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+            Task.created_by, Task.created_at, Task.updated_at, Task.completed_at, Task.project_id,
+            Task.parent_task_id, Task.version,
+        )
+        .cte("claimed")
+    )
+    assigned = (
+        insert(TaskAssignee)
+        .from_select(["task_id", "user_id", "is_owner"], select(claimed.c.id, literal(user_id), literal(False)))
+        .on_conflict_do_nothing()
+        .cte("assigned")
+    )
+    task = (await session.execute(select(claimed).add_cte(assigned))).first()
+    if task is None:
+        return None
+    await record_task_event(
+        session, task, TaskEventType.updated,
+        changes={"status": TaskStatus.in_progress, "claimed_by": user_id},
+    )
+    await record_task_update_history(
+        session, task, {"status": TaskStatus.in_progress, "assignee_ids": {"added": [user_id], "removed": []}}, user_id,
+    )
+    return task
+
+async def bump_task_version(session, task, expected_version, changed=True):
+    # Optimistic concurrency: compare-and-swap on task.version instead of SELECT ... FOR UPDATE.
+    # Without an explicit expected version the version read by this request is used, so a
+    # concurrent writer between our read and this write is still detected.
+    expected = expected_version if expected_version is not None else task.version
+    if not changed:
+        if expected != task.version:
+            raise version_conflict(task.id, task.version)
+        return task.version
+    new_version = (await session.execute(
+        update(Task)
+        .where(Task.id == task.id, Task.version == expected)
+        .values(version=Task.version + 1)
+        .returning(Task.version)
+        .execution_options(synchronize_session=False)
+    )).scalar()
+    if new_version is None:
+        current = (await session.execute(select(Task.version).where(Task.id == task.id))).scalar()
+        raise version_conflict(task.id, current)
+    set_committed_value(task, "version", new_version)
+    return new_version
+
+def version_conflict(task_id, current_version):
+    return HTTPException(
+        status_code=409,
+        detail={
+            "message": "Task was modified by another request. Reload it and retry.",
+            "task_id": str(task_id),
+            "current_version": current_version,
+        },
+    )
+
+async def ensure_same_project(session, task_ids):
+    # Links may only point at tasks of the project being edited
+    task_ids = set(task_ids)
+    if not task_ids:
+        return
+    found = (await session.execute(
+        select(func.count()).select_from(Task).where(Task.id.in_(task_ids), Task.project_id == project_id_of(session))
+    )).scalar()
+    if found != len(task_ids):
+        raise HTTPException(status_code=400, detail="Linked tasks must exist in the same project")
+
+# Link lists on TaskUpdate -> (column holding the edited task, column holding the linked id)
+TASK_LINKS = {
+    "assignee_ids": (TaskAssignee.task_id, TaskAssignee.user_id),
+    "depends_on_ids": (TaskDependency.task_id, TaskDependency.depends_on_task_id),
+    "blocked_by_ids": (TaskDependency.depends_on_task_id, TaskDependency.task_id),
+}
+
+async def link_diff(session, owner_column, other_column, task_id, replace=None, add=None, remove=None):
+    # A full list is turned into the same add/remove sets as the patch operations,
+    # so links that stay untouched are neither deleted nor re-inserted
+    if replace is None:
+        return set(add or ()), set(remove or ())
+    current = set((await session.execute(select(other_column).where(owner_column == task_id))).scalars().all())
+    wanted = set(replace)
+    return wanted - current, current - wanted
+
+async def apply_link_diff(session, owner_column, other_column, task_id, add, remove):
+    # One set-based statement per direction; RETURNING reports only the rows that really changed
+    table = owner_column.table
+    removed, added = [], []
+    if remove:
+        removed = (await session.execute(
+            delete(table)
+            .where(tuple_(owner_column, other_column).in_([(task_id, other_id) for other_id in remove]))
+            .returning(other_column)
+        )).scalars().all()
+    if add:
+        added = (await session.execute(
+            insert(table)
+            .values([{owner_column.name: task_id, other_column.name: other_id} for other_id in add])
+            .on_conflict_do_nothing()
+            .returning(other_column)
+        )).scalars().all()
+    return sorted(added, key=str), sorted(removed, key=str)
 
 async def update_task_object(inc_task, user, session):
     task = await session.get(Task, inc_task.id)
-    if not task:
+    if not task or task.project_id != project_id_of(session):
         raise HTTPException(status_code=404, detail="Task not found")
     if task.created_by != user.id:
         assigned = (await session.execute(
@@ -15,29 +318,34 @@ async def update_task_object(inc_task, user, session):
             raise HTTPException(status_code=403, detail="Not authorized to modify this task")
     if task.status == TaskStatus.completed:
         raise HTTPException(status_code=400, detail="Cannot update a completed task")
+    changes = {}
     for field, value in inc_task.model_dump(exclude_unset=True).items():
-        if hasattr(task, field) and field not in ("assignee_ids", "depends_on_ids", "blocked_by_ids", "id"):
+        if hasattr(task, field) and field != "id" and field not in TASK_LINKS:
+            if getattr(task, field) != value:
+                changes[field] = value
             setattr(task, field, value)
-    if inc_task.assignee_ids is not None:
-        # Remove existing links
-        await session.execute(delete(TaskAssignee).where(TaskAssignee.task_id == task.id))
-        # Add new ones
-        new_assignees = [TaskAssignee(task_id=task.id, user_id=uid) for uid in inc_task.assignee_ids]
-        session.add_all(new_assignees)
-    if inc_task.depends_on_ids is not None:
-        await session.execute(delete(TaskDependency).where(TaskDependency.task_id == task.id))
-        new_dependencies = [
-            TaskDependency(task_id=task.id, depends_on_task_id=dep_id)
-            for dep_id in inc_task.depends_on_ids
-        ]
-        session.add_all(new_dependencies)
-    if inc_task.blocked_by_ids is not None:
-        await session.execute(delete(TaskDependency).where(TaskDependency.depends_on_task_id == task.id))
-        new_blocked = [
-            TaskDependency(task_id=blk_id, depends_on_task_id=task.id)
-            for blk_id in inc_task.blocked_by_ids
-        ]
-        session.add_all(new_blocked)
+            if field == "status" and value == TaskStatus.completed and field in changes:
+                task.completed_at = datetime.now(timezone.utc)
+            if field == "due_date" and field in changes:
+                # Let the scheduler re-evaluate the task against its new due date
+                task.overdue_at = None
+    if inc_task.parent_task_id is not None:
+        await ensure_same_project(session, [inc_task.parent_task_id])
+    for field, (owner_column, other_column) in TASK_LINKS.items():
+        add, remove = await link_diff(
+            session, owner_column, other_column, task.id,
+            replace=getattr(inc_task, field),
+            add=getattr(inc_task, f"add_{field}"),
+            remove=getattr(inc_task, f"remove_{field}"),
+        )
+        if field == "assignee_ids":
+            await ensure_users_on_shard(session, add)
+        else:
+            await ensure_same_project(session, add)
+        added, removed = await apply_link_diff(session, owner_column, other_column, task.id, add, remove)
+        if added or removed:
+            changes[field] = {"added": added, "removed": removed}
+    await bump_task_version(session, task, inc_task.expected_version, changed=bool(changes))
     if inc_task.status == TaskStatus.completed:
         subtasks = (await session.execute(select(Task).where(Task.parent_task_id == task.id))).scalars().all()
         incomplete_subs = [t for t in subtasks if t.status != TaskStatus.completed]
@@ -54,4 +362,7 @@ async def update_task_object(inc_task, user, session):
                 status_code=400,
                 detail="Cannot mark this task as completed while subtasks or blocking tasks are incomplete."
             )
-    return True
\ No newline at end of file
+    if changes:
+        await record_task_event(session, task, TaskEventType.updated, changes=changes, assignee_ids=inc_task.assignee_ids)
+        await record_task_update_history(session, task, changes, user.id)
+    return task
\ No newline at end of file
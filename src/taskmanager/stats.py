@@ -0,0 +1,139 @@
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from uuid import UUID
+from sqlalchemy import text
+from sqlmodel import select, func
+from models.stats import TaskDailyStat, ALL_USERS
+from src.config import settings
+from src.database import DEFAULT_SHARD, get_shard, shards
+from .scheduler import LeaderElectedJob
+
+# End-of-day stock of open work for every active project on the shard. Projects without open
+# tasks still get their total row, so a missing per-user row on a snapshotted day means zero.
+# Per-user rows follow current assignments; the total counts each task once. Overdue work is
+# read from the scheduler's overdue_at marks, like the analytics endpoint.
+SNAPSHOT_STOCK = text("""
+    INSERT INTO taskdailystat (project_id, day, user_id, pending, in_progress, overdue, created, completed, became_overdue)
+    SELECT p.id, CAST(:day AS date),
+           CASE WHEN GROUPING(a.user_id) = 1 THEN CAST(:all_users AS uuid) ELSE a.user_id END,
+           count(DISTINCT t.id) FILTER (WHERE t.status = 'pending'),
+           count(DISTINCT t.id) FILTER (WHERE t.status = 'in_progress'),
+           count(DISTINCT t.id) FILTER (WHERE t.overdue_at IS NOT NULL),
+           0, 0, 0
+    FROM project p
+    LEFT JOIN task t ON t.project_id = p.id AND t.status <> 'completed'
+    LEFT JOIN taskassignee a ON a.task_id = t.id
+    WHERE p.shard = :shard AND p.status = 'active'
+    GROUP BY GROUPING SETS ((p.id, a.user_id), (p.id))
+    HAVING GROUPING(a.user_id) = 1 OR a.user_id IS NOT NULL
+    ON CONFLICT (project_id, day, user_id) DO UPDATE
+    SET pending = excluded.pending, in_progress = excluded.in_progress, overdue = excluded.overdue
+""")
+
+# Today's per-user stock is rebuilt on every run: users whose last open task closed since the
+# previous run must not keep their old counts
+RESET_STOCK = text("""
+    UPDATE taskdailystat SET pending = NULL, in_progress = NULL, overdue = NULL
+    WHERE day = CAST(:day AS date) AND user_id <> CAST(:all_users AS uuid)
+""")
+
+# Flows since :start are rebuilt on every run, like today's stock: groups that lost their
+# transitions since the previous run (unassigned, deleted or archived tasks) must drop to zero
+RESET_FLOWS = text("""
+    UPDATE taskdailystat SET created = 0, completed = 0, became_overdue = 0
+    WHERE day >= CAST(:start AS date) AND (created <> 0 OR completed <> 0 OR became_overdue <> 0)
+""")
+
+# Created / completed / became-overdue counts per day since :start, from the task timestamps.
+# Stock stays NULL on rows only written here (days before the first snapshot). Tasks only reach
+# the archive 90+ days after completion, so recent flows never need it.
+RECORD_FLOWS = text("""
+    WITH transitions AS (
+        SELECT id, project_id, (created_at AT TIME ZONE 'UTC')::date AS day, 'created' AS kind
+        FROM task WHERE created_at >= :start
+        UNION ALL
+        SELECT id, project_id, (completed_at AT TIME ZONE 'UTC')::date, 'completed'
+        FROM task WHERE status = 'completed' AND completed_at >= :start
+        UNION ALL
+        SELECT id, project_id, (overdue_at AT TIME ZONE 'UTC')::date, 'overdue'
+        FROM task WHERE overdue_at IS NOT NULL AND overdue_at >= :start
+    )
+    INSERT INTO taskdailystat (project_id, day, user_id, pending, in_progress, overdue, created, completed, became_overdue)
+    SELECT tr.project_id, tr.day,
+           CASE WHEN GROUPING(a.user_id) = 1 THEN CAST(:all_users AS uuid) ELSE a.user_id END,
+           NULL, NULL, NULL,
+           count(DISTINCT tr.id) FILTER (WHERE tr.kind = 'created'),
+           count(DISTINCT tr.id) FILTER (WHERE tr.kind = 'completed'),
+           count(DISTINCT tr.id) FILTER (WHERE tr.kind = 'overdue')
+    FROM transitions tr
+    LEFT JOIN taskassignee a ON a.task_id = tr.id
+    GROUP BY GROUPING SETS ((tr.project_id, tr.day, a.user_id), (tr.project_id, tr.day))
+    HAVING GROUPING(a.user_id) = 1 OR a.user_id IS NOT NULL
+    ON CONFLICT (project_id, day, user_id) DO UPDATE
+    SET created = excluded.created, completed = excluded.completed, became_overdue = excluded.became_overdue
+""")
+
+async def aggregate_task_stats(shard: str = DEFAULT_SHARD):
+    # Incremental: flows are recomputed from the last aggregated day onwards (that day may have
+    # gained transitions after the previous run), stock is snapshotted for today only.
+    today = datetime.now(timezone.utc).date()
+    async with get_shard(shard).sessionmaker() as session:
+        last_day = (await session.execute(select(func.max(TaskDailyStat.day)))).scalar()
+        start_day = last_day if last_day is not None else today - timedelta(days=settings.TASK_STATS_BACKFILL_DAYS)
+        start = datetime.combine(min(start_day, today), datetime.min.time(), tzinfo=timezone.utc)
+        await session.execute(RESET_FLOWS, {"start": start.date()})
+        await session.execute(RECORD_FLOWS, {"start": start, "all_users": ALL_USERS})
+        await session.execute(RESET_STOCK, {"day": today, "all_users": ALL_USERS})
+        await session.execute(SNAPSHOT_STOCK, {"day": today, "shard": shard, "all_users": ALL_USERS})
+        await session.commit()
+
+async def task_time_series(session, project_id: UUID, start: date, end: date, user_id: UUID = ALL_USERS) -> list[dict]:
+    # One row per day from the pre-aggregated table (two rows per day for a single user: theirs
+    # and the project total, which tells whether the day was snapshotted). Days without a snapshot
+    # carry the previous stock forward; cumulative flows start at zero on `start`.
+    rows = (await session.execute(
+        select(TaskDailyStat).where(
+            TaskDailyStat.project_id == project_id,
+            TaskDailyStat.user_id.in_({user_id, ALL_USERS}),
+            TaskDailyStat.day >= start,
+            TaskDailyStat.day <= end,
+        )
+    )).scalars().all()
+    snapshotted = {row.day for row in rows if row.user_id == ALL_USERS and row.pending is not None}
+    by_day = {row.day: row for row in rows if row.user_id == user_id}
+
+    series = []
+    stock = {"pending": 0, "in_progress": 0, "overdue": 0}
+    cumulative_created = cumulative_completed = 0
+    day = start
+    while day <= end:
+        row = by_day.get(day)
+        if row is not None and row.pending is not None:
+            stock = {"pending": row.pending, "in_progress": row.in_progress, "overdue": row.overdue}
+        elif day in snapshotted:
+            # Snapshotted day without stock for this user: nothing open for them
+            stock = {"pending": 0, "in_progress": 0, "overdue": 0}
+        created = row.created if row else 0
+        completed = row.completed if row else 0
+        cumulative_created += created
+        cumulative_completed += completed
+        series.append({
+            "day": day,
+            **stock,
+            "open": stock["pending"] + stock["in_progress"],
+            "created": created,
+            "completed": completed,
+            "became_overdue": row.became_overdue if row else 0,
+            "cumulative_created": cumulative_created,
+            "cumulative_completed": cumulative_completed,
+        })
+        day += timedelta(days=1)
+    return series
+
+task_stats_aggregators = {
+    name: LeaderElectedJob(
+        f"Task stats aggregator ({name})", settings.TASK_STATS_INTERVAL_SECONDS,
+        partial(aggregate_task_stats, name), shard=name,
+    )
+    for name in shards
+}
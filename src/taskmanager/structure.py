@@ -1,6 +1,7 @@
 from datetime import date, datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from functools import lru_cache
+from pydantic import BaseModel, Field, model_validator, create_model
 from typing import Optional, List
 from uuid import UUID
 
@@ -61,7 +62,9 @@ class TaskCreateResponse(BaseModel):
     created_by: Optional[UUID]
     created_at: datetime
     updated_at: datetime
+    project_id: Optional[UUID] = None
     parent_task_id: Optional[UUID]
+    version: int
 
     class Config:
         orm_mode = True
@@ -86,7 +89,9 @@ class TaskGet(BaseModel):
     created_by: Optional[UUID]
     created_at: datetime
     updated_at: datetime
+    project_id: Optional[UUID] = None
     parent_task_id: Optional[UUID]
+    version: int
     subtasks: Optional[List[TaskSummary]] = []
     dependencies: Optional[List[TaskSummary]] = Field(default_factory=list)
     blocked_by: Optional[List[TaskSummary]] = Field(default_factory=list)
@@ -96,6 +101,40 @@ class TaskGet(BaseModel):
         orm_mode = True
         from_attributes = True
 
+# Scalar fields and relationships a client can pick with ?fields= and ?include= on the detail endpoint
+TASK_DETAIL_FIELDS = (
+    "id", "title", "description", "status", "priority", "due_date", "created_by",
+    "created_at", "updated_at", "project_id", "parent_task_id", "version",
+)
+TASK_DETAIL_INCLUDES = ("subtasks", "dependencies", "blocked_by", "assignees")
+
+@lru_cache(maxsize=256)
+def task_detail_model(fields: tuple[str, ...], include: tuple[str, ...]) -> type[BaseModel]:
+    # Response model for one shape of the detail response, built from TaskGet's fields once and reused
+    return create_model(
+        "TaskGet",
+        **{name: (TaskGet.model_fields[name].annotation, TaskGet.model_fields[name]) for name in fields + include},
+    )
+
+@lru_cache(maxsize=256)
+def task_batch_model(fields: tuple[str, ...], include: tuple[str, ...]) -> type[BaseModel]:
+    return create_model(
+        "TaskBatchGetResponse",
+        items=(List[task_detail_model(fields, include)], ...),
+        not_found=(List[UUID], ...),
+        forbidden=(List[UUID], ...),
+    )
+
+class TaskBatchGetRequest(BaseModel):
+    ids: List[UUID] = Field(..., min_length=1)
+    fields: Optional[List[str]] = None
+    include: Optional[List[str]] = None
+
+class TaskBatchGetResponse(BaseModel):
+    items: List[TaskGet] = Field(default_factory=list)
+    not_found: List[UUID] = Field(default_factory=list)
+    forbidden: List[UUID] = Field(default_factory=list)
+
 class TaskUpdate(BaseModel):
     id: UUID
     title: Optional[str] = None
@@ -104,9 +143,34 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     due_date: Optional[date] = None
     parent_task_id: Optional[UUID] = None
+    # Full replacement lists; only the difference to the stored links is written
     assignee_ids: Optional[List[UUID]] = None
     depends_on_ids: Optional[List[UUID]] = None
     blocked_by_ids: Optional[List[UUID]] = None
+    # Patch operations, an alternative to sending the full list
+    add_assignee_ids: Optional[List[UUID]] = None
+    remove_assignee_ids: Optional[List[UUID]] = None
+    add_depends_on_ids: Optional[List[UUID]] = None
+    remove_depends_on_ids: Optional[List[UUID]] = None
+    add_blocked_by_ids: Optional[List[UUID]] = None
+    remove_blocked_by_ids: Optional[List[UUID]] = None
+    expected_version: Optional[int] = Field(None, description="Reject the update with 409 if the task version differs")
+
+    @model_validator(mode="after")
+    def check_link_operations(self):
+        for field in ("assignee_ids", "depends_on_ids", "blocked_by_ids"):
+            add, remove = getattr(self, f"add_{field}"), getattr(self, f"remove_{field}")
+            if getattr(self, field) is not None and (add or remove):
+                raise ValueError(f"Send either {field} or add_{field}/remove_{field}, not both")
+            if set(add or ()) & set(remove or ()):
+                raise ValueError(f"The same id cannot be in both add_{field} and remove_{field}")
+        return self
+
+class TaskClaimRequest(BaseModel):
+    parent_task_id: Optional[UUID] = None
+    created_by: Optional[UUID] = None
+    min_priority: Optional[TaskPriority] = None
+    due_before: Optional[date] = None
 
 class BulkTaskUpdate(BaseModel):
     tasks: List[TaskUpdate] = []
@@ -121,4 +185,73 @@ class TaskUpdateResponse(BaseModel):
     
     class config:
         orm_mode = True
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class TaskSearchResult(TaskSummary):
+    rank: float
+    title_highlight: str
+    description_highlight: Optional[str] = None
+
+class TaskSearchResponse(BaseModel):
+    items: List[TaskSearchResult] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+class TaskInboxItem(TaskSummary):
+    created_by: Optional[UUID]
+    parent_task_id: Optional[UUID]
+    updated_at: datetime
+
+class TaskInboxResponse(BaseModel):
+    items: List[TaskInboxItem] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+class TaskHistoryEntry(BaseModel):
+    id: int
+    change_type: str
+    version: Optional[int] = None
+    changed_by: Optional[UUID] = None
+    changed_at: datetime
+    changes: dict = Field(default_factory=dict)
+
+    class Config:
+        from_attributes = True
+
+class TaskHistoryResponse(BaseModel):
+    items: List[TaskHistoryEntry] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+class TaskAsOf(BaseModel):
+    id: UUID
+    as_of: datetime
+    title: str
+    description: Optional[str] = None
+    status: TaskStatus
+    priority: TaskPriority
+    due_date: Optional[date] = None
+    parent_task_id: Optional[UUID] = None
+    created_by: Optional[UUID] = None
+    project_id: Optional[UUID] = None
+    completed_at: Optional[datetime] = None
+    version: Optional[int] = None
+    assignee_ids: List[UUID] = Field(default_factory=list)
+    depends_on_ids: List[UUID] = Field(default_factory=list)
+    blocked_by_ids: List[UUID] = Field(default_factory=list)
+
+class TaskStatsPoint(BaseModel):
+    day: date
+    pending: int
+    in_progress: int
+    open: int
+    overdue: int
+    created: int
+    completed: int
+    became_overdue: int
+    cumulative_created: int
+    cumulative_completed: int
+
+class TaskTimeSeriesResponse(BaseModel):
+    project_id: UUID
+    user_id: Optional[UUID] = None
+    start: date
+    end: date
+    points: List[TaskStatsPoint] = Field(default_factory=list)
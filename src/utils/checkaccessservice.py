@@ -1,18 +1,20 @@
 from functools import wraps
 from fastapi import HTTPException
+from models.role import RoleList
 
 def check_access(access_needed: str):
+    needed_bit = RoleList(access_needed).bit
     def decorator(func):
         @wraps(func)
         async def wrapper(*args, **kwargs):
             request = kwargs.get("request")
             if not request:
                 raise HTTPException(status_code=400, detail="Request object is missing")
-            roles = request.get("roles")
+            role_mask = request.get("role_mask", 0)
             user = request.user
             if not user or not user.is_active:
                 raise HTTPException(status_code=400, detail="User is not present / active")
-            if (not roles or access_needed not in roles):
+            if not role_mask & needed_bit:
                 raise HTTPException(status_code=400, detail="User is not authorized to do this action")
             return await func(*args, **kwargs)
         return wrapper
@@ -0,0 +1,81 @@
+import difflib
+import os
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy import event
+
+# Latency ceilings are for a local database; slower machines (CI) scale them with this factor
+LATENCY_FACTOR = float(os.environ.get("QUERY_BUDGET_LATENCY_FACTOR", "1"))
+
+@dataclass(frozen=True)
+class Budget:
+    # Ceilings for one request, authentication included
+    queries: int
+    ms: float
+    # Extra queries allowed per item of a bulk request
+    per_item: int = 0
+
+    def max_queries(self, items: int = 0) -> int:
+        return self.queries + self.per_item * items
+
+def normalize_sql(statement: str) -> str:
+    # Same shape whatever the bind values and the length of expanded IN lists
+    statement = re.sub(r"\s+", " ", statement).strip()
+    statement = re.sub(r"\$\d+(::[\w\[\]]+)?", "?", statement)
+    return re.sub(r"\(\?(, \?)+\)", "(?, ...)", statement)
+
+class QueryLog:
+    # Every statement sent by the given engines while a capture is open
+    def __init__(self, engines):
+        self._statements: Optional[list[str]] = None
+        for engine in engines:
+            event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self._statements is not None:
+            self._statements.append(normalize_sql(statement))
+
+    @contextmanager
+    def capture(self):
+        self._statements = statements = []
+        try:
+            yield statements
+        finally:
+            self._statements = None
+
+def numbered(statements: list[str]) -> str:
+    return "\n".join(f"{index:3}. {statement}" for index, statement in enumerate(statements, 1))
+
+class BudgetChecker:
+    # The first fixture size measured for an endpoint becomes its baseline: the other sizes must
+    # emit the same number of queries (no per-row queries), and failures show the SQL diff against it
+    def __init__(self):
+        self._baselines: dict[str, tuple[str, list[str]]] = {}
+
+    def check(self, endpoint: str, size: str, statements: list[str], median_ms: float, budget: Budget, items: int = 0):
+        problems = []
+        max_queries = budget.max_queries(items)
+        if len(statements) > max_queries:
+            problems.append(f"{len(statements)} queries, budget {max_queries}")
+        baseline = self._baselines.get(endpoint)
+        if baseline is not None and len(statements) != len(baseline[1]):
+            problems.append(f"{len(statements)} queries, {len(baseline[1])} with the {baseline[0]} fixture")
+        if median_ms > budget.ms * LATENCY_FACTOR:
+            problems.append(f"median {median_ms:.1f} ms, budget {budget.ms * LATENCY_FACTOR:.1f} ms")
+        if baseline is None and len(statements) <= max_queries:
+            self._baselines[endpoint] = (size, statements)
+        if not problems:
+            return
+
+        message = [f"{endpoint} [{size}]: {'; '.join(problems)}"]
+        if baseline is not None:
+            message += difflib.unified_diff(
+                baseline[1], statements,
+                fromfile=f"{baseline[0]} ({len(baseline[1])} queries)", tofile=f"{size} ({len(statements)} queries)",
+                lineterm="",
+            )
+        else:
+            message.append(numbered(statements))
+        raise AssertionError("\n".join(message))
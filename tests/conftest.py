@@ -0,0 +1,96 @@
+import argparse
+import json
+import os
+from pathlib import Path
+import httpx
+import pytest
+from .postgres import DisposablePostgres
+
+ROOT = Path(__file__).resolve().parent.parent
+SECOND_SHARD = "b"
+
+def pytest_configure(config):
+    # Settings are read when src.config is first imported, so the database has to exist
+    # (and the environment point at it) before any test module is collected
+    try:
+        postgres = DisposablePostgres.start()
+    except Exception as error:
+        config.postgres_error = str(error)
+        return
+    try:
+        shard_database = postgres.add_database(SECOND_SHARD)
+    except Exception as error:
+        postgres.stop()
+        config.postgres_error = str(error)
+        return
+    config.postgres = postgres
+    os.environ.update({
+        "DB_URL": postgres.url,
+        "DB_ASYNC_URL": postgres.async_url,
+        # A second database, so project routing and moves run across real shards
+        "DB_SHARDS": json.dumps({SECOND_SHARD: postgres.async_url_for(shard_database)}),
+        # Deterministic query counts: the project directory stays cached and reads never hit the micro-cache
+        "PROJECT_CACHE_TTL_SECONDS": "3600",
+        "SINGLE_FLIGHT_CACHE_SECONDS": "0",
+    })
+    from alembic import command
+    from alembic.config import Config
+    # Shard first: the default database's run reads the other shards to backfill memberships
+    for shard in (SECOND_SHARD, "default"):
+        alembic_config = Config(str(ROOT / "alembic.ini"), cmd_opts=argparse.Namespace(x=[f"shard={shard}"]))
+        alembic_config.set_main_option("script_location", str(ROOT / "alembic"))
+        command.upgrade(alembic_config, "head")
+
+def pytest_unconfigure(config):
+    postgres = getattr(config, "postgres", None)
+    if postgres is not None:
+        postgres.stop()
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture(scope="session")
+def postgres(pytestconfig):
+    if not hasattr(pytestconfig, "postgres"):
+        # Locally the database tests are skipped; in CI they must not pass without having run
+        if os.environ.get("CI"):
+            pytest.fail(f"PostgreSQL is required when CI is set: {pytestconfig.postgres_error}")
+        pytest.skip(pytestconfig.postgres_error)
+    return pytestconfig.postgres
+
+@pytest.fixture(scope="session")
+async def app(postgres):
+    # Background services are not started (no lifespan): their queries would land in the counts
+    from src.main import app
+    from src.bootstrap import seed_roles
+    from src.database import dispose_engines
+    await seed_roles()
+    yield app
+    await dispose_engines()
+
+@pytest.fixture(scope="session")
+async def client(app):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+        yield client
+
+@pytest.fixture(scope="session")
+async def datasets(app):
+    from .seed import SIZES, seed_project
+    return {size: await seed_project(size, task_count) for size, task_count in SIZES.items()}
+
+@pytest.fixture
+async def workspace(app):
+    from .seed import seed_workspace
+    return await seed_workspace()
+
+@pytest.fixture(scope="session")
+def query_log(app):
+    from src.database import shards
+    from .budget import QueryLog
+    return QueryLog([shard.engine for shard in shards.values()])
+
+@pytest.fixture(scope="session")
+def budgets():
+    from .budget import BudgetChecker
+    return BudgetChecker()
@@ -0,0 +1,112 @@
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from dataclasses import dataclass, field
+from typing import Optional
+from sqlalchemy.engine import make_url
+
+def find_pg_bin() -> Optional[str]:
+    candidates = [os.environ.get("PG_BIN"), os.path.dirname(shutil.which("initdb") or "")]
+    candidates += sorted(glob.glob("/usr/lib/postgresql/*/bin"), reverse=True)
+    for directory in candidates:
+        if directory and os.path.exists(os.path.join(directory, "initdb")):
+            return directory
+    return None
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+@dataclass
+class DisposablePostgres:
+    # A database that only lives for one test session: created on the server in TEST_DATABASE_URL
+    # (any database on it, the role needs CREATEDB), or in a temporary cluster started with the
+    # local initdb / pg_ctl when that variable is not set
+    admin_url: str
+    database: str
+    data_dir: Optional[str] = None
+    pg_bin: Optional[str] = None
+    # Further databases on the same server, e.g. extra shards
+    extra_databases: list = field(default_factory=list)
+
+    @classmethod
+    def start(cls) -> "DisposablePostgres":
+        database = f"pmt_test_{uuid.uuid4().hex[:12]}"
+        server = os.environ.get("TEST_DATABASE_URL")
+        if server:
+            instance = cls(admin_url=server, database=database)
+        else:
+            instance = cls.temporary_cluster(database)
+        try:
+            instance.execute(f'CREATE DATABASE "{database}"')
+        except Exception:
+            if instance.data_dir is not None:
+                instance.stop()
+            raise
+        return instance
+
+    @classmethod
+    def temporary_cluster(cls, database: str) -> "DisposablePostgres":
+        pg_bin = find_pg_bin()
+        if pg_bin is None:
+            raise RuntimeError("No PostgreSQL server: set TEST_DATABASE_URL or put initdb/pg_ctl on PATH (or PG_BIN)")
+        data_dir = tempfile.mkdtemp(prefix="pmt-test-pg-")
+        port = free_port()
+        subprocess.run(
+            [os.path.join(pg_bin, "initdb"), "-D", data_dir, "-U", "postgres", "-A", "trust", "-E", "UTF8", "--no-sync"],
+            check=True, capture_output=True,
+        )
+        # Durability is irrelevant for a throwaway cluster
+        options = f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1 -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+        subprocess.run(
+            [os.path.join(pg_bin, "pg_ctl"), "-D", data_dir, "-o", options, "-l", os.path.join(data_dir, "server.log"), "-w", "start"],
+            check=True, capture_output=True,
+        )
+        return cls(
+            admin_url=f"postgresql://postgres@127.0.0.1:{port}/postgres", database=database, data_dir=data_dir, pg_bin=pg_bin,
+        )
+
+    @property
+    def url(self) -> str:
+        return self.url_for(self.database)
+
+    @property
+    def async_url(self) -> str:
+        return self.async_url_for(self.database)
+
+    def url_for(self, database: str) -> str:
+        return make_url(self.admin_url).set(drivername="postgresql", database=database).render_as_string(hide_password=False)
+
+    def async_url_for(self, database: str) -> str:
+        return make_url(self.url_for(database)).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+    def add_database(self, suffix: str) -> str:
+        database = f"{self.database}_{suffix}"
+        self.execute(f'CREATE DATABASE "{database}"')
+        self.extra_databases.append(database)
+        return database
+
+    def execute(self, statement: str):
+        import psycopg2
+        connection = psycopg2.connect(make_url(self.admin_url).set(drivername="postgresql").render_as_string(hide_password=False))
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(statement)
+        finally:
+            connection.close()
+
+    def stop(self):
+        if self.data_dir is None:
+            for database in [*self.extra_databases, self.database]:
+                self.execute(f'DROP DATABASE IF EXISTS "{database}" WITH (FORCE)')
+            return
+        subprocess.run(
+            [os.path.join(self.pg_bin, "pg_ctl"), "-D", self.data_dir, "-m", "immediate", "stop"], capture_output=True,
+        )
+        shutil.rmtree(self.data_dir, ignore_errors=True)
@@ -0,0 +1,148 @@
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from models.project import Project, ProjectMember, ProjectStatus
+from models.role import Role, RoleList, UserRoleLink
+from models.task import Task, TaskAssignee, TaskDependency, TaskStatus, TaskPriority
+from models.user import User
+from src.database import SessionLocal, DEFAULT_SHARD
+from src.utils.token_service import create_access_token
+
+# Tasks per fixture project; query counts must not change between them
+SIZES = {"small": 10, "medium": 200, "large": 2000}
+USERS = 8
+INSERT_CHUNK = 1000
+
+@dataclass
+class Dataset:
+    size: str
+    project_id: uuid.UUID
+    owner_id: uuid.UUID
+    token: str
+    # A task with subtasks, dependencies, blocked_by and assignees
+    probe_task_id: uuid.UUID
+    task_ids: list = field(default_factory=list)
+    # Open tasks that are not parents, safe to update repeatedly
+    open_task_ids: list = field(default_factory=list)
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}", "X-Project-Id": str(self.project_id)}
+
+@dataclass
+class Workspace:
+    # An empty project with one member, for tests that change data
+    project_id: uuid.UUID
+    user_id: uuid.UUID
+    token: str
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}", "X-Project-Id": str(self.project_id)}
+
+async def insert_chunked(session, table, rows: list[dict]):
+    for start in range(0, len(rows), INSERT_CHUNK):
+        await session.execute(insert(table).values(rows[start:start + INSERT_CHUNK]))
+
+async def seed_users(session, count: int, admin: bool = False) -> list[uuid.UUID]:
+    # Every user holds every role; ADMIN only when asked for, it skips the membership checks
+    user_ids = [uuid.uuid4() for _ in range(count)]
+    await insert_chunked(session, User.__table__, [
+        {"id": user_id, "email": f"{user_id}@budget.test", "full_name": f"User {index}", "password_hash": "-",
+         "is_active": True, "created_at": datetime.now(timezone.utc)}
+        for index, user_id in enumerate(user_ids)
+    ])
+    roles = select(Role.id) if admin else select(Role.id).where(Role.code != RoleList.ADMIN)
+    role_ids = (await session.execute(roles)).scalars().all()
+    await insert_chunked(session, UserRoleLink.__table__, [
+        {"user_id": user_id, "role_id": role_id, "is_active": True} for user_id in user_ids for role_id in role_ids
+    ])
+    return user_ids
+
+async def seed_project(size: str, task_count: int) -> Dataset:
+    # One project per size: a tenth of the tasks are parents of the rest, every task depends on
+    # the previous one, has two assignees and one of three statuses; the first user created them all
+    today = date.today()
+    now = datetime.now(timezone.utc)
+    async with SessionLocal() as session:
+        user_ids = await seed_users(session, USERS)
+        owner_id = user_ids[0]
+        project_id = uuid.uuid4()
+        await session.execute(insert(Project).values(
+            id=project_id, name=f"budget-{size}", shard=DEFAULT_SHARD, status=ProjectStatus.active,
+            created_by=owner_id, created_at=now,
+        ))
+        await session.execute(insert(ProjectMember).values(project_id=project_id, user_id=owner_id, added_at=now))
+
+        task_ids = [uuid.uuid4() for _ in range(task_count)]
+        parents = task_ids[:max(1, task_count // 10)]
+        statuses = [TaskStatus.pending, TaskStatus.in_progress, TaskStatus.completed]
+        tasks = []
+        for index, task_id in enumerate(task_ids):
+            is_parent = index < len(parents)
+            task_status = TaskStatus.pending if is_parent else statuses[index % 3]
+            tasks.append({
+                "id": task_id,
+                "title": f"Task {index}",
+                "description": f"Budget fixture task {index} of {size}",
+                "status": task_status,
+                "priority": list(TaskPriority)[index % 3],
+                "due_date": today + timedelta(days=index % 30 - 15),
+                "created_at": now,
+                "updated_at": now,
+                "completed_at": now if task_status == TaskStatus.completed else None,
+                "version": 1,
+                "created_by": owner_id,
+                "project_id": project_id,
+                "parent_task_id": None if is_parent else parents[index % len(parents)],
+            })
+        await insert_chunked(session, Task.__table__, tasks)
+        await insert_chunked(session, TaskAssignee.__table__, [
+            {"task_id": task_id, "user_id": user_ids[(index + offset) % USERS], "is_owner": offset == 0}
+            for index, task_id in enumerate(task_ids) for offset in (0, 1)
+        ])
+        dependencies = [{"task_id": task_ids[index], "depends_on_task_id": task_ids[index - 1]} for index in range(1, task_count)]
+        if task_count > 2:
+            dependencies.append({"task_id": task_ids[0], "depends_on_task_id": task_ids[-1]})
+        await insert_chunked(session, TaskDependency.__table__, dependencies)
+        await session.commit()
+
+    return Dataset(
+        size=size,
+        project_id=project_id,
+        owner_id=owner_id,
+        token=create_access_token({"sub": str(owner_id), "email": f"{owner_id}@budget.test"}),
+        probe_task_id=task_ids[0],
+        task_ids=task_ids,
+        open_task_ids=[
+            task["id"] for task in tasks
+            if task["status"] != TaskStatus.completed and task["parent_task_id"] is not None
+        ],
+    )
+
+async def seed_workspace(admin: bool = False) -> Workspace:
+    async with SessionLocal() as session:
+        (user_id,) = await seed_users(session, 1, admin)
+        project_id = uuid.uuid4()
+        now = datetime.now(timezone.utc)
+        await session.execute(insert(Project).values(
+            id=project_id, name=f"workspace-{project_id.hex[:8]}", shard=DEFAULT_SHARD, status=ProjectStatus.active,
+            created_by=user_id, created_at=now,
+        ))
+        await session.execute(insert(ProjectMember).values(project_id=project_id, user_id=user_id, added_at=now))
+        await session.commit()
+    return Workspace(
+        project_id=project_id,
+        user_id=user_id,
+        token=create_access_token({"sub": str(user_id), "email": f"{user_id}@budget.test"}),
+    )
+
+def task_row(workspace: Workspace, title: str, status: TaskStatus = TaskStatus.pending, **values) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "id": uuid.uuid4(), "title": title, "description": None, "status": status, "priority": TaskPriority.medium,
+        "due_date": None, "created_at": now, "updated_at": now, "completed_at": None, "version": 1,
+        "created_by": workspace.user_id, "project_id": workspace.project_id, "parent_task_id": None, **values,
+    }
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from models.task import Task, TaskDependency, TaskStatus
+from .seed import insert_chunked, task_row
+
+pytestmark = pytest.mark.anyio
+
+def ids(items) -> set:
+    return {item["id"] for item in items}
+
+async def test_links_to_archived_tasks_survive(client, workspace):
+    from src.config import settings
+    from src.database import SessionLocal
+    from src.taskmanager.archive import archive_completed_tasks, ensure_partitions
+
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=settings.ARCHIVE_COMPLETED_AFTER_DAYS)
+
+    def completed(title, days_before_cutoff, **values):
+        at = cutoff - timedelta(days=days_before_cutoff)
+        return task_row(workspace, title, TaskStatus.completed, completed_at=at, **values)
+
+    parent = task_row(workspace, "Live parent")
+    upstream = completed("Archived first", 3)
+    child = completed("Archived subtask", 2, parent_task_id=parent["id"])
+    downstream = completed("Archived last", 1)
+    live = task_row(workspace, "Live dependent")
+    async with SessionLocal() as session:
+        await insert_chunked(session, Task.__table__, [parent, upstream, child, downstream, live])
+        await insert_chunked(session, TaskDependency.__table__, [
+            {"task_id": live["id"], "depends_on_task_id": upstream["id"]},
+            {"task_id": downstream["id"], "depends_on_task_id": upstream["id"]},
+        ])
+        await ensure_partitions(session, cutoff)
+        await session.commit()
+
+    # One task per batch, oldest completion first, so "Archived last" only finds its link to
+    # "Archived first" in the archive
+    for _ in range(3):
+        assert await archive_completed_tasks(cutoff, 1) == 1
+
+    async def detail(task):
+        response = await client.get(f"/task/{task['id']}", headers=workspace.headers)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    assert ids((await detail(live))["dependencies"]) == {str(upstream["id"])}
+    assert ids((await detail(parent))["subtasks"]) == {str(child["id"])}
+    assert ids((await detail(upstream))["blocked_by"]) == {str(live["id"]), str(downstream["id"])}
+    assert ids((await detail(downstream))["dependencies"]) == {str(upstream["id"])}
+
+    # The archived subtask still points at its parent
+    response = await client.delete(f"/task/{parent['id']}", headers=workspace.headers)
+    assert response.status_code == 400, response.text
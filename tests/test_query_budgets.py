@@ -0,0 +1,119 @@
+import statistics
+import time
+import pytest
+from .budget import Budget
+from .seed import SIZES
+
+pytestmark = pytest.mark.anyio
+
+# Whole-request ceilings, authentication included (1 query: the user, with their role mask).
+# Lower them when an endpoint gets cheaper; raising one needs a reason in the commit.
+BUDGETS = {
+    "auth": Budget(queries=1, ms=20),
+    # Task row + subtasks, dependencies, blocked_by, assignees
+    "GET /task/{task_id}": Budget(queries=6, ms=50),
+    "GET /task/{task_id}?fields=title,status": Budget(queries=2, ms=30),
+    "POST /task/batch-get": Budget(queries=6, ms=150),
+    "GET /task/me": Budget(queries=2, ms=50),
+    # Project lock, the flush (task rows, events, history) and the due history snapshots once,
+    # then per task: the row, the version bump, the assignees and the ancestors for the event
+    "PUT /task/update (bulk)": Budget(queries=8, per_item=4, ms=300),
+    "GET /task/analytics/get-task-distribution": Budget(queries=5, ms=300),
+}
+BATCH_IDS = 50
+BULK_ITEMS = 5
+LATENCY_RUNS = 5
+
+async def measure(query_log, call):
+    # One warm-up (pool connections, project directory cache), one counted call, then timed calls
+    await call()
+    with query_log.capture() as statements:
+        response = await call()
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return response, statements, statistics.median(timings)
+
+@pytest.mark.parametrize("size", SIZES)
+async def test_auth_middleware(size, datasets, query_log, budgets):
+    from src.middlewares import authenticate_token
+    dataset = datasets[size]
+
+    async def call():
+        return await authenticate_token(dataset.token)
+
+    authenticated, statements, median_ms = await measure(query_log, call)
+    assert authenticated is not None and authenticated[0].id == dataset.owner_id
+    budgets.check("auth", size, statements, median_ms, BUDGETS["auth"])
+
+@pytest.mark.parametrize("size", SIZES)
+@pytest.mark.parametrize("endpoint, params", [
+    ("GET /task/{task_id}", None),
+    ("GET /task/{task_id}?fields=title,status", {"fields": "title,status"}),
+])
+async def test_task_detail(size, endpoint, params, client, datasets, query_log, budgets):
+    dataset = datasets[size]
+
+    async def call():
+        return await client.get(f"/task/{dataset.probe_task_id}", params=params, headers=dataset.headers)
+
+    response, statements, median_ms = await measure(query_log, call)
+    assert response.status_code == 200, response.text
+    budgets.check(endpoint, size, statements, median_ms, BUDGETS[endpoint])
+
+@pytest.mark.parametrize("size", SIZES)
+async def test_batch_get(size, client, datasets, query_log, budgets):
+    dataset = datasets[size]
+    ids = [str(task_id) for task_id in dataset.task_ids[:BATCH_IDS]]
+
+    async def call():
+        return await client.post("/task/batch-get", json={"ids": ids}, headers=dataset.headers)
+
+    response, statements, median_ms = await measure(query_log, call)
+    assert response.status_code == 200, response.text
+    assert len(response.json()["items"]) == len(ids)
+    budgets.check("POST /task/batch-get", size, statements, median_ms, BUDGETS["POST /task/batch-get"])
+
+@pytest.mark.parametrize("size", SIZES)
+async def test_inbox(size, client, datasets, query_log, budgets):
+    dataset = datasets[size]
+
+    async def call():
+        return await client.get("/task/me", params={"limit": 20}, headers=dataset.headers)
+
+    response, statements, median_ms = await measure(query_log, call)
+    assert response.status_code == 200, response.text
+    budgets.check("GET /task/me", size, statements, median_ms, BUDGETS["GET /task/me"])
+
+@pytest.mark.parametrize("size", SIZES)
+async def test_bulk_update(size, client, datasets, query_log, budgets):
+    dataset = datasets[size]
+    task_ids = dataset.open_task_ids[:BULK_ITEMS]
+    runs = iter(range(1_000_000))
+
+    async def call():
+        # A new title every call, so every call really changes the tasks
+        run = next(runs)
+        return await client.put("/task/update", json={
+            "tasks": [{"id": str(task_id), "title": f"Renamed {run}"} for task_id in task_ids],
+        }, headers=dataset.headers)
+
+    response, statements, median_ms = await measure(query_log, call)
+    assert response.status_code == 200, response.text
+    budgets.check(
+        "PUT /task/update (bulk)", size, statements, median_ms, BUDGETS["PUT /task/update (bulk)"], items=len(task_ids),
+    )
+
+@pytest.mark.parametrize("size", SIZES)
+async def test_analytics(size, client, datasets, query_log, budgets):
+    dataset = datasets[size]
+
+    async def call():
+        return await client.get("/task/analytics/get-task-distribution", headers=dataset.headers)
+
+    response, statements, median_ms = await measure(query_log, call)
+    assert response.status_code == 200, response.text
+    endpoint = "GET /task/analytics/get-task-distribution"
+    budgets.check(endpoint, size, statements, median_ms, BUDGETS[endpoint])
@@ -0,0 +1,65 @@
+from uuid import UUID
+import pytest
+from sqlmodel import select
+from models.project import Project
+from models.task import Task
+from models.user import User, MIRRORED_PASSWORD_HASH
+from .conftest import SECOND_SHARD
+from .seed import seed_workspace
+
+pytestmark = pytest.mark.anyio
+
+async def test_project_on_second_shard_is_routed_and_moved_back(client, monkeypatch):
+    from src.config import settings
+    from src.database import SessionLocal, DEFAULT_SHARD, get_shard
+    from src.projects.move import move_project
+
+    admin = await seed_workspace(admin=True)
+    member = await seed_workspace()
+
+    # Only admins place projects themselves
+    response = await client.post("/task/projects", json={"name": "Pinned", "shard": SECOND_SHARD}, headers=member.headers)
+    assert response.status_code == 403, response.text
+    response = await client.post("/task/projects", json={"name": "Pinned", "shard": SECOND_SHARD}, headers=admin.headers)
+    assert response.status_code == 201, response.text
+    assert response.json()["shard"] == SECOND_SHARD
+    project_id = UUID(response.json()["id"])
+
+    response = await client.post(
+        f"/task/projects/{project_id}/members", json={"user_id": str(member.user_id)}, headers=admin.headers,
+    )
+    assert response.status_code == 201, response.text
+    headers = {**member.headers, "X-Project-Id": str(project_id)}
+
+    response = await client.post("/task/create", json={"title": "On shard b"}, headers=headers)
+    assert response.status_code == 201, response.text
+    task_id = UUID(response.json()["id"])
+    response = await client.put("/task/update", json={"id": str(task_id), "title": "Renamed on shard b"}, headers=headers)
+    assert response.status_code == 200, response.text
+
+    async with get_shard(SECOND_SHARD).sessionmaker() as shard:
+        assert (await shard.get(Task, task_id)).title == "Renamed on shard b"
+        # The creator was copied to the shard without credentials
+        mirrored = (await shard.execute(select(User).where(User.id == member.user_id))).scalars().one()
+        assert mirrored.password_hash == MIRRORED_PASSWORD_HASH
+    async with SessionLocal() as directory:
+        assert await directory.get(Task, task_id) is None
+
+    response = await client.get(f"/task/{task_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Renamed on shard b"
+
+    # No need to wait out the directory cache: the move invalidates this worker's entry
+    monkeypatch.setattr(settings, "PROJECT_CACHE_TTL_SECONDS", 0)
+    assert await move_project(project_id, DEFAULT_SHARD) == 1
+
+    async with SessionLocal() as directory:
+        assert (await directory.get(Project, project_id)).shard == DEFAULT_SHARD
+        assert (await directory.get(Task, task_id)).title == "Renamed on shard b"
+    async with get_shard(SECOND_SHARD).sessionmaker() as shard:
+        assert await shard.get(Task, task_id) is None
+
+    response = await client.get(f"/task/{task_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    response = await client.put("/task/update", json={"id": str(task_id), "status": "completed"}, headers=headers)
+    assert response.status_code == 200, response.text
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from src.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+class Resource:
+    # A value that a write can change, read either at once or by a read that waits to be released
+    def __init__(self, value):
+        self.value = value
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def read(self):
+        return self.value
+
+    async def slow_read(self):
+        value = self.value
+        self.started.set()
+        await self.release.wait()
+        return value
+
+async def test_concurrent_reads_share_one_execution():
+    flights = SingleFlight()
+    resource = Resource("value")
+    first = asyncio.ensure_future(flights.do("route", "key", resource.slow_read))
+    await resource.started.wait()
+    second = asyncio.ensure_future(flights.do("route", "key", resource.slow_read))
+    await asyncio.sleep(0)
+    resource.release.set()
+    assert await first == await second == "value"
+    assert flights.stats()["route"]["executions"] == 1
+    assert flights.stats()["route"]["coalesced"] == 1
+
+async def test_read_after_forget_does_not_join_an_older_flight():
+    flights = SingleFlight(cache_seconds=60)
+    resource = Resource("before")
+    stale = asyncio.ensure_future(flights.do("route", "key", resource.slow_read))
+    await resource.started.wait()
+
+    resource.value = "after"
+    flights.forget("route", "key")
+    # Joining the older flight would wait for it to be released
+    assert await asyncio.wait_for(flights.do("route", "key", resource.read), timeout=1) == "after"
+
+    resource.release.set()
+    assert await stale == "before"
+    # The older flight landed after the newer one and must not have replaced its cached result
+    assert await flights.do("route", "key", resource.read) == "after"
+    assert flights.stats()["route"]["cache_hits"] == 1
+
+async def test_flight_forgotten_while_running_is_not_cached():
+    flights = SingleFlight(cache_seconds=60)
+    resource = Resource("before")
+    stale = asyncio.ensure_future(flights.do("route", "key", resource.slow_read))
+    await resource.started.wait()
+
+    resource.value = "after"
+    flights.forget("route", "key")
+    resource.release.set()
+    assert await stale == "before"
+
+    assert await flights.do("route", "key", resource.read) == "after"
+    assert flights.stats()["route"]["executions"] == 2
+    assert flights.stats()["route"]["cache_hits"] == 0
@@ -0,0 +1,133 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+async def create_task(client, workspace, **values) -> dict:
+    response = await client.post("/task/create", json={"title": "Task", **values}, headers=workspace.headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+async def test_update_with_stale_version_conflicts(client, workspace):
+    task = await create_task(client, workspace)
+    update = {"id": task["id"], "title": "Renamed"}
+
+    response = await client.put("/task/update", json=update, headers={**workspace.headers, "If-Match": '"1"'})
+    assert response.status_code == 200, response.text
+    assert response.headers["ETag"] == '"2"'
+
+    response = await client.put("/task/update", json=update, headers={**workspace.headers, "If-Match": '"1"'})
+    assert response.status_code == 409, response.text
+    assert response.json()["detail"]["current_version"] == 2
+
+async def test_compressed_details_keep_a_strong_etag(client, workspace):
+    task = await create_task(client, workspace, description="x" * 4096)
+    response = await client.get(f"/task/{task['id']}", headers={**workspace.headers, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200, response.text
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == '"1"'
+
+    update = {"id": task["id"], "title": "Renamed"}
+    response = await client.put("/task/update", json=update, headers={**workspace.headers, "If-Match": 'W/"1"'})
+    assert response.status_code == 412, response.text
+    response = await client.put("/task/update", json=update, headers={**workspace.headers, "If-Match": '"1"'})
+    assert response.status_code == 200, response.text
+
+async def test_claim_takes_each_task_once(client, workspace):
+    task = await create_task(client, workspace, priority="high")
+
+    response = await client.post("/task/claim", headers=workspace.headers)
+    assert response.status_code == 200, response.text
+    assert response.json()["id"] == task["id"]
+    assert response.json()["status"] == "in_progress"
+
+    response = await client.post("/task/claim", headers=workspace.headers)
+    assert response.status_code == 204, response.text
+
+async def test_idempotency_key_replays_the_first_response(client, workspace):
+    headers = {**workspace.headers, "Idempotency-Key": str(uuid.uuid4())}
+    first = await client.post("/task/create", json={"title": "Once"}, headers=headers)
+    second = await client.post("/task/create", json={"title": "Once"}, headers=headers)
+    assert first.status_code == second.status_code == 201
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert second.json()["id"] == first.json()["id"]
+
+    reused = await client.post("/task/create", json={"title": "Different"}, headers=headers)
+    assert reused.status_code == 422, reused.text
+
+async def test_as_of_returns_the_earlier_state(client, workspace):
+    task = await create_task(client, workspace, title="Before")
+    # History timestamps come from the database clock; keep clear of it on both sides
+    await asyncio.sleep(0.2)
+    between = datetime.now(timezone.utc)
+    await asyncio.sleep(0.2)
+    response = await client.put("/task/update", json={"id": task["id"], "title": "After"}, headers=workspace.headers)
+    assert response.status_code == 200, response.text
+
+    response = await client.get(
+        f"/task/{task['id']}/history/as-of", params={"at": between.isoformat()}, headers=workspace.headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["title"] == "Before"
+
+async def test_projects_are_for_members_only(client, workspace):
+    from .seed import seed_workspace
+    outsider = await seed_workspace()
+    response = await client.get("/task/me", headers={**outsider.headers, "X-Project-Id": str(workspace.project_id)})
+    assert response.status_code == 403, response.text
+
+async def test_linked_deltas_trigger_snapshots(client, workspace, monkeypatch):
+    from sqlmodel import select
+    from models.history import TaskHistory, TaskHistoryType
+    from src.config import settings
+    from src.database import SessionLocal
+    monkeypatch.setattr(settings, "TASK_HISTORY_SNAPSHOT_EVERY", 3)
+    target = await create_task(client, workspace, title="Depended on")
+    # Every dependent adds a linked record to the target without changing its version
+    for index in range(4):
+        dependent = await create_task(client, workspace, title=f"Dependent {index}")
+        response = await client.put(
+            "/task/update", json={"id": dependent["id"], "add_depends_on_ids": [target["id"]]}, headers=workspace.headers,
+        )
+        assert response.status_code == 200, response.text
+
+    async with SessionLocal() as session:
+        records = (await session.execute(
+            select(TaskHistory).where(TaskHistory.task_id == uuid.UUID(target["id"])).order_by(TaskHistory.id)
+        )).scalars().all()
+    assert [record.change_type for record in records] == [
+        TaskHistoryType.created.value, *[TaskHistoryType.linked.value] * 3, TaskHistoryType.snapshot.value,
+        TaskHistoryType.linked.value,
+    ]
+    assert records[-2].version == 1
+    assert len(records[-2].state["blocked_by_ids"]) == 3
+
+    response = await client.get(
+        f"/task/{target['id']}/history/as-of", params={"at": datetime.now(timezone.utc).isoformat()}, headers=workspace.headers,
+    )
+    assert response.status_code == 200, response.text
+    assert len(response.json()["blocked_by_ids"]) == 4
+
+async def test_slow_request_keeps_its_idempotency_claim(workspace, monkeypatch):
+    from fastapi.responses import JSONResponse
+    from src.config import settings
+    from src.idempotency import IdempotencyStore
+    monkeypatch.setattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 0.3)
+    monkeypatch.setattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 0.2)
+    key = str(uuid.uuid4())
+    runs = []
+
+    async def slow_write():
+        runs.append(None)
+        await asyncio.sleep(1)
+        return JSONResponse({"done": True}, status_code=201)
+
+    # Two stores stand in for two workers, so the retry cannot join the first attempt in memory
+    first = asyncio.create_task(IdempotencyStore(8).run(workspace.user_id, key, "request", slow_write))
+    await asyncio.sleep(0.6)
+    retry = await IdempotencyStore(8).run(workspace.user_id, key, "request", slow_write)
+    assert retry.status_code == 409
+    assert (await first).status_code == 201
+    assert len(runs) == 1